@@ -2,27 +2,27 @@ import json
 import os
 import hashlib
 import secrets
-import bcrypt
 from datetime import datetime, timedelta
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from portal_common import (
+    get_security_headers, get_origin, get_client_ip, extract_token, options_response,
+    get_db_connection, release_connection, write_log, write_log_tx, flush_logs_after,
+    invalidate_token, invalidate_user, signed_mode, issue_token, token_jti, revoke_token, revoke_user_tokens, SESSION_DAYS
+)
 from security import sanitize_string, sanitize_email, validate_password
-from security_headers import get_security_headers, get_cors_headers
-from rate_limiter import is_blocked, record_attempt, get_remaining_attempts
+from rate_limiter import is_blocked, record_attempt, record_failed_login
+from password_hasher import get_hasher, HasherBusyError
 
+MAX_SESSIONS_PER_USER = int(os.environ.get('MAX_SESSIONS_PER_USER', '10'))  # Старые сессии сверх лимита удаляются при входе
+
+@flush_logs_after
 def handler(event: dict, context) -> dict:
     """API для регистрации и авторизации пользователей"""
     method = event.get('httpMethod', 'GET')
     headers = event.get('headers', {})
-    origin = headers.get('Origin') or headers.get('origin')
+    origin = get_origin(headers)
     
     if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': get_cors_headers(origin),
-            'body': '',
-            'isBase64Encoded': False
-        }
+        return options_response(origin)
     
     if method != 'POST':
         return {
@@ -37,9 +37,7 @@ def handler(event: dict, context) -> dict:
         action = body.get('action')
         
         # Получаем IP клиента
-        request_context = event.get('requestContext', {})
-        identity = request_context.get('identity', {})
-        client_ip = identity.get('sourceIp', '0.0.0.0')
+        client_ip = get_client_ip(event)
         
         if action == 'register':
             return handle_register(body, client_ip, origin)
@@ -54,6 +52,9 @@ def handler(event: dict, context) -> dict:
         elif action == 'delete_self':
             token = extract_token(headers)
             return handle_delete_self(token, client_ip, origin)
+        elif action == 'logout':
+            token = extract_token(headers)
+            return handle_logout(token, origin)
         else:
             return {
                 'statusCode': 400,
@@ -70,70 +71,76 @@ def handler(event: dict, context) -> dict:
             'isBase64Encoded': False
         }
 
-def get_db_connection():
-    """Создание подключения к БД"""
-    dsn = os.environ.get('DATABASE_URL')
-    return psycopg2.connect(dsn, cursor_factory=RealDictCursor)
-
-def write_log(user_id, user_name, action_type, action_description, target_type=None, target_id=None, ip_address='0.0.0.0'):
-    """Записать лог активности в БД"""
-    conn = get_db_connection()
-    cur = conn.cursor()
-    try:
-        cur.execute(
-            """INSERT INTO t_p77465986_police_portal_creati.activity_logs 
-               (user_id, user_name, action_type, action_description, target_type, target_id, ip_address)
-               VALUES (%s, %s, %s, %s, %s, %s, %s)""",
-            (user_id, user_name, action_type, action_description, target_type, target_id, ip_address)
-        )
-        conn.commit()
-    except Exception as e:
-        print(f"ERROR write_log: {str(e)}")
-    finally:
-        cur.close()
-        conn.close()
-
 def hash_password(password: str) -> str:
     """Хеширование пароля с использованием bcrypt"""
-    password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt(rounds=12)
-    hashed = bcrypt.hashpw(password_bytes, salt)
-    return hashed.decode('utf-8')
+    return get_hasher().hash(password)
 
 def verify_password(password: str, stored_hash: str) -> bool:
     """Проверка пароля с использованием bcrypt"""
     try:
-        password_bytes = password.encode('utf-8')
-        stored_hash_bytes = stored_hash.encode('utf-8')
-        return bcrypt.checkpw(password_bytes, stored_hash_bytes)
+        return get_hasher().verify(password, stored_hash)
+    except HasherBusyError:
+        raise
     except Exception as e:
         print(f"Password verification error: {str(e)}")
         return False
 
+def busy_response(origin=None) -> dict:
+    """Ответ при переполненной очереди хеширования"""
+    headers = get_security_headers(origin)
+    headers['Retry-After'] = '1'
+    return {
+        'statusCode': 503,
+        'headers': headers,
+        'body': json.dumps({'error': 'Server is busy. Try again later.'}),
+        'isBase64Encoded': False
+    }
+
+_dummy_hash = None
+
+def get_dummy_hash() -> str:
+    """Хеш-заглушка для защиты от timing attacks (считается один раз на процесс)"""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = os.environ.get('AUTH_DUMMY_PASSWORD_HASH') or \
+                      hash_password('dummy_password_for_timing_protection')
+    return _dummy_hash
+
 def generate_token() -> str:
     """Генерация JWT-подобного токена"""
     return secrets.token_urlsafe(32)
 
-def extract_token_from_cookie(cookies: str) -> str:
-    """Извлечение токена из Cookie header"""
-    if not cookies:
-        return ''
-    
-    for cookie in cookies.split(';'):
-        cookie = cookie.strip()
-        if cookie.startswith('auth_token='):
-            return cookie.split('=', 1)[1]
-    return ''
+def session_token(user: dict, expires_at: datetime) -> str:
+    """Токен новой сессии: подписанный в режиме signed, иначе случайный"""
+    if signed_mode():
+        return issue_token(user, expires_at.timestamp())
+    return generate_token()
 
-def extract_token(headers: dict) -> str:
-    """Извлечение токена из Authorization header или Cookie"""
-    auth_header = headers.get('Authorization', '') or headers.get('authorization', '') or \
-                  headers.get('X-Authorization', '') or headers.get('x-authorization', '')
-    if auth_header.startswith('Bearer '):
-        return auth_header[7:]
-    cookies = headers.get('Cookie', '') or headers.get('cookie', '') or \
-              headers.get('X-Cookie', '') or headers.get('x-cookie', '')
-    return extract_token_from_cookie(cookies)
+def evict_sessions(cur, user_id: int):
+    """Удалить истёкшие и самые старые сессии пользователя сверх MAX_SESSIONS_PER_USER.
+    Действующие вытесненные токены отзываются: подписанный проверяется без таблицы sessions"""
+    # LEFT(token_hash, 32) — opaque_jti для строк, записанных до колонки jti
+    cur.execute(
+        """WITH evicted AS (
+               DELETE FROM sessions
+               WHERE user_id = %s AND (
+                   expires_at <= NOW() OR id NOT IN (
+                       SELECT id FROM sessions
+                       WHERE user_id = %s AND expires_at > NOW()
+                       ORDER BY id DESC
+                       LIMIT %s
+                   )
+               )
+               RETURNING user_id, jti, token_hash, expires_at
+           )
+           INSERT INTO token_revocations (user_id, jti, expires_at)
+           SELECT user_id, COALESCE(jti, LEFT(token_hash, 32)), expires_at
+           FROM evicted
+           WHERE expires_at > NOW()""",
+        (user_id, user_id, MAX_SESSIONS_PER_USER)
+    )
+    if cur.rowcount:
+        print(f"SESSIONS: evicted and revoked {cur.rowcount} sessions of user {user_id}")
 
 def handle_register(body: dict, client_ip: str = '0.0.0.0', origin=None) -> dict:
     """Регистрация нового пользователя"""
@@ -157,12 +164,50 @@ def handle_register(body: dict, client_ip: str = '0.0.0.0', origin=None) -> dict
             'isBase64Encoded': False
         }
     
+    # Хеш считается и для занятого email — ответ не выдаёт существование аккаунта по времени
+    try:
+        password_hash = hash_password(password)
+    except HasherBusyError:
+        return busy_response(origin)
+    
+    # Новый аккаунт не активирован: токен всегда случайный, данные берутся из БД
+    token = generate_token()
+    token_hash = hashlib.sha256(token.encode()).hexdigest()
+    expires_at = datetime.now() + timedelta(days=SESSION_DAYS)
+    
     conn = get_db_connection()
     cur = conn.cursor()
     
     try:
-        cur.execute("SELECT id FROM users WHERE email = %s", (email,))
-        if cur.fetchone():
+        # Пользователь, сессия и запись журнала — одним запросом; user_id проставляет триггер.
+        # Занятый email отсекается до INSERT: ON CONFLICT тратит значение последовательности
+        # на каждый повтор, а остаётся только для гонки двух регистраций
+        cur.execute(
+            """WITH new_user AS (
+                   INSERT INTO users (email, password_hash, full_name)
+                   SELECT %(email)s, %(password_hash)s, %(full_name)s
+                   WHERE NOT EXISTS (SELECT 1 FROM users WHERE email = %(email)s)
+                   ON CONFLICT (email) DO NOTHING
+                   RETURNING id, user_id, email, full_name
+               ), new_session AS (
+                   INSERT INTO sessions (user_id, token_hash, jti, expires_at)
+                   SELECT id, %(token_hash)s, %(jti)s, %(expires_at)s FROM new_user
+               ), new_log AS (
+                   INSERT INTO activity_logs
+                       (user_id, user_name, action_type, action_description, target_type, target_id, ip_address)
+                   SELECT id, full_name, 'AUTH', %(description)s, 'user', id, %(ip)s FROM new_user
+               )
+               SELECT id, user_id, email, full_name FROM new_user""",
+            {
+                'email': email, 'password_hash': password_hash, 'full_name': full_name,
+                'token_hash': token_hash, 'jti': token_jti(token), 'expires_at': expires_at,
+                'description': f'Зарегистрирован новый аккаунт: {full_name} ({email})', 'ip': client_ip
+            }
+        )
+        user = cur.fetchone()
+        conn.commit()
+        
+        if not user:
             return {
                 'statusCode': 400,
                 'headers': get_security_headers(origin),
@@ -170,34 +215,6 @@ def handle_register(body: dict, client_ip: str = '0.0.0.0', origin=None) -> dict
                 'isBase64Encoded': False
             }
         
-        password_hash = hash_password(password)
-        
-        cur.execute(
-            "INSERT INTO users (email, password_hash, full_name) VALUES (%s, %s, %s) RETURNING id, email, full_name",
-            (email, password_hash, full_name)
-        )
-        user = cur.fetchone()
-        user_id_internal = user['id']
-        
-        generated_user_id = str(user_id_internal).zfill(5)
-        cur.execute("UPDATE users SET user_id = %s WHERE id = %s", (generated_user_id, user_id_internal))
-        conn.commit()
-        
-        user['user_id'] = generated_user_id
-        
-        token = generate_token()
-        token_hash = hashlib.sha256(token.encode()).hexdigest()
-        expires_at = datetime.now() + timedelta(days=30)
-        
-        cur.execute(
-            "INSERT INTO sessions (user_id, token_hash, expires_at) VALUES (%s, %s, %s)",
-            (user['id'], token_hash, expires_at)
-        )
-        conn.commit()
-        
-        write_log(user['id'], full_name, 'AUTH', 
-                  f'Зарегистрирован новый аккаунт: {full_name} ({email})', 'user', user['id'], client_ip)
-        
         return {
             'statusCode': 201,
             'headers': get_security_headers(origin),
@@ -217,16 +234,19 @@ def handle_register(body: dict, client_ip: str = '0.0.0.0', origin=None) -> dict
         }
     finally:
         cur.close()
-        conn.close()
+        release_connection(conn)
 
 def handle_login(body: dict, client_ip: str = '0.0.0.0', origin=None) -> dict:
     """Авторизация пользователя с rate limiting"""
     login_input = body.get('email', '').strip()
     password = body.get('password', '')
+    is_user_id = login_input.isdigit() and len(login_input) <= 20
+    # Аккаунт для rate limiting: нормализованный ID или email
+    account = login_input.zfill(5) if is_user_id else login_input.lower()
     
-    # Проверка rate limiting
-    if is_blocked(client_ip):
-        print(f"SECURITY: Blocked login attempt from IP: {client_ip}")
+    # Проверка rate limiting (по IP и по аккаунту)
+    if is_blocked(client_ip, account):
+        print(f"SECURITY: Blocked login attempt for: {login_input} from IP: {client_ip}")
         return {
             'statusCode': 429,
             'headers': get_security_headers(origin),
@@ -242,33 +262,38 @@ def handle_login(body: dict, client_ip: str = '0.0.0.0', origin=None) -> dict:
             'isBase64Encoded': False
         }
     
+    # Хеш-заглушку готовим до поиска пользователя, чтобы первый вход
+    # в контейнере стоил одинаково для существующих и несуществующих аккаунтов
+    try:
+        dummy_hash = get_dummy_hash()
+    except HasherBusyError:
+        return busy_response(origin)
+    
     conn = get_db_connection()
     cur = conn.cursor()
     
     try:
-        if login_input.isdigit() and len(login_input) <= 5:
-            user_id = login_input.zfill(5)
+        if is_user_id:
             cur.execute(
                 "SELECT id, user_id, email, password_hash, full_name, role, is_active FROM users WHERE user_id = %s",
-                (user_id,)
+                (account,)
             )
         else:
-            email = login_input.lower()
             cur.execute(
                 "SELECT id, user_id, email, password_hash, full_name, role, is_active FROM users WHERE email = %s",
-                (email,)
+                (account,)
             )
         
         user = cur.fetchone()
         
         # Защита от timing attacks: всегда проверяем хеш, даже если пользователь не найден
-        dummy_hash = hash_password('dummy_password_for_timing_protection')
         password_valid = verify_password(password, user['password_hash'] if user else dummy_hash)
         
         if not user or not password_valid:
             print(f"SECURITY: Failed login attempt for: {login_input} from IP: {client_ip}")
-            record_attempt(client_ip, False)
-            remaining = get_remaining_attempts(client_ip)
+            # Оба счётчика — одним запросом на подключении входа
+            remaining = record_failed_login(client_ip, account, cur)
+            conn.commit()
             return {
                 'statusCode': 401,
                 'headers': get_security_headers(origin),
@@ -280,17 +305,29 @@ def handle_login(body: dict, client_ip: str = '0.0.0.0', origin=None) -> dict:
             }
         
         # Успешная попытка входа (даже для неактивных пользователей)
-        record_attempt(client_ip, True)
+        record_attempt(client_ip, True, account)
         print(f"SECURITY: Successful login for: {login_input} from IP: {client_ip}")
         
-        token = generate_token()
+        expires_at = datetime.now() + timedelta(days=SESSION_DAYS)
+        token = session_token(user, expires_at)
         token_hash = hashlib.sha256(token.encode()).hexdigest()
-        expires_at = datetime.now() + timedelta(days=30)
         
         cur.execute(
-            "INSERT INTO sessions (user_id, token_hash, expires_at) VALUES (%s, %s, %s)",
-            (user['id'], token_hash, expires_at)
+            "INSERT INTO sessions (user_id, token_hash, jti, expires_at) VALUES (%s, %s, %s, %s)",
+            (user['id'], token_hash, token_jti(token), expires_at)
         )
+        evict_sessions(cur, user['id'])
+        
+        # Прозрачное перехеширование, если стоимость bcrypt изменилась в настройках;
+        # при занятом пуле откладывается до следующего входа, а не ломает этот
+        if get_hasher().needs_rehash(user['password_hash']):
+            try:
+                cur.execute(
+                    "UPDATE users SET password_hash = %s WHERE id = %s",
+                    (hash_password(password), user['id'])
+                )
+            except HasherBusyError:
+                print(f"Password rehash skipped for user {user['id']}: hasher is busy")
         conn.commit()
         
         user_data = dict(user)
@@ -308,6 +345,8 @@ def handle_login(body: dict, client_ip: str = '0.0.0.0', origin=None) -> dict:
             }),
             'isBase64Encoded': False
         }
+    except HasherBusyError:
+        return busy_response(origin)
     except Exception as e:
         print(f"ERROR handle_login: {str(e)}")
         return {
@@ -318,7 +357,7 @@ def handle_login(body: dict, client_ip: str = '0.0.0.0', origin=None) -> dict:
         }
     finally:
         cur.close()
-        conn.close()
+        release_connection(conn)
 
 def handle_verify(token: str, origin=None) -> dict:
     """Проверка токена и получение данных пользователя"""
@@ -374,7 +413,7 @@ def handle_verify(token: str, origin=None) -> dict:
         }
     finally:
         cur.close()
-        conn.close()
+        release_connection(conn)
 
 def handle_update_profile(body: dict, token: str, origin=None) -> dict:
     """Обновление профиля пользователя"""
@@ -475,9 +514,21 @@ def handle_update_profile(body: dict, token: str, origin=None) -> dict:
             }
         
         params.append(user_id)
-        update_query = f"UPDATE users SET {', '.join(updates)} WHERE id = %s RETURNING id, user_id, email, full_name, role"
+        update_query = f"UPDATE users SET {', '.join(updates)} WHERE id = %s RETURNING id, user_id, email, full_name, role, is_active"
         cur.execute(update_query, params)
         updated_user = cur.fetchone()
+        
+        # Подписанный токен содержит имя — выдаём новый вместо старого
+        new_token = None
+        if signed_mode() and full_name:
+            expires_at = datetime.now() + timedelta(days=SESSION_DAYS)
+            new_token = session_token(updated_user, expires_at)
+            revoke_token(cur, token)
+            cur.execute("DELETE FROM sessions WHERE token_hash = %s", (token_hash,))
+            cur.execute(
+                "INSERT INTO sessions (user_id, token_hash, jti, expires_at) VALUES (%s, %s, %s, %s)",
+                (user_id, hashlib.sha256(new_token.encode()).hexdigest(), token_jti(new_token), expires_at)
+            )
         conn.commit()
         
         changed = []
@@ -487,12 +538,18 @@ def handle_update_profile(body: dict, token: str, origin=None) -> dict:
                   f'Обновление профиля: {updated_user["full_name"]} ({", ".join(changed)})', 
                   'user', user_id)
         
+        result = {'user': dict(updated_user)}
+        if new_token:
+            result['token'] = new_token
+        
         return {
             'statusCode': 200,
             'headers': get_security_headers(origin),
-            'body': json.dumps({'user': dict(updated_user)}),
+            'body': json.dumps(result),
             'isBase64Encoded': False
         }
+    except HasherBusyError:
+        return busy_response(origin)
     except Exception as e:
         print(f"ERROR handle_update_profile: {str(e)}")
         return {
@@ -503,7 +560,7 @@ def handle_update_profile(body: dict, token: str, origin=None) -> dict:
         }
     finally:
         cur.close()
-        conn.close()
+        release_connection(conn)
 
 def handle_delete_self(token: str, client_ip: str, origin=None) -> dict:
     """Самоудаление неактивированного аккаунта"""
@@ -552,17 +609,15 @@ def handle_delete_self(token: str, client_ip: str, origin=None) -> dict:
         user_email = user['email']
         
         # Удаляем все связанные данные
+        revoke_user_tokens(cur, user_id)
         cur.execute("DELETE FROM sessions WHERE user_id = %s", (user_id,))
         cur.execute("DELETE FROM crew_members WHERE user_id = %s", (user_id,))
         cur.execute("DELETE FROM users WHERE id = %s", (user_id,))
+        write_log_tx(cur, user_id, user_name, 'AUTH', 
+                     f'Самоудаление неактивированного аккаунта: {user_name} ({user_email})', 
+                     'user', user_id, client_ip)
         conn.commit()
-        
-        try:
-            write_log(user_id, user_name, 'AUTH', 
-                      f'Самоудаление неактивированного аккаунта: {user_name} ({user_email})', 
-                      'user', user_id, client_ip)
-        except Exception as e:
-            print(f"Log error: {e}")
+        invalidate_user(user_id)
         
         return {
             'statusCode': 200,
@@ -580,4 +635,43 @@ def handle_delete_self(token: str, client_ip: str, origin=None) -> dict:
         }
     finally:
         cur.close()
-        conn.close()
\ No newline at end of file
+        release_connection(conn)
+
+def handle_logout(token: str, origin=None) -> dict:
+    """Выход: удаление сессии и отзыв подписанного токена"""
+    if not token:
+        return {
+            'statusCode': 401,
+            'headers': get_security_headers(origin),
+            'body': json.dumps({'error': 'Token required'}),
+            'isBase64Encoded': False
+        }
+    
+    conn = get_db_connection()
+    cur = conn.cursor()
+    
+    try:
+        token_hash = hashlib.sha256(token.encode()).hexdigest()
+        # Отзыв до удаления сессии: непрозрачному токену нужна её строка
+        revoke_token(cur, token)
+        cur.execute("DELETE FROM sessions WHERE token_hash = %s", (token_hash,))
+        conn.commit()
+        invalidate_token(token_hash)
+        
+        return {
+            'statusCode': 200,
+            'headers': get_security_headers(origin),
+            'body': json.dumps({'message': 'Logged out'}),
+            'isBase64Encoded': False
+        }
+    except Exception as e:
+        print(f"ERROR handle_logout: {str(e)}")
+        return {
+            'statusCode': 500,
+            'headers': get_security_headers(origin),
+            'body': json.dumps({'error': str(e)}),
+            'isBase64Encoded': False
+        }
+    finally:
+        cur.close()
+        release_connection(conn)
@@ -0,0 +1,21 @@
+"""
+Общий runtime-код функций портала.
+Каждая функция деплоится из своей папки, поэтому пакет лежит копией
+в каждой из них — копии должны оставаться одинаковыми. Правится только
+копия в backend/auth, остальные обновляет scripts/sync_portal_common.py;
+расхождение ловит tests/test_portal_common_sync.py.
+Ни один модуль пакета не импортирует psycopg2 при загрузке.
+"""
+
+from portal_common.http import (
+    get_security_headers, get_cors_headers, get_origin, get_client_ip,
+    extract_token, extract_token_from_cookie,
+    options_response, json_response, error_response, success_response,
+    make_etag, etag_matches, not_modified_response, etag_response
+)
+from portal_common.db import get_db_connection, release_connection
+from portal_common.sessions import verify_token, hash_token, invalidate_token, invalidate_user, invalidate_users
+from portal_common.audit import write_log, write_log_tx, flush_logs, flush_logs_after
+from portal_common.tokens import (
+    signed_mode, issue_token, token_jti, revoke_token, revoke_user_tokens, revoke_users_tokens, SESSION_DAYS
+)
@@ -1,58 +1,287 @@
 """
-Простой in-memory rate limiter для защиты от brute-force
-ВАЖНО: Это базовая защита. Для продакшена нужен Redis.
-"""
-
-from datetime import datetime, timedelta
-from collections import defaultdict
+Rate limiter для защиты от brute-force.
+Неудачные попытки считаются одновременно по IP и по аккаунту (email / ID):
+блокируется и перебор паролей с одного IP, и подбор к одному аккаунту с многих IP.
 
-# Хранилище попыток входа: {ip: [(timestamp, success), ...]}
-login_attempts = defaultdict(list)
+Хранилище выбирается переменной RATE_LIMIT_BACKEND:
+- memory — в памяти контейнера (по умолчанию): скользящее окно из минутных
+  корзин на монотонном времени, O(1) на попытку, ограниченное число ключей;
+- postgres — общая таблица login_rate_limits, одна на все контейнеры.
+"""
 
-# Хранилище блокировок: {ip: timestamp_разблокировки}
-blocked_ips = {}
+import os
+import time
+import threading
+from collections import OrderedDict
 
-MAX_ATTEMPTS = 5  # Максимум попыток
+MAX_ATTEMPTS = 5  # Максимум попыток с одного IP
 WINDOW_MINUTES = 15  # За какой период
 BLOCK_MINUTES = 30  # На сколько блокировать
 
-def clean_old_attempts(ip: str):
-    """Удаляет старые попытки за пределами временного окна"""
-    cutoff = datetime.now() - timedelta(minutes=WINDOW_MINUTES)
-    login_attempts[ip] = [
-        (ts, success) for ts, success in login_attempts[ip]
-        if ts > cutoff
-    ]
-
-def is_blocked(ip: str) -> bool:
-    """Проверяет, заблокирован ли IP"""
-    if ip in blocked_ips:
-        if datetime.now() < blocked_ips[ip]:
-            return True
+ACCOUNT_MAX_ATTEMPTS = int(os.environ.get('RATE_LIMIT_ACCOUNT_MAX_ATTEMPTS', '10'))  # Максимум попыток к одному аккаунту
+ACCOUNT_BLOCK_MINUTES = int(os.environ.get('RATE_LIMIT_ACCOUNT_BLOCK_MINUTES', '15'))
+
+BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+MAX_TRACKED_KEYS = int(os.environ.get('RATE_LIMIT_MAX_TRACKED', '10000'))  # Сколько ключей помнить в памяти
+
+BUCKET_SECONDS = 60  # Ширина корзины скользящего окна
+
+class _Counter:
+    """Кольцо из WINDOW_MINUTES корзин с текущей суммой"""
+    __slots__ = ('buckets', 'last', 'total', 'blocked_until')
+
+    def __init__(self, now_bucket: int, size: int):
+        self.buckets = [0] * size
+        self.last = now_bucket
+        self.total = 0
+        self.blocked_until = 0.0
+
+    def advance(self, now_bucket: int):
+        """Обнулить корзины, вышедшие из окна (не больше размера кольца)"""
+        gap = now_bucket - self.last
+        if gap <= 0:
+            return
+        size = len(self.buckets)
+        if gap >= size:
+            self.buckets = [0] * size
+            self.total = 0
         else:
-            # Время блокировки истекло
-            del blocked_ips[ip]
-            login_attempts[ip] = []
-    return False
-
-def record_attempt(ip: str, success: bool):
-    """Записывает попытку входа"""
-    clean_old_attempts(ip)
-    login_attempts[ip].append((datetime.now(), success))
-    
-    # Проверяем количество неудачных попыток
-    failed_attempts = [1 for ts, s in login_attempts[ip] if not s]
-    
-    if len(failed_attempts) >= MAX_ATTEMPTS:
-        # Блокируем IP
-        blocked_ips[ip] = datetime.now() + timedelta(minutes=BLOCK_MINUTES)
-        print(f"SECURITY: IP {ip} blocked for {BLOCK_MINUTES} minutes after {MAX_ATTEMPTS} failed attempts")
-        return True
-    
-    return False
-
-def get_remaining_attempts(ip: str) -> int:
+            for bucket in range(self.last + 1, now_bucket + 1):
+                slot = bucket % size
+                self.total -= self.buckets[slot]
+                self.buckets[slot] = 0
+        self.last = now_bucket
+
+class MemoryStore:
+    """Хранилище в памяти контейнера; давно неактивные ключи вытесняются.
+    Заблокированные ключи хранятся отдельно и не вытесняются до конца блокировки:
+    иначе поток неудачных попыток с новыми ключами снимал бы блокировку."""
+
+    def __init__(self, max_tracked: int = MAX_TRACKED_KEYS, clock=time.monotonic):
+        self.max_tracked = max_tracked
+        self.clock = clock
+        self.size = max(1, WINDOW_MINUTES * 60 // BUCKET_SECONDS)
+        # {key: _Counter} в порядке последней активности (незаблокированные)
+        self._counters = OrderedDict()
+        # {key: _Counter} с действующей блокировкой
+        self._blocked = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: str, now: float, create: bool = False):
+        bucket = int(now // BUCKET_SECONDS)
+        counter = self._blocked.get(key)
+        if counter is not None and counter.blocked_until <= now:
+            # Время блокировки истекло — начинаем счёт заново
+            del self._blocked[key]
+            counter = None
+        if counter is None:
+            counter = self._counters.get(key)
+        if counter is None:
+            if not create:
+                return None
+            counter = _Counter(bucket, self.size)
+            self._counters[key] = counter
+            while len(self._counters) > self.max_tracked:
+                self._counters.popitem(last=False)
+        else:
+            counter.advance(bucket)
+        return counter
+
+    def _block(self, key: str, counter: _Counter, until: float, now: float):
+        """Перенести ключ к заблокированным"""
+        counter.blocked_until = until
+        self._counters.pop(key, None)
+        if len(self._blocked) >= self.max_tracked:
+            for stale in [k for k, c in self._blocked.items() if c.blocked_until <= now]:
+                del self._blocked[stale]
+        self._blocked[key] = counter
+
+    def is_blocked(self, key: str, other_key=None) -> bool:
+        """Заблокирован ли ключ (или второй ключ, если задан)"""
+        # Без блокировки потоков: dict.get атомарен, blocked_until счётчика задаётся
+        # один раз. Истёкшие блокировки удаляют record_failure/failures и _block
+        counter = self._blocked.get(key)
+        if counter is not None and self.clock() < counter.blocked_until:
+            return True
+        if other_key is None:
+            return False
+        counter = self._blocked.get(other_key)
+        return counter is not None and self.clock() < counter.blocked_until
+
+    def _record(self, key: str, max_attempts: int, block_minutes: int, now: float):
+        """Учесть попытку (под self._lock); (только что заблокирован, неудач в окне)"""
+        counter = self._get(key, now, create=True)
+        counter.buckets[counter.last % self.size] += 1
+        counter.total += 1
+        if key in self._blocked:
+            return False, counter.total
+        self._counters.move_to_end(key)
+        if counter.total >= max_attempts:
+            self._block(key, counter, now + block_minutes * 60, now)
+            return True, counter.total
+        return False, counter.total
+
+    def record_failure(self, key: str, max_attempts: int, block_minutes: int) -> bool:
+        """Учесть неудачную попытку; True, если ключ только что заблокирован"""
+        with self._lock:
+            return self._record(key, max_attempts, block_minutes, self.clock())[0]
+
+    def record_failures(self, limits, cur=None):
+        """Учесть неудачу по всем ключам limits; (только что заблокированные ключи, оставшиеся попытки)"""
+        blocked, remaining = [], None
+        with self._lock:
+            now = self.clock()
+            for key, max_attempts, block_minutes in limits:
+                just_blocked, failures = self._record(key, max_attempts, block_minutes, now)
+                if just_blocked:
+                    blocked.append(key)
+                left = max(0, max_attempts - failures)
+                remaining = left if remaining is None else min(remaining, left)
+        return blocked, remaining
+
+    def failures(self, key: str) -> int:
+        with self._lock:
+            counter = self._get(key, self.clock())
+            return counter.total if counter else 0
+
+class PostgresStore:
+    """Общее для всех контейнеров хранилище (таблица login_rate_limits).
+    Счётчик — фиксированное окно WINDOW_MINUTES, обновляемое одним атомарным upsert.
+    С cur запрос выполняется на подключении вызывающего и фиксируется его commit."""
+
+    def _execute(self, query: str, params, cur=None, fetch_all: bool = False):
+        if cur is not None:
+            cur.execute(query, params)
+            return cur.fetchall() if fetch_all else cur.fetchone()
+        from portal_common import get_db_connection, release_connection
+        conn = get_db_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute(query, params)
+            result = cur.fetchall() if fetch_all else cur.fetchone()
+            conn.commit()
+            return result
+        finally:
+            cur.close()
+            release_connection(conn)
+
+    def is_blocked(self, key: str, other_key=None) -> bool:
+        """Заблокирован ли ключ (или второй ключ) — один запрос на оба"""
+        row = self._execute(
+            """SELECT EXISTS (
+                   SELECT 1 FROM t_p77465986_police_portal_creati.login_rate_limits
+                   WHERE key = ANY(%s) AND blocked_until > NOW()
+               ) AS blocked""",
+            ([k for k in (key, other_key) if k is not None],)
+        )
+        return bool(row and row['blocked'])
+
+    def record_failure(self, key: str, max_attempts: int, block_minutes: int) -> bool:
+        """Учесть неудачную попытку; True, если ключ только что заблокирован"""
+        row = self._execute(
+            """INSERT INTO t_p77465986_police_portal_creati.login_rate_limits AS r
+                   (key, window_start, failures, updated_at)
+               VALUES (%(key)s, NOW(), 1, NOW())
+               ON CONFLICT (key) DO UPDATE SET
+                   failures = CASE WHEN r.window_start < NOW() - make_interval(mins => %(window)s)
+                                   THEN 1 ELSE r.failures + 1 END,
+                   window_start = CASE WHEN r.window_start < NOW() - make_interval(mins => %(window)s)
+                                       THEN NOW() ELSE r.window_start END,
+                   blocked_until = CASE WHEN r.window_start >= NOW() - make_interval(mins => %(window)s)
+                                             AND r.failures + 1 >= %(max)s
+                                        THEN NOW() + make_interval(mins => %(block)s)
+                                        ELSE r.blocked_until END,
+                   updated_at = NOW()
+               RETURNING COALESCE(blocked_until > NOW(), false) AND failures = %(max)s AS blocked""",
+            {'key': key, 'window': WINDOW_MINUTES, 'max': max_attempts, 'block': block_minutes}
+        )
+        return bool(row and row['blocked'])
+
+    def record_failures(self, limits, cur=None):
+        """Все ключи одним upsert; (только что заблокированные ключи, оставшиеся попытки)"""
+        rows = self._execute(
+            """INSERT INTO t_p77465986_police_portal_creati.login_rate_limits AS r
+                   (key, window_start, failures, updated_at)
+               SELECT key, NOW(), 1, NOW() FROM unnest(%(keys)s::text[]) AS key
+               ON CONFLICT (key) DO UPDATE SET
+                   failures = CASE WHEN r.window_start < NOW() - make_interval(mins => %(window)s)
+                                   THEN 1 ELSE r.failures + 1 END,
+                   window_start = CASE WHEN r.window_start < NOW() - make_interval(mins => %(window)s)
+                                       THEN NOW() ELSE r.window_start END,
+                   blocked_until = CASE WHEN r.window_start >= NOW() - make_interval(mins => %(window)s)
+                                             AND r.failures + 1 >= (%(maxes)s::int[])[array_position(%(keys)s::text[], r.key)]
+                                        THEN NOW() + make_interval(mins =>
+                                                 (%(blocks)s::int[])[array_position(%(keys)s::text[], r.key)])
+                                        ELSE r.blocked_until END,
+                   updated_at = NOW()
+               RETURNING key, failures, COALESCE(blocked_until > NOW(), false) AS blocked""",
+            {'keys': [key for key, _, _ in limits], 'maxes': [m for _, m, _ in limits],
+             'blocks': [b for _, _, b in limits], 'window': WINDOW_MINUTES},
+            cur, fetch_all=True
+        )
+        limit_of = {key: max_attempts for key, max_attempts, _ in limits}
+        # Как в record_failure: «только что» — ровно на пороговой попытке
+        blocked = [row['key'] for row in rows if row['blocked'] and row['failures'] == limit_of[row['key']]]
+        remaining = min(max(0, limit_of[row['key']] - row['failures']) for row in rows)
+        return blocked, remaining
+
+    def failures(self, key: str) -> int:
+        row = self._execute(
+            """SELECT failures FROM t_p77465986_police_portal_creati.login_rate_limits
+               WHERE key = %s AND window_start >= NOW() - make_interval(mins => %s)""",
+            (key, WINDOW_MINUTES)
+        )
+        return row['failures'] if row else 0
+
+_store = None
+
+def get_store():
+    """Хранилище процесса (по RATE_LIMIT_BACKEND)"""
+    global _store
+    if _store is None:
+        _store = PostgresStore() if BACKEND == 'postgres' else MemoryStore()
+    return _store
+
+def set_store(store):
+    """Подменить хранилище (любой объект с тем же API)"""
+    global _store
+    _store = store
+
+def _limits(ip: str, account=None):
+    """[(ключ, максимум попыток, минут блокировки), ...] для IP и аккаунта"""
+    limits = [(f'ip:{ip}', MAX_ATTEMPTS, BLOCK_MINUTES)]
+    if account:
+        limits.append((f'account:{account}', ACCOUNT_MAX_ATTEMPTS, ACCOUNT_BLOCK_MINUTES))
+    return limits
+
+def is_blocked(ip: str, account=None) -> bool:
+    """Проверяет, заблокирован ли IP или аккаунт"""
+    # Вызывается на каждый вход до проверки пароля: ключи как в _limits, без списка.
+    # Аккаунт проверяется первым: при переборе с многих IP сам IP обычно не заблокирован
+    store = _store or get_store()
+    return store.is_blocked('account:' + account, 'ip:' + ip) if account else store.is_blocked('ip:' + ip)
+
+def _record_failures(ip: str, account, cur):
+    limits = _limits(ip, account)
+    blocked, remaining = get_store().record_failures(limits, cur)
+    for key, max_attempts, block_minutes in limits:
+        if key in blocked:
+            print(f"SECURITY: {key} blocked for {block_minutes} minutes after {max_attempts} failed attempts")
+    return blocked, remaining
+
+def record_failed_login(ip: str, account=None, cur=None) -> int:
+    """Учесть неудачный вход по IP и аккаунту разом; оставшиеся попытки.
+    cur — курсор вызывающего (postgres): без отдельного подключения, фиксируется его commit"""
+    return _record_failures(ip, account, cur)[1]
+
+def record_attempt(ip: str, success: bool, account=None):
+    """Записывает попытку входа (в счётчики идут только неудачные)"""
+    if success:
+        return False
+    return bool(_record_failures(ip, account, None)[0])
+
+def get_remaining_attempts(ip: str, account=None) -> int:
     """Возвращает количество оставшихся попыток"""
-    clean_old_attempts(ip)
-    failed = len([1 for ts, s in login_attempts[ip] if not s])
-    return max(0, MAX_ATTEMPTS - failed)
+    store = get_store()
+    return min(max(0, max_attempts - store.failures(key))
+               for key, max_attempts, _ in _limits(ip, account))
@@ -1,81 +1,45 @@
+import io
+import csv
 import json
 import os
-import hashlib
-import psycopg2
-from datetime import datetime
+import base64
+from portal_common import (
+    get_security_headers, get_origin, get_client_ip, extract_token, options_response,
+    error_response, get_db_connection, release_connection, verify_token, write_log, write_log_tx,
+    flush_logs_after
+)
+from portal_common.events import publish_event
+from portal_common.pagination import encode_cursor, decode_cursor, parse_limit, keyset_condition
 from security import sanitize_string
 
-def get_cors_headers(origin=None):
-    """Возвращает CORS headers с правильным Origin"""
-    allowed_origin = origin if origin and (origin.endswith('.poehali.dev') or origin.startswith('http://localhost')) else 'https://app.poehali.dev'
-    return {
-        'Access-Control-Allow-Origin': allowed_origin,
-        'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-        'Access-Control-Allow-Headers': 'Content-Type, Authorization, X-Authorization, Cookie, X-Cookie',
-        'Access-Control-Allow-Credentials': 'true',
-        'Access-Control-Max-Age': '86400',
-        'Content-Type': 'application/json'
-    }
-
-def extract_token_from_cookie(cookies: str) -> str:
-    """Извлечение токена из Cookie header"""
-    if not cookies:
-        return ''
-    
-    for cookie in cookies.split(';'):
-        cookie = cookie.strip()
-        if cookie.startswith('auth_token='):
-            return cookie.split('=', 1)[1]
-    return ''
-
-def extract_token(headers: dict) -> str:
-    """Извлечение токена из Authorization header или Cookie"""
-    auth_header = headers.get('Authorization', '') or headers.get('authorization', '') or \
-                  headers.get('X-Authorization', '') or headers.get('x-authorization', '')
-    if auth_header.startswith('Bearer '):
-        return auth_header[7:]
-    cookies = headers.get('Cookie', '') or headers.get('cookie', '') or \
-              headers.get('X-Cookie', '') or headers.get('x-cookie', '')
-    return extract_token_from_cookie(cookies)
-
-def write_log(dsn, user_id, user_name, action_type, action_description, target_type=None, target_id=None, ip_address='0.0.0.0'):
-    """Записать лог активности в БД"""
-    try:
-        conn = psycopg2.connect(dsn)
-        cur = conn.cursor()
-        cur.execute(
-            """INSERT INTO t_p77465986_police_portal_creati.activity_logs 
-               (user_id, user_name, action_type, action_description, target_type, target_id, ip_address)
-               VALUES (%s, %s, %s, %s, %s, %s, %s)""",
-            (user_id, user_name, action_type, action_description, target_type, target_id, ip_address)
-        )
-        conn.commit()
-        cur.close()
-        conn.close()
-    except Exception as e:
-        print(f"ERROR write_log: {str(e)}")
+BOLO_PAGE_SIZE = 50  # Страница по умолчанию, если задан cursor без limit
+BOLO_PAGE_SIZE_MAX = 500
+FETCH_ROWS = 500  # Строк за одно чтение серверного курсора
+SEARCH_MAX_LENGTH = 100
+SEARCH_TRIGRAM_MIN_LENGTH = 3  # Короче — у pg_trgm нет триграмм, остаётся поиск по префиксу слова
+IMPORT_MAX_ROWS = 5000  # Ориентировок в одной пачке импорта
+EXPORT_PAGE_ROWS = 5000  # Ориентировок в одной части выгрузки; продолжение — по X-Next-Cursor
+STAFF_ROLES = ['moderator', 'admin', 'manager']
+EXPORT_FIELDS = ('id', 'type', 'mainInfo', 'additionalInfo', 'isArmed', 'createdAt', 'updatedAt', 'createdByName')
 
+@flush_logs_after
 def handler(event: dict, context) -> dict:
     '''API для управления ориентировками BOLO'''
     
     method = event.get('httpMethod', 'GET')
     headers = event.get('headers', {})
-    origin = headers.get('Origin') or headers.get('origin')
+    origin = get_origin(headers)
     
     if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': get_cors_headers(origin),
-            'body': '',
-            'isBase64Encoded': False
-        }
+        return options_response(origin)
     
+    conn = None
     try:
         dsn = os.environ.get('DATABASE_URL')
         if not dsn:
             return {
                 'statusCode': 500,
-                'headers': get_cors_headers(origin),
+                'headers': get_security_headers(origin),
                 'body': json.dumps({'error': 'DATABASE_URL not configured'}),
                 'isBase64Encoded': False
             }
@@ -85,71 +49,35 @@ def handler(event: dict, context) -> dict:
         if not token:
             return {
                 'statusCode': 401,
-                'headers': get_cors_headers(origin),
+                'headers': get_security_headers(origin),
                 'body': json.dumps({'error': 'Unauthorized'}),
                 'isBase64Encoded': False
             }
         
-        conn = psycopg2.connect(dsn)
-        cursor = conn.cursor()
-        
-        # Hash token and verify through sessions table
-        token_hash = hashlib.sha256(token.encode()).hexdigest()
-        
-        cursor.execute(
-            """SELECT u.id, u.role, u.full_name FROM users u
-               JOIN sessions s ON u.id = s.user_id
-               WHERE s.token_hash = %s AND s.expires_at > NOW()""",
-            (token_hash,)
-        )
-        user_data = cursor.fetchone()
+        current_user = verify_token(token)
         
-        if not user_data:
-            cursor.close()
-            conn.close()
+        if not current_user:
             return {
                 'statusCode': 401,
-                'headers': get_cors_headers(origin),
+                'headers': get_security_headers(origin),
                 'body': json.dumps({'error': 'Invalid token'}),
                 'isBase64Encoded': False
             }
         
-        user_id, role, user_full_name = user_data
+        user_id = current_user['id']
+        user_full_name = current_user['full_name']
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
         
-        request_context = event.get('requestContext', {})
-        client_ip = request_context.get('identity', {}).get('sourceIp', '0.0.0.0')
+        client_ip = get_client_ip(event)
         
         if method == 'GET':
-            cursor.execute("""
-                SELECT b.id, b.type, b.main_info, b.additional_info, b.is_armed, 
-                       b.created_at, b.updated_at, u.full_name as created_by_name
-                FROM bolo b
-                LEFT JOIN users u ON b.created_by = u.id
-                ORDER BY b.created_at DESC
-            """)
-            
-            bolos = []
-            for row in cursor.fetchall():
-                bolos.append({
-                    'id': row[0],
-                    'type': row[1],
-                    'mainInfo': row[2],
-                    'additionalInfo': row[3],
-                    'isArmed': row[4],
-                    'createdAt': row[5].isoformat() if row[5] else None,
-                    'updatedAt': row[6].isoformat() if row[6] else None,
-                    'createdByName': row[7]
-                })
-            
-            cursor.close()
-            conn.close()
-            
-            return {
-                'statusCode': 200,
-                'headers': get_cors_headers(origin),
-                'body': json.dumps(bolos),
-                'isBase64Encoded': False
-            }
+            params = event.get('queryStringParameters') or {}
+            return get_bolos(conn, params, origin)
+        
+        elif method == 'POST' and (event.get('queryStringParameters') or {}).get('action') == 'import':
+            return import_bolos(conn, event, current_user, client_ip, origin)
         
         elif method == 'POST':
             data = json.loads(event.get('body', '{}'))
@@ -160,21 +88,17 @@ def handler(event: dict, context) -> dict:
             is_armed = data.get('isArmed', False)
             
             if not bolo_type or bolo_type not in ['person', 'vehicle']:
-                cursor.close()
-                conn.close()
                 return {
                     'statusCode': 400,
-                    'headers': get_cors_headers(origin),
+                    'headers': get_security_headers(origin),
                     'body': json.dumps({'error': 'Invalid type'}),
                     'isBase64Encoded': False
                 }
             
             if not main_info:
-                cursor.close()
-                conn.close()
                 return {
                     'statusCode': 400,
-                    'headers': get_cors_headers(origin),
+                    'headers': get_security_headers(origin),
                     'body': json.dumps({'error': 'Main info is required'}),
                     'isBase64Encoded': False
                 }
@@ -187,20 +111,20 @@ def handler(event: dict, context) -> dict:
                 RETURNING id, created_at
             """, (bolo_type, main_info, additional_info or None, is_armed, creator_id))
             
-            new_id, created_at = cursor.fetchone()
+            created = cursor.fetchone()
+            new_id, created_at = created['id'], created['created_at']
+            publish_event(cursor, 'bolo', 'created', {'id': new_id, 'type': bolo_type, 'isArmed': is_armed})
             conn.commit()
-            cursor.close()
-            conn.close()
             
             try:
-                write_log(dsn, user_id, user_full_name, 'BOLO', 
+                write_log(user_id, user_full_name, 'BOLO', 
                           f'Создана ориентировка: {main_info[:100]}', 'bolo', new_id, client_ip)
             except Exception as e:
                 print(f"Log error: {e}")
             
             return {
                 'statusCode': 201,
-                'headers': get_cors_headers(origin),
+                'headers': get_security_headers(origin),
                 'body': json.dumps({
                     'id': new_id,
                     'type': bolo_type,
@@ -217,11 +141,9 @@ def handler(event: dict, context) -> dict:
             bolo_id = data.get('id')
             
             if not bolo_id:
-                cursor.close()
-                conn.close()
                 return {
                     'statusCode': 400,
-                    'headers': get_cors_headers(origin),
+                    'headers': get_security_headers(origin),
                     'body': json.dumps({'error': 'BOLO ID is required'}),
                     'isBase64Encoded': False
                 }
@@ -232,11 +154,9 @@ def handler(event: dict, context) -> dict:
             is_armed = data.get('isArmed', False)
             
             if bolo_type and bolo_type not in ['person', 'vehicle']:
-                cursor.close()
-                conn.close()
                 return {
                     'statusCode': 400,
-                    'headers': get_cors_headers(origin),
+                    'headers': get_security_headers(origin),
                     'body': json.dumps({'error': 'Invalid type'}),
                     'isBase64Encoded': False
                 }
@@ -253,28 +173,25 @@ def handler(event: dict, context) -> dict:
             """, (bolo_type, main_info, additional_info or None, is_armed, bolo_id))
             
             if cursor.rowcount == 0:
-                cursor.close()
-                conn.close()
                 return {
                     'statusCode': 404,
-                    'headers': get_cors_headers(origin),
+                    'headers': get_security_headers(origin),
                     'body': json.dumps({'error': 'BOLO not found'}),
                     'isBase64Encoded': False
                 }
             
+            publish_event(cursor, 'bolo', 'updated', {'id': bolo_id, 'isArmed': is_armed})
             conn.commit()
-            cursor.close()
-            conn.close()
             
             try:
-                write_log(dsn, user_id, user_full_name, 'BOLO', 
+                write_log(user_id, user_full_name, 'BOLO', 
                           f'Обновлена ориентировка: {main_info[:100]}', 'bolo', bolo_id, client_ip)
             except Exception as e:
                 print(f"Log error: {e}")
             
             return {
                 'statusCode': 200,
-                'headers': get_cors_headers(origin),
+                'headers': get_security_headers(origin),
                 'body': json.dumps({'success': True}),
                 'isBase64Encoded': False
             }
@@ -284,54 +201,47 @@ def handler(event: dict, context) -> dict:
             bolo_id = params.get('id')
             
             if not bolo_id:
-                cursor.close()
-                conn.close()
                 return {
                     'statusCode': 400,
-                    'headers': get_cors_headers(origin),
+                    'headers': get_security_headers(origin),
                     'body': json.dumps({'error': 'BOLO ID is required'}),
                     'isBase64Encoded': False
                 }
             
             cursor.execute("SELECT main_info FROM bolo WHERE id = %s", (bolo_id,))
             bolo_info = cursor.fetchone()
-            bolo_main_info = bolo_info[0] if bolo_info else 'Unknown'
+            bolo_main_info = bolo_info['main_info'] if bolo_info else 'Unknown'
             
             cursor.execute("DELETE FROM bolo WHERE id = %s RETURNING id", (bolo_id,))
             
             if cursor.rowcount == 0:
-                cursor.close()
-                conn.close()
                 return {
                     'statusCode': 404,
-                    'headers': get_cors_headers(origin),
+                    'headers': get_security_headers(origin),
                     'body': json.dumps({'error': 'BOLO not found'}),
                     'isBase64Encoded': False
                 }
             
+            publish_event(cursor, 'bolo', 'deleted', {'id': int(bolo_id)})
             conn.commit()
-            cursor.close()
-            conn.close()
             
             try:
-                write_log(dsn, user_id, user_full_name, 'BOLO', 
+                write_log(user_id, user_full_name, 'BOLO', 
                           f'Удалена ориентировка: {bolo_main_info[:100]}', 'bolo', int(bolo_id), client_ip)
             except Exception as e:
                 print(f"Log error: {e}")
             
             return {
                 'statusCode': 200,
-                'headers': get_cors_headers(origin),
+                'headers': get_security_headers(origin),
                 'body': json.dumps({'success': True}),
                 'isBase64Encoded': False
             }
         
         else:
-            cursor.close()
-            conn.close()
             return {
                 'statusCode': 405,
-                'headers': get_cors_headers(origin),
+                'headers': get_security_headers(origin),
                 'body': json.dumps({'error': 'Method not allowed'}),
                 'isBase64Encoded': False
             }
@@ -342,7 +252,343 @@ def handler(event: dict, context) -> dict:
         traceback.print_exc()
         return {
             'statusCode': 500,
-            'headers': get_cors_headers(origin),
+            'headers': get_security_headers(origin),
             'body': json.dumps({'error': str(e)}),
             'isBase64Encoded': False
-        }
\ No newline at end of file
+        }
+    finally:
+        if conn is not None:
+            release_connection(conn)
+
+def bolo_to_api(row: dict, summary: bool = False) -> dict:
+    """Строка bolo в формате API (summary — без additionalInfo)"""
+    bolo = {
+        'id': row['id'],
+        'type': row['type'],
+        'mainInfo': row['main_info'],
+        'isArmed': row['is_armed'],
+        'createdAt': row['created_at'].isoformat() if row['created_at'] else None,
+        'updatedAt': row['updated_at'].isoformat() if row['updated_at'] else None,
+        'createdByName': row['created_by_name']
+    }
+    if not summary:
+        bolo['additionalInfo'] = row['additional_info']
+    return bolo
+
+def list_cursor(row: dict) -> str:
+    """Курсор списка: (created_at, id)"""
+    return encode_cursor(row['created_at'], row['id'])
+
+def serialize_rows(rows, limit, summary: bool, cursor_for=list_cursor):
+    """JSON-массив по мере чтения строк; next_cursor, если строк больше limit"""
+    parts = []
+    last = None
+    next_cursor = None
+    for row in rows:
+        if limit is not None and len(parts) == limit:
+            next_cursor = cursor_for(last)
+            break
+        parts.append(json.dumps(bolo_to_api(row, summary)))
+        last = row
+    return '[' + ','.join(parts) + ']', next_cursor
+
+def bolo_filters(params: dict):
+    """Условия фильтров type / is_armed и их параметры (ValueError при неверном type)"""
+    conditions = []
+    values = []
+    
+    bolo_type = params.get('type')
+    if bolo_type:
+        if bolo_type not in ['person', 'vehicle']:
+            raise ValueError('Invalid type')
+        conditions.append("b.type = %s")
+        values.append(bolo_type)
+    
+    is_armed = params.get('is_armed')
+    if is_armed in ('true', 'false'):
+        conditions.append("b.is_armed = %s")
+        values.append(is_armed == 'true')
+    
+    return conditions, values
+
+def get_bolos(conn, params: dict, origin=None) -> dict:
+    """Список ориентировок с фильтрами type / is_armed и проекцией fields=summary.
+    С limit или cursor — страница {bolos, next_cursor}, иначе — весь список массивом.
+    С q — поиск, лучшие совпадения первыми; с format=ndjson|csv — выгрузка."""
+    if params.get('format'):
+        return export_bolos(conn, params, origin)
+    
+    paged = bool(params.get('limit') or params.get('cursor'))
+    summary = params.get('fields') == 'summary'
+    q = sanitize_string(params.get('q') or '', SEARCH_MAX_LENGTH)
+    limit = None
+    
+    try:
+        conditions, query_params = bolo_filters(params)
+        if q:
+            limit = parse_limit(params.get('limit'), BOLO_PAGE_SIZE, BOLO_PAGE_SIZE_MAX)
+            return search_bolos(conn, q, conditions, query_params, limit, summary, params.get('cursor'), origin)
+        if paged:
+            limit = parse_limit(params.get('limit'), BOLO_PAGE_SIZE, BOLO_PAGE_SIZE_MAX)
+            if params.get('cursor'):
+                condition, values = keyset_condition('b.created_at', 'DESC', params['cursor'], 'b.id')
+                conditions.append(condition)
+                query_params.extend(values)
+    except ValueError as e:
+        return error_response(400, str(e), origin)
+    
+    columns = "b.id, b.type, b.main_info, b.is_armed, b.created_at, b.updated_at, u.full_name as created_by_name"
+    if not summary:
+        columns += ", b.additional_info"
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = f"""SELECT {columns}
+                FROM bolo b
+                LEFT JOIN users u ON b.created_by = u.id
+                {where}
+                ORDER BY b.created_at DESC, b.id DESC"""
+    if limit is not None:
+        query += " LIMIT %s"
+        query_params.append(limit + 1)
+    
+    # Серверный курсор: строки читаются порциями и сразу сериализуются
+    cursor = conn.cursor(name='bolo_list')
+    cursor.itersize = FETCH_ROWS
+    try:
+        cursor.execute(query, query_params)
+        items, next_cursor = serialize_rows(cursor, limit, summary)
+    finally:
+        cursor.close()
+    conn.commit()
+    
+    if paged:
+        body = '{"bolos":' + items + ',"next_cursor":' + json.dumps(next_cursor) + '}'
+    else:
+        body = items
+    
+    return {
+        'statusCode': 200,
+        'headers': get_security_headers(origin),
+        'body': body,
+        'isBase64Encoded': False
+    }
+
+def search_cursor(row: dict) -> str:
+    """Курсор поиска: (rank, created_at, id) — порядок выдачи"""
+    return encode_cursor([row['rank'], row['created_at']], row['id'])
+
+def search_bolos(conn, q: str, conditions: list, filter_params: list, limit: int, summary: bool,
+                 cursor=None, origin=None) -> dict:
+    """Поиск: полнотекстовый по search_vector, подстрока и нечёткое совпадение по триграммам.
+    Запрос короче SEARCH_TRIGRAM_MIN_LENGTH ищется только по префиксу слова в search_vector."""
+    columns = "b.id, b.type, b.main_info, b.is_armed, b.created_at, b.updated_at, u.full_name as created_by_name"
+    if not summary:
+        columns += ", b.additional_info"
+    
+    if len(q) >= SEARCH_TRIGRAM_MIN_LENGTH:
+        # q экранирован так же, как сохранённый текст (sanitize_string); для LIKE экранируем шаблоны
+        like = '%' + q.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        match = """(b.search_vector @@ websearch_to_tsquery('russian', %s)
+                   OR b.main_info ILIKE %s OR b.additional_info ILIKE %s
+                   OR %s <%% b.main_info)"""
+        match_params = [q, like, like, q]
+        rank = "ts_rank_cd(b.search_vector, websearch_to_tsquery('russian', %s)) + word_similarity(%s, b.main_info)"
+        rank_params = [q, q]
+    elif q.isalnum():
+        # '%ab%' не сужается триграммным индексом и читает всю таблицу; префикс слова идёт по GIN search_vector
+        match = "b.search_vector @@ to_tsquery('russian', %s)"
+        match_params = [q + ':*']
+        rank = "ts_rank_cd(b.search_vector, to_tsquery('russian', %s))"
+        rank_params = [q + ':*']
+    else:
+        raise ValueError(f'Search query must be at least {SEARCH_TRIGRAM_MIN_LENGTH} characters')
+    
+    after = ""
+    after_params = []
+    if cursor:
+        try:
+            (after_rank, after_created_at), after_id = decode_cursor(cursor)
+            after_rank = float(after_rank)
+        except (TypeError, ValueError):
+            raise ValueError('Invalid cursor')
+        after = "WHERE (s.rank, s.created_at, s.id) < (%s::real, %s, %s)"
+        after_params = [after_rank, after_created_at, after_id]
+    
+    where = " AND ".join([match] + conditions)
+    query_cursor = conn.cursor()
+    try:
+        query_cursor.execute(
+            f"""SELECT * FROM (
+                    SELECT {columns}, ({rank})::real AS rank
+                    FROM bolo b
+                    LEFT JOIN users u ON b.created_by = u.id
+                    WHERE {where}
+                ) s
+                {after}
+                ORDER BY s.rank DESC, s.created_at DESC, s.id DESC
+                LIMIT %s""",
+            rank_params + match_params + filter_params + after_params + [limit + 1]
+        )
+        items, next_cursor = serialize_rows(query_cursor, limit, summary, search_cursor)
+    finally:
+        query_cursor.close()
+    
+    return {
+        'statusCode': 200,
+        'headers': get_security_headers(origin),
+        'body': '{"bolos":' + items + ',"next_cursor":' + json.dumps(next_cursor) + '}',
+        'isBase64Encoded': False
+    }
+
+def export_bolos(conn, params: dict, origin=None) -> dict:
+    """Выгрузка ориентировок в NDJSON или CSV (с теми же фильтрами, что и список).
+    Не больше EXPORT_PAGE_ROWS строк за запрос; курсор продолжения — в заголовке X-Next-Cursor."""
+    export_format = params.get('format')
+    if export_format not in ('ndjson', 'csv'):
+        return error_response(400, 'Invalid format. Allowed: ndjson, csv', origin)
+    
+    try:
+        conditions, query_params = bolo_filters(params)
+        limit = parse_limit(params.get('limit'), EXPORT_PAGE_ROWS, EXPORT_PAGE_ROWS)
+        if params.get('cursor'):
+            condition, values = keyset_condition('b.created_at', 'DESC', params['cursor'], 'b.id')
+            conditions.append(condition)
+            query_params.extend(values)
+    except ValueError as e:
+        return error_response(400, str(e), origin)
+    
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    next_cursor = None
+    
+    def page_rows(rows):
+        """Первые limit строк; по строке сверх limit строится next_cursor"""
+        nonlocal next_cursor
+        last = None
+        for count, row in enumerate(rows):
+            if count == limit:
+                next_cursor = encode_cursor(last['created_at'], last['id'])
+                return
+            last = row
+            yield bolo_to_api(row)
+    
+    cursor = conn.cursor(name='bolo_export')
+    cursor.itersize = FETCH_ROWS
+    try:
+        cursor.execute(
+            f"""SELECT b.id, b.type, b.main_info, b.additional_info, b.is_armed,
+                       b.created_at, b.updated_at, u.full_name as created_by_name
+                FROM bolo b
+                LEFT JOIN users u ON b.created_by = u.id
+                {where}
+                ORDER BY b.created_at DESC, b.id DESC
+                LIMIT %s""",
+            query_params + [limit + 1]
+        )
+        if export_format == 'ndjson':
+            body = ''.join(json.dumps(item) + '\n' for item in page_rows(cursor))
+        else:
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(page_rows(cursor))
+            body = buffer.getvalue()
+    finally:
+        cursor.close()
+    conn.commit()
+    
+    headers = get_security_headers(origin)
+    headers['Content-Type'] = 'application/x-ndjson; charset=utf-8' if export_format == 'ndjson' else 'text/csv; charset=utf-8'
+    headers['Content-Disposition'] = f'attachment; filename="bolo.{export_format}"'
+    if next_cursor:
+        headers['X-Next-Cursor'] = next_cursor
+    return {
+        'statusCode': 200,
+        'headers': headers,
+        'body': body,
+        'isBase64Encoded': False
+    }
+
+def parse_import_body(event: dict) -> list:
+    """Ориентировки из тела запроса: JSON-массив или NDJSON (объект на строку)"""
+    body = event.get('body') or ''
+    if event.get('isBase64Encoded'):
+        body = base64.b64decode(body).decode('utf-8')
+    body = body.strip()
+    if body.startswith('['):
+        items = json.loads(body)
+    else:
+        items = [json.loads(line) for line in body.splitlines() if line.strip()]
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise ValueError('Each BOLO must be a JSON object')
+    return items
+
+def parse_armed(value) -> bool:
+    """isArmed при импорте: JSON-булево или строка 'true'/'false'; иначе ValueError"""
+    if value is None or isinstance(value, bool):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in ('true', 'false'):
+        return value.strip().lower() == 'true'
+    raise ValueError('isArmed must be a boolean')
+
+def import_bolos(conn, event: dict, current_user: dict, client_ip: str, origin=None) -> dict:
+    """Пакетный импорт: все ориентировки одной транзакцией или ни одной"""
+    if current_user['role'] not in STAFF_ROLES:
+        return error_response(403, 'Access denied', origin)
+    
+    try:
+        items = parse_import_body(event)
+    except ValueError:
+        return error_response(400, 'Body must be a JSON array or NDJSON of BOLO objects', origin)
+    
+    if not items:
+        return error_response(400, 'No BOLOs to import', origin)
+    if len(items) > IMPORT_MAX_ROWS:
+        return error_response(400, f'Too many BOLOs (max {IMPORT_MAX_ROWS})', origin)
+    
+    # Проверка и санитизация всей пачки по столбцам
+    types = [item.get('type') for item in items]
+    main_infos = [sanitize_string(str(item.get('mainInfo') or ''), 500) for item in items]
+    additional_infos = [sanitize_string(str(item.get('additionalInfo') or ''), 1000) or None for item in items]
+    armed = []
+    errors = []
+    for i, (item, t, main_info) in enumerate(zip(items, types, main_infos)):
+        try:
+            armed.append(parse_armed(item.get('isArmed')))
+        except ValueError as e:
+            armed.append(None)
+            errors.append({'index': i, 'error': str(e)})
+            continue
+        if t not in ('person', 'vehicle'):
+            errors.append({'index': i, 'error': 'Invalid type'})
+        elif not main_info:
+            errors.append({'index': i, 'error': 'Main info is required'})
+    if errors:
+        return {
+            'statusCode': 400,
+            'headers': get_security_headers(origin),
+            'body': json.dumps({'error': 'Validation failed', 'errors': errors[:50], 'invalid': len(errors)}),
+            'isBase64Encoded': False
+        }
+    
+    from psycopg2.extras import execute_values
+    rows = list(zip(types, main_infos, additional_infos, armed, [current_user['id']] * len(items)))
+    cursor = conn.cursor()
+    try:
+        inserted = execute_values(
+            cursor,
+            "INSERT INTO bolo (type, main_info, additional_info, is_armed, created_by) VALUES %s RETURNING id",
+            rows, page_size=len(rows), fetch=True
+        )
+        ids = [row['id'] for row in inserted]
+        write_log_tx(cursor, current_user['id'], current_user['full_name'], 'BOLO',
+                     f'Импортировано ориентировок: {len(ids)}', 'bolo', None, client_ip)
+        publish_event(cursor, 'bolo', 'imported', {'count': len(ids), 'ids': ids})
+        conn.commit()
+    finally:
+        cursor.close()
+    
+    return {
+        'statusCode': 201,
+        'headers': get_security_headers(origin),
+        'body': json.dumps({'imported': len(ids), 'ids': ids}),
+        'isBase64Encoded': False
+    }
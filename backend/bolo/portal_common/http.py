@@ -0,0 +1,181 @@
+"""
+HTTP-утилиты: заголовки, извлечение токена, стандартные ответы.
+Модуль не импортирует драйвер БД — OPTIONS и 401 отвечают без него.
+"""
+
+import os
+import json
+import hashlib
+from types import MappingProxyType
+
+DEFAULT_ORIGIN = os.environ.get('CORS_DEFAULT_ORIGIN', 'https://app.poehali.dev')
+# Через запятую: точный origin, '*.домен' — любой поддомен, 'origin*' — этот origin с любым портом
+ALLOWED_ORIGINS = os.environ.get('CORS_ALLOWED_ORIGINS', '*.poehali.dev,http://localhost*')
+MAX_CACHED_ORIGINS = 256
+
+_SECURITY_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Credentials': 'true',
+    'Access-Control-Expose-Headers': 'ETag, X-Next-Cursor',
+    'X-Content-Type-Options': 'nosniff',
+    'X-Frame-Options': 'DENY',
+    'X-XSS-Protection': '1; mode=block',
+    'Strict-Transport-Security': 'max-age=31536000; includeSubDomains',
+    'Referrer-Policy': 'strict-origin-when-cross-origin'
+}
+
+_CORS_HEADERS = {
+    'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type, Authorization, X-Authorization, Cookie, X-Cookie, If-None-Match',
+    'Access-Control-Allow-Credentials': 'true',
+    'Access-Control-Max-Age': '86400',
+    'X-Content-Type-Options': 'nosniff',
+    'X-Frame-Options': 'DENY'
+}
+
+def _parse_allowlist(value: str):
+    """Разбор CORS_ALLOWED_ORIGINS на точные значения, суффиксы и префиксы"""
+    exact, suffixes, prefixes = set(), [], []
+    for item in (part.strip() for part in value.split(',')):
+        if not item:
+            continue
+        if item.startswith('*.'):
+            suffixes.append(item[1:])
+        elif item.endswith('*'):
+            prefixes.append(item[:-1])
+        else:
+            exact.add(item)
+    return frozenset(exact), tuple(suffixes), tuple(prefixes)
+
+_EXACT, _SUFFIXES, _PREFIXES = _parse_allowlist(ALLOWED_ORIGINS)
+
+def _is_allowed(origin: str) -> bool:
+    if not origin:
+        return False
+    if origin in _EXACT or origin.endswith(_SUFFIXES):
+        return True
+    # 'http://localhost*' — только порт, не 'http://localhost.attacker.com'
+    for prefix in _PREFIXES:
+        if origin.startswith(prefix) and origin[len(prefix):len(prefix) + 1] in ('', ':'):
+            return True
+    return False
+
+def _build(base: dict, allowed_origin: str):
+    headers = {'Access-Control-Allow-Origin': allowed_origin}
+    headers.update(base)
+    return MappingProxyType(headers)
+
+# Заранее собранные неизменяемые наборы заголовков: {origin: headers}
+_security_by_origin = {None: _build(_SECURITY_HEADERS, DEFAULT_ORIGIN)}
+_cors_by_origin = {None: _build(_CORS_HEADERS, DEFAULT_ORIGIN)}
+
+def _headers_for(cache: dict, base: dict, origin):
+    headers = cache.get(origin)
+    if headers is None:
+        if not _is_allowed(origin):
+            return cache[None]
+        headers = _build(base, origin)
+        if len(cache) < MAX_CACHED_ORIGINS:
+            cache[origin] = headers
+    return headers
+
+# copy() у MappingProxyType копирует словарь целиком, dict(proxy) — поэлементно
+def get_security_headers(origin=None) -> dict:
+    """Возвращает стандартные security headers для API"""
+    return _headers_for(_security_by_origin, _SECURITY_HEADERS, origin).copy()
+
+def get_cors_headers(origin=None) -> dict:
+    """Возвращает CORS headers для OPTIONS"""
+    return _headers_for(_cors_by_origin, _CORS_HEADERS, origin).copy()
+
+def get_origin(headers: dict):
+    """Origin запроса"""
+    return headers.get('Origin') or headers.get('origin')
+
+def get_client_ip(event: dict) -> str:
+    """IP клиента из requestContext"""
+    request_context = event.get('requestContext') or {}
+    return (request_context.get('identity') or {}).get('sourceIp', '0.0.0.0')
+
+def extract_token_from_cookie(cookies: str) -> str:
+    """Извлечение токена из Cookie header"""
+    if not cookies:
+        return ''
+
+    for cookie in cookies.split(';'):
+        cookie = cookie.strip()
+        if cookie.startswith('auth_token='):
+            return cookie.split('=', 1)[1]
+    return ''
+
+def extract_token(headers: dict) -> str:
+    """Извлечение токена из Authorization header или Cookie"""
+    auth_header = headers.get('Authorization', '') or headers.get('authorization', '') or \
+                  headers.get('X-Authorization', '') or headers.get('x-authorization', '')
+    if auth_header.startswith('Bearer '):
+        return auth_header[7:]
+    cookies = headers.get('Cookie', '') or headers.get('cookie', '') or \
+              headers.get('X-Cookie', '') or headers.get('x-cookie', '')
+    return extract_token_from_cookie(cookies)
+
+def options_response(origin=None) -> dict:
+    """Ответ на CORS preflight"""
+    return {
+        'statusCode': 200,
+        'headers': get_cors_headers(origin),
+        'body': '',
+        'isBase64Encoded': False
+    }
+
+def json_response(status_code: int, data, origin=None) -> dict:
+    """Формирование JSON-ответа"""
+    return {
+        'statusCode': status_code,
+        'headers': get_security_headers(origin),
+        'body': json.dumps(data, default=str),
+        'isBase64Encoded': False
+    }
+
+def error_response(status_code: int, message: str, origin=None) -> dict:
+    """Формирование ответа с ошибкой"""
+    return json_response(status_code, {'error': message}, origin)
+
+def success_response(data: dict, origin=None) -> dict:
+    """Формирование успешного ответа"""
+    return json_response(200, data, origin)
+
+def make_etag(payload: str) -> str:
+    """Слабый ETag по содержимому ответа"""
+    return 'W/"' + hashlib.sha1(payload.encode()).hexdigest() + '"'
+
+def etag_matches(headers: dict, etag: str) -> bool:
+    """Клиент уже имеет эту версию (If-None-Match)"""
+    if_none_match = headers.get('If-None-Match') or headers.get('if-none-match') or ''
+    return etag in (tag.strip() for tag in if_none_match.split(','))
+
+def not_modified_response(etag: str, origin=None) -> dict:
+    """Ответ 304 без тела"""
+    headers = get_security_headers(origin)
+    headers['ETag'] = etag
+    return {
+        'statusCode': 304,
+        'headers': headers,
+        'body': '',
+        'isBase64Encoded': False
+    }
+
+def etag_response(data, request_headers: dict, origin=None) -> dict:
+    """JSON-ответ с ETag; 304, если у клиента та же версия"""
+    body = json.dumps(data, default=str, sort_keys=True)
+    etag = make_etag(body)
+    if etag_matches(request_headers, etag):
+        return not_modified_response(etag, origin)
+    headers = get_security_headers(origin)
+    headers['ETag'] = etag
+    headers['Cache-Control'] = 'private, no-cache'
+    return {
+        'statusCode': 200,
+        'headers': headers,
+        'body': body,
+        'isBase64Encoded': False
+    }
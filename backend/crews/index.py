@@ -1,57 +1,21 @@
 import json
-import os
-import hashlib
-from datetime import datetime
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from portal_common import (
+    get_origin, get_client_ip, extract_token, options_response,
+    error_response, success_response, json_response, etag_matches, not_modified_response,
+    get_db_connection, release_connection, verify_token, write_log, flush_logs_after
+)
+from portal_common.events import publish_event, get_events
 from security import sanitize_string
 
-def get_cors_headers(origin=None):
-    """Возвращает CORS headers с правильным Origin"""
-    allowed_origin = origin if origin and (origin.endswith('.poehali.dev') or origin.startswith('http://localhost')) else 'https://app.poehali.dev'
-    return {
-        'Access-Control-Allow-Origin': allowed_origin,
-        'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-        'Access-Control-Allow-Headers': 'Content-Type, Authorization, X-Authorization, Cookie, X-Cookie',
-        'Access-Control-Allow-Credentials': 'true',
-        'Access-Control-Max-Age': '86400',
-        'Content-Type': 'application/json'
-    }
-
-def extract_token_from_cookie(cookies: str) -> str:
-    """Извлечение токена из Cookie header"""
-    if not cookies:
-        return ''
-    
-    for cookie in cookies.split(';'):
-        cookie = cookie.strip()
-        if cookie.startswith('auth_token='):
-            return cookie.split('=', 1)[1]
-    return ''
-
-def extract_token(headers: dict) -> str:
-    """Извлечение токена из Authorization header или Cookie"""
-    auth_header = headers.get('Authorization', '') or headers.get('authorization', '') or \
-                  headers.get('X-Authorization', '') or headers.get('x-authorization', '')
-    if auth_header.startswith('Bearer '):
-        return auth_header[7:]
-    cookies = headers.get('Cookie', '') or headers.get('cookie', '') or \
-              headers.get('X-Cookie', '') or headers.get('x-cookie', '')
-    return extract_token_from_cookie(cookies)
-
+@flush_logs_after
 def handler(event: dict, context) -> dict:
     """API для управления экипажами"""
     method = event.get('httpMethod', 'GET')
     headers = event.get('headers', {})
-    origin = headers.get('Origin') or headers.get('origin')
+    origin = get_origin(headers)
     
     if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': get_cors_headers(origin),
-            'body': '',
-            'isBase64Encoded': False
-        }
+        return options_response(origin)
     
     token = extract_token(headers)
     
@@ -64,6 +28,10 @@ def handler(event: dict, context) -> dict:
     
     try:
         if method == 'GET':
+            params = event.get('queryStringParameters') or {}
+            # Канал событий доступен и через зарегистрированный URL экипажей
+            if params.get('resource') == 'events':
+                return get_events(params, origin)
             return get_crews(event, current_user, origin)
         elif method == 'POST':
             return create_crew(event, current_user, origin)
@@ -76,53 +44,6 @@ def handler(event: dict, context) -> dict:
     except Exception as e:
         return error_response(500, str(e), origin)
 
-def get_db_connection():
-    """Создание подключения к БД"""
-    dsn = os.environ.get('DATABASE_URL')
-    return psycopg2.connect(dsn, cursor_factory=RealDictCursor)
-
-def verify_token(token: str):
-    """Проверка токена и получение данных пользователя"""
-    if not token:
-        return None
-    
-    conn = get_db_connection()
-    cur = conn.cursor()
-    
-    try:
-        token_hash = hashlib.sha256(token.encode()).hexdigest()
-        
-        cur.execute(
-            """SELECT u.id, u.email, u.full_name, u.role, u.is_active, u.user_id
-               FROM users u
-               JOIN sessions s ON u.id = s.user_id
-               WHERE s.token_hash = %s AND s.expires_at > NOW()""",
-            (token_hash,)
-        )
-        user = cur.fetchone()
-        return dict(user) if user else None
-    finally:
-        cur.close()
-        conn.close()
-
-def write_log(user_id, user_name, action_type, action_description, target_type=None, target_id=None, ip_address='0.0.0.0'):
-    """Записать лог активности в БД"""
-    conn = get_db_connection()
-    cur = conn.cursor()
-    try:
-        cur.execute(
-            """INSERT INTO t_p77465986_police_portal_creati.activity_logs 
-               (user_id, user_name, action_type, action_description, target_type, target_id, ip_address)
-               VALUES (%s, %s, %s, %s, %s, %s, %s)""",
-            (user_id, user_name, action_type, action_description, target_type, target_id, ip_address)
-        )
-        conn.commit()
-    except Exception as e:
-        print(f"ERROR write_log: {str(e)}")
-    finally:
-        cur.close()
-        conn.close()
-
 def can_manage_crew(current_user: dict, crew_creator_id: int, crew_members: list) -> bool:
     """Проверка прав на управление экипажем"""
     if current_user['role'] in ['moderator', 'admin', 'manager']:
@@ -137,13 +58,39 @@ def can_manage_crew(current_user: dict, crew_creator_id: int, crew_members: list
     return False
 
 def get_crews(event: dict, current_user: dict, origin=None):
-    """Получить список экипажей"""
+    """Получить список экипажей; с ?since=версия — только изменённые и удалённые после неё"""
+    params = event.get('queryStringParameters') or {}
+    request_headers = event.get('headers') or {}
+    since = params.get('since')
+    
+    if since in (None, ''):
+        since = None
+    else:
+        try:
+            since = int(since)
+        except ValueError:
+            return error_response(400, 'Invalid since', origin)
+    
     conn = get_db_connection()
     cur = conn.cursor()
     
     try:
+        # Версия доски — максимум по экипажам и удалениям (оба по индексу)
+        cur.execute(
+            """SELECT GREATEST(
+                   (SELECT COALESCE(MAX(version), 0) FROM crews),
+                   (SELECT COALESCE(MAX(version), 0) FROM crew_tombstones)
+               ) AS version"""
+        )
+        version = cur.fetchone()['version']
+        etag = f'W/"crews-{version}"'
+        
+        if etag_matches(request_headers, etag):
+            return not_modified_response(etag, origin)
+        
+        where = "WHERE c.version > %s" if since is not None else ""
         cur.execute(
-            """SELECT c.id, c.callsign, c.location, c.status, c.creator_id, c.created_at, c.updated_at,
+            f"""SELECT c.id, c.callsign, c.location, c.status, c.creator_id, c.created_at, c.updated_at, c.version,
                       COALESCE(
                           json_agg(
                               json_build_object(
@@ -158,22 +105,26 @@ def get_crews(event: dict, current_user: dict, origin=None):
                FROM crews c
                LEFT JOIN crew_members cm ON c.id = cm.crew_id
                LEFT JOIN users u ON cm.user_id = u.id
+               {where}
                GROUP BY c.id
-               ORDER BY c.created_at DESC"""
+               ORDER BY c.created_at DESC""",
+            (since,) if since is not None else None
         )
         crews = cur.fetchall()
         
-        return {
-            'statusCode': 200,
-            'headers': get_cors_headers(origin),
-            'body': json.dumps({
-                'crews': [dict(crew) for crew in crews]
-            }, default=str),
-            'isBase64Encoded': False
-        }
+        data = {'crews': [dict(crew) for crew in crews], 'version': version}
+        
+        if since is not None:
+            cur.execute("SELECT crew_id FROM crew_tombstones WHERE version > %s", (since,))
+            data['deleted'] = [row['crew_id'] for row in cur.fetchall()]
+        
+        response = json_response(200, data, origin)
+        response['headers']['ETag'] = etag
+        response['headers']['Cache-Control'] = 'private, no-cache'
+        return response
     finally:
         cur.close()
-        conn.close()
+        release_connection(conn)
 
 def create_crew(event: dict, current_user: dict, origin=None):
     """Создать новый экипаж"""
@@ -216,11 +167,11 @@ def create_crew(event: dict, current_user: dict, origin=None):
                 (crew_id, second_member_id)
             )
         
+        publish_event(cur, 'crews', 'created', {'id': crew_id, 'callsign': callsign, 'status': 'available'})
         conn.commit()
         
         try:
-            request_context = event.get('requestContext', {})
-            client_ip = request_context.get('identity', {}).get('sourceIp', '0.0.0.0')
+            client_ip = get_client_ip(event)
             write_log(current_user['id'], current_user['full_name'], 'CREW', 
                       f'Создан экипаж {callsign}', 'crew', crew_id, client_ip)
         except Exception as e:
@@ -229,7 +180,7 @@ def create_crew(event: dict, current_user: dict, origin=None):
         return success_response({'message': 'Crew created successfully', 'crew_id': crew_id}, origin)
     finally:
         cur.close()
-        conn.close()
+        release_connection(conn)
 
 def update_crew(event: dict, current_user: dict, origin=None):
     """Обновить экипаж"""
@@ -275,11 +226,11 @@ def update_crew(event: dict, current_user: dict, origin=None):
                 "UPDATE crews SET status = %s, updated_at = NOW() WHERE id = %s",
                 (new_status, crew_id)
             )
+            publish_event(cur, 'crews', 'status', {'id': crew_id, 'callsign': crew_name, 'status': new_status})
             conn.commit()
             
             try:
-                request_context = event.get('requestContext', {})
-                client_ip = request_context.get('identity', {}).get('sourceIp', '0.0.0.0')
+                client_ip = get_client_ip(event)
                 write_log(current_user['id'], current_user['full_name'], 'CREW', 
                           f'Экипаж {crew_name} изменил статус на \'{status_labels.get(new_status, new_status)}\'', 
                           'crew', crew_id, client_ip)
@@ -294,6 +245,7 @@ def update_crew(event: dict, current_user: dict, origin=None):
                 "UPDATE crews SET location = %s, updated_at = NOW() WHERE id = %s",
                 (new_location, crew_id)
             )
+            publish_event(cur, 'crews', 'location', {'id': crew_id, 'location': new_location})
             conn.commit()
             return success_response({'message': 'Location updated successfully'}, origin)
         
@@ -302,7 +254,7 @@ def update_crew(event: dict, current_user: dict, origin=None):
     
     finally:
         cur.close()
-        conn.close()
+        release_connection(conn)
 
 def delete_crew(event: dict, current_user: dict, origin=None):
     """Удалить экипаж"""
@@ -338,11 +290,11 @@ def delete_crew(event: dict, current_user: dict, origin=None):
         
         cur.execute("DELETE FROM crew_members WHERE crew_id = %s", (crew_id,))
         cur.execute("DELETE FROM crews WHERE id = %s", (crew_id,))
+        publish_event(cur, 'crews', 'deleted', {'id': int(crew_id), 'callsign': crew_name})
         conn.commit()
         
         try:
-            request_context = event.get('requestContext', {})
-            client_ip = request_context.get('identity', {}).get('sourceIp', '0.0.0.0')
+            client_ip = get_client_ip(event)
             write_log(current_user['id'], current_user['full_name'], 'CREW', 
                       f'Удалён экипаж {crew_name}', 'crew', int(crew_id), client_ip)
         except Exception as e:
@@ -351,22 +303,4 @@ def delete_crew(event: dict, current_user: dict, origin=None):
         return success_response({'message': 'Crew deleted successfully'}, origin)
     finally:
         cur.close()
-        conn.close()
-
-def error_response(status_code: int, message: str, origin=None):
-    """Формирование ответа с ошибкой"""
-    return {
-        'statusCode': status_code,
-        'headers': get_cors_headers(origin),
-        'body': json.dumps({'error': message}),
-        'isBase64Encoded': False
-    }
-
-def success_response(data: dict, origin=None):
-    """Формирование успешного ответа"""
-    return {
-        'statusCode': 200,
-        'headers': get_cors_headers(origin),
-        'body': json.dumps(data),
-        'isBase64Encoded': False
-    }
\ No newline at end of file
+        release_connection(conn)
@@ -0,0 +1,31 @@
+from portal_common import (
+    get_origin, extract_token, options_response, error_response, verify_token
+)
+from portal_common.events import get_events
+
+def handler(event: dict, context) -> dict:
+    """Long-poll канал событий экипажей и ориентировок BOLO"""
+    method = event.get('httpMethod', 'GET')
+    headers = event.get('headers', {})
+    origin = get_origin(headers)
+    
+    if method == 'OPTIONS':
+        return options_response(origin)
+    
+    token = extract_token(headers)
+    
+    if not token:
+        return error_response(401, 'Authentication required', origin)
+    
+    current_user = verify_token(token)
+    if not current_user:
+        return error_response(401, 'Invalid token', origin)
+    
+    if method != 'GET':
+        return error_response(405, 'Method not allowed', origin)
+    
+    try:
+        return get_events(event.get('queryStringParameters') or {}, origin)
+    except Exception as e:
+        print(f"ERROR: {str(e)}")
+        return error_response(500, str(e), origin)
@@ -0,0 +1,114 @@
+"""
+Проверка сессий с in-process кешем: token_hash -> данные пользователя.
+Кеш живёт между вызовами тёплого контейнера. Выход, удаление, блокировка
+и смена роли пишутся в token_revocations (см. tokens): попадание в кеш
+сверяется с этим списком, и запись, кешированная до отзыва, перепроверяется
+по БД. Задержка для других контейнеров — не больше REVOCATION_REFRESH_SECONDS.
+Подписанные токены (SESSION_TOKEN_MODE=signed) проверяются без БД — см. tokens.
+"""
+
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from portal_common.db import get_db_connection, release_connection
+from portal_common.tokens import (
+    signed_mode, is_signed, verify_signed_token, mark_revocations_stale, is_revoked, opaque_jti
+)
+
+TTL_SECONDS = float(os.environ.get('SESSION_CACHE_TTL_SECONDS', '30'))  # Время жизни записи
+MAX_ENTRIES = int(os.environ.get('SESSION_CACHE_MAX_ENTRIES', '1000'))  # Размер LRU
+
+# {token_hash: (момент_истечения, user, время_проверки_по_БД)}, в порядке последнего использования
+_entries = OrderedDict()
+_lock = threading.Lock()
+
+def hash_token(token: str) -> str:
+    """SHA-256 токена — под этим значением сессия хранится в БД"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def cache_get(token_hash: str):
+    """(данные пользователя, unix-время проверки по БД) из кеша или None"""
+    with _lock:
+        entry = _entries.get(token_hash)
+        if entry is None:
+            return None
+        expires_at, user, cached_at = entry
+        if time.monotonic() >= expires_at:
+            del _entries[token_hash]
+            return None
+        _entries.move_to_end(token_hash)
+        return dict(user), cached_at
+
+def cache_put(token_hash: str, user: dict, session_ttl=None):
+    """Сохранить результат проверки (не дольше, чем живёт сама сессия)"""
+    ttl = TTL_SECONDS if session_ttl is None else min(TTL_SECONDS, float(session_ttl))
+    if ttl <= 0 or MAX_ENTRIES <= 0:
+        return
+    with _lock:
+        _entries[token_hash] = (time.monotonic() + ttl, dict(user), time.time())
+        _entries.move_to_end(token_hash)
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+
+def invalidate_token(token_hash: str):
+    """Удалить запись для одной сессии"""
+    with _lock:
+        _entries.pop(token_hash, None)
+
+def invalidate_user(user_id: int):
+    """Удалить все записи пользователя (удаление, блокировка, смена роли)"""
+    invalidate_users([user_id])
+
+def invalidate_users(user_ids):
+    """Удалить записи нескольких пользователей за один проход по кешу"""
+    user_ids = set(user_ids)
+    with _lock:
+        stale = [h for h, (_, user, _) in _entries.items() if user.get('id') in user_ids]
+        for token_hash in stale:
+            del _entries[token_hash]
+    mark_revocations_stale()
+
+def verify_token(token: str):
+    """Проверка токена и получение данных пользователя"""
+    if not token:
+        return None
+
+    if signed_mode() and is_signed(token):
+        return verify_signed_token(token)
+
+    token_hash = hash_token(token)
+    cached = cache_get(token_hash)
+    if cached:
+        user, cached_at = cached
+        # Отзыв после кеширования (в любом контейнере) — перепроверяем по БД
+        if not is_revoked({'id': user['id'], 'jti': opaque_jti(token_hash), 'iat': cached_at}):
+            return user
+        invalidate_token(token_hash)
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    try:
+        cur.execute(
+            """SELECT u.id, u.user_id, u.email, u.full_name, u.role, u.is_active,
+                      EXTRACT(EPOCH FROM (s.expires_at - NOW())) AS session_ttl
+               FROM t_p77465986_police_portal_creati.users u
+               JOIN t_p77465986_police_portal_creati.sessions s ON u.id = s.user_id
+               WHERE s.token_hash = %s AND s.expires_at > NOW()""",
+            (token_hash,)
+        )
+        user = cur.fetchone()
+        if not user:
+            return None
+
+        user = dict(user)
+        cache_put(token_hash, user, user.pop('session_ttl'))
+        return user
+    except Exception as e:
+        print(f"ERROR verify_token: {str(e)}")
+        return None
+    finally:
+        cur.close()
+        release_connection(conn)
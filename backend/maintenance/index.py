@@ -0,0 +1,209 @@
+import json
+import os
+import hmac
+import time
+from portal_common import (
+    get_security_headers, get_origin, options_response, error_response,
+    get_db_connection, release_connection
+)
+
+ACTIVITY_LOG_RETENTION_HOURS = int(os.environ.get('ACTIVITY_LOG_RETENTION_HOURS', '72'))
+EVENT_RETENTION_HOURS = int(os.environ.get('EVENT_RETENTION_HOURS', '24'))
+NOTIFICATION_RETENTION_DAYS = int(os.environ.get('NOTIFICATION_RETENTION_DAYS', '30'))  # Только прочитанные
+NOTIFICATION_ARCHIVE = os.environ.get('NOTIFICATION_ARCHIVE', 'false') == 'true'  # Переносить в архив, а не удалять
+BATCH_SIZE = int(os.environ.get('MAINTENANCE_BATCH_SIZE', '5000'))  # Строк за одну транзакцию
+TIME_BUDGET_SECONDS = float(os.environ.get('MAINTENANCE_TIME_BUDGET_SECONDS', '20'))  # Остаток дочистит следующий запуск
+
+def handler(event: dict, context) -> dict:
+    """Плановое обслуживание БД: очистка устаревших данных (вызывается по таймеру)"""
+    method = event.get('httpMethod')
+    headers = event.get('headers') or {}
+    origin = get_origin(headers)
+
+    if method == 'OPTIONS':
+        return options_response(origin)
+
+    # Вызов по HTTP требует секрета; вызов от триггера-таймера приходит без httpMethod
+    if method is not None and not is_authorized(headers):
+        return error_response(401, 'Maintenance token required', origin)
+
+    params = event.get('queryStringParameters') or {}
+    requested = params.get('job')
+
+    if requested and requested not in JOBS:
+        return error_response(400, f'Unknown job. Allowed: {", ".join(JOBS)}', origin)
+
+    deadline = time.monotonic() + TIME_BUDGET_SECONDS
+    results = {}
+
+    for name, job in JOBS.items():
+        if requested and name != requested:
+            continue
+        try:
+            results[name] = job(deadline)
+        except Exception as e:
+            print(f"ERROR maintenance {name}: {str(e)}")
+            results[name] = {'error': str(e)}
+        print(f"MAINTENANCE: {name}: {json.dumps(results[name], default=str)}")
+
+    return {
+        'statusCode': 200,
+        'headers': get_security_headers(origin),
+        'body': json.dumps({'results': results}, default=str),
+        'isBase64Encoded': False
+    }
+
+def is_authorized(headers: dict) -> bool:
+    """Проверка секрета X-Maintenance-Token"""
+    expected = os.environ.get('MAINTENANCE_TOKEN', '')
+    provided = headers.get('X-Maintenance-Token') or headers.get('x-maintenance-token') or ''
+    return bool(expected) and hmac.compare_digest(provided, expected)
+
+def delete_in_batches(delete_sql: str, params: tuple, deadline: float) -> dict:
+    """Удалять порциями по BATCH_SIZE, фиксируя каждую порцию отдельно"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    deleted = 0
+    batches = 0
+    complete = False
+
+    try:
+        while time.monotonic() < deadline:
+            cur.execute(delete_sql, params + (BATCH_SIZE,))
+            count = cur.rowcount
+            conn.commit()
+            deleted += count
+            batches += 1
+            if count < BATCH_SIZE:
+                complete = True
+                break
+
+        return {'deleted': deleted, 'batches': batches, 'complete': complete}
+    finally:
+        cur.close()
+        release_connection(conn)
+
+def purge_activity_logs(deadline: float) -> dict:
+    """Удалить логи активности старше ACTIVITY_LOG_RETENTION_HOURS"""
+    result = delete_in_batches(
+        """DELETE FROM t_p77465986_police_portal_creati.activity_logs
+           WHERE id IN (
+               SELECT id FROM t_p77465986_police_portal_creati.activity_logs
+               WHERE created_at < NOW() - make_interval(hours => %s)
+               ORDER BY created_at
+               LIMIT %s
+           )""",
+        (ACTIVITY_LOG_RETENTION_HOURS,),
+        deadline
+    )
+    result['retention_hours'] = ACTIVITY_LOG_RETENTION_HOURS
+    return result
+
+def purge_login_rate_limits(deadline: float) -> dict:
+    """Удалить счётчики rate limiter, у которых истекли и окно, и блокировка"""
+    return delete_in_batches(
+        """DELETE FROM t_p77465986_police_portal_creati.login_rate_limits
+           WHERE key IN (
+               SELECT key FROM t_p77465986_police_portal_creati.login_rate_limits
+               WHERE updated_at < NOW() - INTERVAL '1 day'
+                 AND (blocked_until IS NULL OR blocked_until < NOW())
+               LIMIT %s
+           )""",
+        (),
+        deadline
+    )
+
+def purge_sessions(deadline: float) -> dict:
+    """Удалить истёкшие сессии"""
+    return delete_in_batches(
+        """DELETE FROM t_p77465986_police_portal_creati.sessions
+           WHERE id IN (
+               SELECT id FROM t_p77465986_police_portal_creati.sessions
+               WHERE expires_at < NOW()
+               LIMIT %s
+           )""",
+        (),
+        deadline
+    )
+
+def purge_token_revocations(deadline: float) -> dict:
+    """Удалить отзывы, срок которых истёк вместе с отозванными токенами"""
+    return delete_in_batches(
+        """DELETE FROM t_p77465986_police_portal_creati.token_revocations
+           WHERE id IN (
+               SELECT id FROM t_p77465986_police_portal_creati.token_revocations
+               WHERE expires_at < NOW()
+               LIMIT %s
+           )""",
+        (),
+        deadline
+    )
+
+def purge_portal_events(deadline: float) -> dict:
+    """Удалить события long-poll канала старше EVENT_RETENTION_HOURS"""
+    result = delete_in_batches(
+        """DELETE FROM t_p77465986_police_portal_creati.portal_events
+           WHERE id IN (
+               SELECT id FROM t_p77465986_police_portal_creati.portal_events
+               WHERE created_at < NOW() - make_interval(hours => %s)
+               ORDER BY id
+               LIMIT %s
+           )""",
+        (EVENT_RETENTION_HOURS,),
+        deadline
+    )
+    result['retention_hours'] = EVENT_RETENTION_HOURS
+    return result
+
+def relation_sizes(table: str) -> dict:
+    """Размер таблицы и её индексов в байтах"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """SELECT pg_table_size(%s::regclass) AS table_bytes,
+                      pg_indexes_size(%s::regclass) AS index_bytes""",
+            (table, table)
+        )
+        return dict(cur.fetchone())
+    finally:
+        cur.close()
+        release_connection(conn)
+
+def purge_notifications(deadline: float) -> dict:
+    """Удалить (или перенести в архив) прочитанные уведомления старше NOTIFICATION_RETENTION_DAYS"""
+    table = 't_p77465986_police_portal_creati.notifications'
+    before = relation_sizes(table)
+    batch = """SELECT id FROM t_p77465986_police_portal_creati.notifications
+               WHERE is_read = true AND created_at < NOW() - make_interval(days => %s)
+               ORDER BY id
+               LIMIT %s"""
+    if NOTIFICATION_ARCHIVE:
+        sql = f"""WITH moved AS (
+                      DELETE FROM t_p77465986_police_portal_creati.notifications
+                      WHERE id IN ({batch})
+                      RETURNING id, user_id, message, type, created_at, related_crew_id, related_bolo_id
+                  )
+                  INSERT INTO t_p77465986_police_portal_creati.notifications_archive
+                      (id, user_id, message, type, created_at, related_crew_id, related_bolo_id)
+                  SELECT * FROM moved"""
+    else:
+        sql = f"""DELETE FROM t_p77465986_police_portal_creati.notifications
+                  WHERE id IN ({batch})"""
+    result = delete_in_batches(sql, (NOTIFICATION_RETENTION_DAYS,), deadline)
+    result['retention_days'] = NOTIFICATION_RETENTION_DAYS
+    result['archived'] = NOTIFICATION_ARCHIVE
+    # Место освобождается для повторного использования autovacuum; размер файла уменьшит только VACUUM FULL
+    result['size_before'] = before
+    result['size_after'] = relation_sizes(table)
+    return result
+
+# Задачи обслуживания: {имя: функция(deadline) -> метрики}
+JOBS = {
+    'activity_logs': purge_activity_logs,
+    'login_rate_limits': purge_login_rate_limits,
+    'sessions': purge_sessions,
+    'token_revocations': purge_token_revocations,
+    'portal_events': purge_portal_events,
+    'notifications': purge_notifications,
+}
@@ -0,0 +1,108 @@
+"""
+Пул подключений к PostgreSQL, живущий между вызовами тёплого контейнера.
+psycopg2 импортируется при первом подключении, а не при загрузке модуля.
+"""
+
+import os
+import time
+import threading
+
+MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', '5'))  # Максимум простаивающих подключений
+IDLE_TIMEOUT = int(os.environ.get('DB_POOL_IDLE_SECONDS', '300'))  # Через сколько закрывать простаивающие
+# Через сколько простоя проверять подключение SELECT 1: после обрыва на стороне
+# сервера (failover, idle-kill) запрос получает новое подключение вместо ошибки
+# на первом операторе. Подключение, вернувшееся в пул недавно, не проверяется —
+# иначе каждый запрос тёплого контейнера платит лишний round-trip.
+# 0 — проверять при каждой выдаче
+PING_AFTER = float(os.environ.get('DB_POOL_PING_SECONDS', '10'))
+
+# Простаивающие подключения: [(conn, время_возврата), ...], последнее — самое свежее
+_idle = []
+_lock = threading.Lock()
+
+def _connect():
+    """Новое подключение к БД (строки возвращаются словарями)"""
+    import psycopg2
+    from psycopg2.extras import RealDictCursor
+    return psycopg2.connect(os.environ.get('DATABASE_URL'), cursor_factory=RealDictCursor)
+
+def _is_healthy(conn, idle_for: float) -> bool:
+    """Проверка, что подключение живо"""
+    import psycopg2
+    if conn.closed:
+        return False
+    if idle_for < PING_AFTER:
+        return True
+    try:
+        # В autocommit проверка — один round-trip, без BEGIN/ROLLBACK
+        autocommit = conn.autocommit
+        conn.autocommit = True
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.close()
+        finally:
+            conn.autocommit = autocommit
+        return True
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        return False
+
+def _discard(conn):
+    """Закрыть подключение, не выбрасывая ошибок"""
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+def get_db_connection():
+    """Взять подключение из пула или открыть новое"""
+    now = time.monotonic()
+    conn = None
+
+    with _lock:
+        # Выселяем подключения, простаивавшие дольше IDLE_TIMEOUT
+        expired = [c for c, ts in _idle if now - ts > IDLE_TIMEOUT]
+        _idle[:] = [(c, ts) for c, ts in _idle if now - ts <= IDLE_TIMEOUT]
+    for c in expired:
+        _discard(c)
+
+    while conn is None:
+        with _lock:
+            if not _idle:
+                break
+            candidate, returned_at = _idle.pop()
+        if _is_healthy(candidate, now - returned_at):
+            conn = candidate
+        else:
+            print("DB pool: dropping broken connection")
+            _discard(candidate)
+
+    return conn if conn is not None else _connect()
+
+def release_connection(conn):
+    """Вернуть подключение в пул (сломанные и лишние закрываются)"""
+    if conn is None or conn.closed:
+        return
+
+    import psycopg2
+    import psycopg2.extensions
+    try:
+        if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            conn.rollback()
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        _discard(conn)
+        return
+
+    with _lock:
+        if len(_idle) < MAX_SIZE:
+            _idle.append((conn, time.monotonic()))
+            return
+    _discard(conn)
+
+def close_all():
+    """Закрыть все простаивающие подключения"""
+    with _lock:
+        conns = [c for c, _ in _idle]
+        _idle.clear()
+    for c in conns:
+        _discard(c)
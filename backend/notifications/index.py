@@ -1,49 +1,29 @@
 import json
-import os
-import hashlib
-import psycopg2
-from psycopg2.extras import RealDictCursor
 from datetime import datetime
+from portal_common import (
+    get_security_headers, get_origin, extract_token, options_response,
+    error_response, success_response, get_db_connection, release_connection, verify_token
+)
+from portal_common.pagination import parse_limit, keyset_condition, page_result
+from security import sanitize_string
 
-def get_cors_headers(origin=None):
-    """Возвращает CORS headers с правильным Origin"""
-    allowed_origin = origin if origin and (origin.endswith('.poehali.dev') or origin.startswith('http://localhost')) else 'https://app.poehali.dev'
-    return {
-        'Access-Control-Allow-Origin': allowed_origin,
-        'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-        'Access-Control-Allow-Headers': 'Content-Type, Authorization, X-Authorization, Cookie, X-Cookie',
-        'Access-Control-Allow-Credentials': 'true',
-        'Access-Control-Max-Age': '86400',
-        'Content-Type': 'application/json'
-    }
-
-def extract_token_from_cookie(cookies: str) -> str:
-    """Извлечение токена из Cookie header"""
-    if not cookies:
-        return ''
-    
-    for cookie in cookies.split(';'):
-        cookie = cookie.strip()
-        if cookie.startswith('auth_token='):
-            return cookie.split('=', 1)[1]
-    return ''
+PAGE_SIZE = 50  # Как прежний LIMIT 50
+PAGE_SIZE_MAX = 200
+MARK_IDS_MAX = 1000
+MESSAGE_MAX_LENGTH = 500
+ROLES = ['user', 'moderator', 'admin', 'manager']
+STAFF_ROLES = ['moderator', 'admin', 'manager']  # Могут рассылать по ролям и всем
 
 def handler(event: dict, context) -> dict:
     """API для управления уведомлениями пользователя"""
     method = event.get('httpMethod', 'GET')
     headers = event.get('headers', {})
-    origin = headers.get('Origin') or headers.get('origin')
+    origin = get_origin(headers)
     
     if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': get_cors_headers(origin),
-            'body': '',
-            'isBase64Encoded': False
-        }
+        return options_response(origin)
     
-    cookies = headers.get('Cookie', '') or headers.get('cookie', '') or headers.get('X-Cookie', '') or headers.get('x-cookie', '')
-    token = extract_token_from_cookie(cookies)
+    token = extract_token(headers)
     
     if not token:
         return error_response(401, 'Authentication required', origin)
@@ -54,7 +34,10 @@ def handler(event: dict, context) -> dict:
     
     try:
         if method == 'GET':
-            return get_notifications(current_user, origin)
+            params = event.get('queryStringParameters') or {}
+            if params.get('view') == 'unread_count':
+                return get_unread_count(current_user, origin)
+            return get_notifications(params, current_user, origin)
         elif method == 'POST':
             return create_notification(event, current_user, origin)
         elif method == 'PUT':
@@ -65,73 +48,70 @@ def handler(event: dict, context) -> dict:
         print(f"ERROR: {str(e)}")
         return error_response(500, str(e), origin)
 
-def get_db_connection():
-    """Создание подключения к БД"""
-    dsn = os.environ.get('DATABASE_URL')
-    return psycopg2.connect(dsn, cursor_factory=RealDictCursor)
-
-def verify_token(token: str):
-    """Проверка токена и получение данных пользователя"""
-    if not token:
-        return None
+def get_notifications(params: dict, current_user: dict, origin=None):
+    """Получить уведомления текущего пользователя (keyset-пагинация по cursor)"""
+    try:
+        limit = parse_limit(params.get('limit'), PAGE_SIZE, PAGE_SIZE_MAX)
+        conditions = ["user_id = %s"]
+        query_params = [current_user['id']]
+        if params.get('cursor'):
+            condition, values = keyset_condition('created_at', 'DESC', params['cursor'])
+            conditions.append(condition)
+            query_params.extend(values)
+    except ValueError as e:
+        return error_response(400, str(e), origin)
     
     conn = get_db_connection()
     cur = conn.cursor()
     
     try:
-        token_hash = hashlib.sha256(token.encode()).hexdigest()
-        
         cur.execute(
-            """SELECT u.id, u.email, u.full_name, u.role, u.is_active
-               FROM t_p77465986_police_portal_creati.users u
-               JOIN t_p77465986_police_portal_creati.sessions s ON u.id = s.user_id
-               WHERE s.token_hash = %s AND s.expires_at > NOW()""",
-            (token_hash,)
+            f"""SELECT id, message, type, is_read, created_at, related_crew_id, related_bolo_id
+               FROM t_p77465986_police_portal_creati.notifications
+               WHERE {' AND '.join(conditions)}
+               ORDER BY created_at DESC, id DESC
+               LIMIT %s""",
+            query_params + [limit + 1]
         )
-        user = cur.fetchone()
-        return dict(user) if user else None
-    except Exception as e:
-        print(f"ERROR verify_token: {str(e)}")
-        return None
+        notifications, next_cursor = page_result([dict(n) for n in cur.fetchall()], limit, 'created_at')
+        
+        return {
+            'statusCode': 200,
+            'headers': get_security_headers(origin),
+            'body': json.dumps({
+                'notifications': notifications,
+                'next_cursor': next_cursor
+            }, default=str),
+            'isBase64Encoded': False
+        }
     finally:
         cur.close()
-        conn.close()
+        release_connection(conn)
 
-def get_notifications(current_user: dict, origin=None):
-    """Получить уведомления текущего пользователя"""
+def get_unread_count(current_user: dict, origin=None):
+    """Число непрочитанных уведомлений (из счётчика, без чтения самих уведомлений)"""
     conn = get_db_connection()
     cur = conn.cursor()
     
     try:
         cur.execute(
-            """SELECT id, message, type, is_read, created_at, related_crew_id, related_bolo_id
-               FROM t_p77465986_police_portal_creati.notifications
-               WHERE user_id = %s
-               ORDER BY created_at DESC
-               LIMIT 50""",
+            "SELECT unread FROM t_p77465986_police_portal_creati.notification_counters WHERE user_id = %s",
             (current_user['id'],)
         )
-        notifications = cur.fetchall()
-        
-        return {
-            'statusCode': 200,
-            'headers': get_cors_headers(origin),
-            'body': json.dumps({
-                'notifications': [dict(n) for n in notifications]
-            }, default=str),
-            'isBase64Encoded': False
-        }
+        row = cur.fetchone()
+        return success_response({'unread': row['unread'] if row else 0}, origin)
     finally:
         cur.close()
-        conn.close()
+        release_connection(conn)
 
 def create_notification(event: dict, current_user: dict, origin=None):
-    """Создать уведомление для пользователя"""
+    """Создать уведомление для себя или разослать его: target = {roles | crew_ids | all}"""
     body = json.loads(event.get('body', '{}'))
-    message = body.get('message', '').strip()
+    message = sanitize_string(body.get('message', ''), MESSAGE_MAX_LENGTH)
     notification_type = body.get('type', 'info')
     related_crew_id = body.get('related_crew_id')
     related_bolo_id = body.get('related_bolo_id')
+    target = body.get('target')
     
     if not message:
         return error_response(400, 'Message is required', origin)
@@ -139,6 +119,10 @@ def create_notification(event: dict, current_user: dict, origin=None):
     if notification_type not in ['info', 'warning', 'error', 'success']:
         return error_response(400, 'Invalid notification type', origin)
     
+    if target:
+        return fan_out_notification(target, (message, notification_type, related_crew_id, related_bolo_id),
+                                    current_user, origin)
+    
     conn = get_db_connection()
     cur = conn.cursor()
     
@@ -155,7 +139,7 @@ def create_notification(event: dict, current_user: dict, origin=None):
         
         return {
             'statusCode': 201,
-            'headers': get_cors_headers(origin),
+            'headers': get_security_headers(origin),
             'body': json.dumps({
                 'id': result['id'],
                 'created_at': result['created_at'].isoformat()
@@ -164,48 +148,133 @@ def create_notification(event: dict, current_user: dict, origin=None):
         }
     finally:
         cur.close()
-        conn.close()
+        release_connection(conn)
+
+def fan_out_notification(target: dict, fields: tuple, current_user: dict, origin=None):
+    """Разослать уведомление активным пользователям одним INSERT ... SELECT"""
+    if not isinstance(target, dict):
+        return error_response(400, 'Invalid target', origin)
+    
+    # Неподтверждённый аккаунт получает сессию сразу при регистрации, но рассылать не может
+    if not current_user.get('is_active'):
+        return error_response(403, 'Account is not activated', origin)
+    is_staff = current_user['role'] in STAFF_ROLES
+    
+    roles = target.get('roles')
+    crew_ids = target.get('crew_ids')
+    
+    if target.get('all') is True:
+        recipients = "SELECT u.id FROM t_p77465986_police_portal_creati.users u WHERE u.is_active = true"
+        params = []
+    elif roles:
+        if not isinstance(roles, list) or any(role not in ROLES for role in roles):
+            return error_response(400, 'Invalid roles', origin)
+        recipients = """SELECT u.id FROM t_p77465986_police_portal_creati.users u
+                        WHERE u.is_active = true AND u.role = ANY(%s)"""
+        params = [roles]
+    elif crew_ids:
+        if not isinstance(crew_ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in crew_ids):
+            return error_response(400, 'Invalid crew_ids', origin)
+        crew_ids = list(set(crew_ids))
+        recipients = """SELECT DISTINCT u.id FROM t_p77465986_police_portal_creati.users u
+                        JOIN t_p77465986_police_portal_creati.crew_members cm ON cm.user_id = u.id
+                        WHERE u.is_active = true AND cm.crew_id = ANY(%s)"""
+        params = [crew_ids]
+    else:
+        return error_response(400, 'Target must contain roles, crew_ids or all', origin)
+    
+    # Рассылка по ролям и всем — только для руководства; экипажу — руководство или его участник
+    if not crew_ids and not is_staff:
+        return error_response(403, 'Access denied', origin)
+    
+    conn = get_db_connection()
+    cur = conn.cursor()
+    
+    try:
+        if crew_ids and not is_staff:
+            cur.execute(
+                """SELECT COUNT(DISTINCT crew_id) AS member_of
+                   FROM t_p77465986_police_portal_creati.crew_members
+                   WHERE user_id = %s AND crew_id = ANY(%s)""",
+                (current_user['id'], crew_ids)
+            )
+            if cur.fetchone()['member_of'] != len(crew_ids):
+                return error_response(403, 'You can only notify crews you are a member of', origin)
+        
+        cur.execute(
+            f"""INSERT INTO t_p77465986_police_portal_creati.notifications
+                (user_id, message, type, related_crew_id, related_bolo_id)
+                SELECT r.id, %s, %s, %s, %s FROM ({recipients}) r""",
+            list(fields) + params
+        )
+        created = cur.rowcount
+        conn.commit()
+        
+        return {
+            'statusCode': 201,
+            'headers': get_security_headers(origin),
+            'body': json.dumps({'created': created}),
+            'isBase64Encoded': False
+        }
+    finally:
+        cur.close()
+        release_connection(conn)
 
 def mark_as_read(event: dict, current_user: dict, origin=None):
-    """Отметить уведомление как прочитанное"""
+    """Отметить прочитанными: notification_id, список notification_ids, all или before (created_at <=)"""
     body = json.loads(event.get('body', '{}'))
     notification_id = body.get('notification_id')
+    notification_ids = body.get('notification_ids')
+    before = body.get('before')
     
-    if not notification_id:
-        return error_response(400, 'notification_id is required', origin)
+    if notification_id:
+        condition, params = "id = %s", [notification_id]
+    elif notification_ids:
+        if not isinstance(notification_ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in notification_ids):
+            return error_response(400, 'notification_ids must be a list of integers', origin)
+        if len(notification_ids) > MARK_IDS_MAX:
+            return error_response(400, f'Too many notification_ids (max {MARK_IDS_MAX})', origin)
+        condition, params = "id = ANY(%s)", [notification_ids]
+    elif before:
+        try:
+            before = datetime.fromisoformat(str(before).replace('Z', '+00:00'))
+        except ValueError:
+            return error_response(400, 'before must be an ISO timestamp', origin)
+        condition, params = "created_at <= %s", [before]
+    elif body.get('all') is True:
+        condition, params = "true", []
+    else:
+        return error_response(400, 'notification_id, notification_ids, before or all is required', origin)
     
     conn = get_db_connection()
     cur = conn.cursor()
     
     try:
         cur.execute(
-            """UPDATE t_p77465986_police_portal_creati.notifications
+            f"""UPDATE t_p77465986_police_portal_creati.notifications
                SET is_read = true
-               WHERE id = %s AND user_id = %s
-               RETURNING id""",
-            (notification_id, current_user['id'])
+               WHERE user_id = %s AND {condition} AND is_read = false""",
+            [current_user['id']] + params
         )
+        updated = cur.rowcount
         
-        if cur.rowcount == 0:
-            return error_response(404, 'Notification not found or access denied', origin)
+        if notification_id and updated == 0:
+            # Уже прочитанное — успех, чужое или несуществующее — 404
+            cur.execute(
+                "SELECT 1 FROM t_p77465986_police_portal_creati.notifications WHERE id = %s AND user_id = %s",
+                (notification_id, current_user['id'])
+            )
+            if not cur.fetchone():
+                return error_response(404, 'Notification not found or access denied', origin)
         
         conn.commit()
         
         return {
             'statusCode': 200,
-            'headers': get_cors_headers(origin),
-            'body': json.dumps({'success': True}),
+            'headers': get_security_headers(origin),
+            'body': json.dumps({'success': True, 'updated': updated}),
             'isBase64Encoded': False
         }
     finally:
         cur.close()
-        conn.close()
-
-def error_response(status_code: int, message: str, origin=None):
-    """Формирование ответа с ошибкой"""
-    return {
-        'statusCode': status_code,
-        'headers': get_cors_headers(origin),
-        'body': json.dumps({'error': message}),
-        'isBase64Encoded': False
-    }
+        release_connection(conn)
@@ -1,66 +1,35 @@
 import json
-import os
-import hashlib
-import secrets
-import bcrypt
-from datetime import datetime
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from portal_common import (
+    get_security_headers, get_origin, get_client_ip, extract_token, options_response,
+    error_response, success_response, etag_response, get_db_connection, release_connection,
+    verify_token, invalidate_user, invalidate_users, revoke_user_tokens, revoke_users_tokens,
+    write_log, write_log_tx, flush_logs_after
+)
+from portal_common.audit import insert_logs
+from portal_common.pagination import parse_limit, keyset_condition, page_result, estimate_count
+from password_hasher import get_hasher, HasherBusyError
 from security import sanitize_string, sanitize_email, sanitize_user_id, validate_password, validate_role
 
+LOGS_PAGE_SIZE = 500  # Страница логов по умолчанию (как прежний LIMIT 500)
+LOGS_PAGE_SIZE_MAX = 500
+USERS_PAGE_SIZE = 50
+USERS_PAGE_SIZE_MAX = 200
+ROLES = ['user', 'moderator', 'admin', 'manager']
+BULK_MAX_USERS = 500  # Пользователей в одном массовом действии
+
 def hash_password(password: str) -> str:
     """Хеширование пароля с использованием bcrypt"""
-    password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt(rounds=12)
-    hashed = bcrypt.hashpw(password_bytes, salt)
-    return hashed.decode('utf-8')
-
-def extract_token_from_cookie(cookies: str) -> str:
-    """Извлечение токена из Cookie header"""
-    if not cookies:
-        return ''
-    
-    for cookie in cookies.split(';'):
-        cookie = cookie.strip()
-        if cookie.startswith('auth_token='):
-            return cookie.split('=', 1)[1]
-    return ''
-
-def extract_token(headers: dict) -> str:
-    """Извлечение токена из Authorization header или Cookie"""
-    auth_header = headers.get('Authorization', '') or headers.get('authorization', '') or \
-                  headers.get('X-Authorization', '') or headers.get('x-authorization', '')
-    if auth_header.startswith('Bearer '):
-        return auth_header[7:]
-    cookies = headers.get('Cookie', '') or headers.get('cookie', '') or \
-              headers.get('X-Cookie', '') or headers.get('x-cookie', '')
-    return extract_token_from_cookie(cookies)
-
-def get_cors_headers(origin=None):
-    """Возвращает CORS headers с правильным Origin"""
-    allowed_origin = origin if origin and (origin.endswith('.poehali.dev') or origin.startswith('http://localhost')) else 'https://app.poehali.dev'
-    return {
-        'Access-Control-Allow-Origin': allowed_origin,
-        'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-        'Access-Control-Allow-Headers': 'Content-Type, Authorization, X-Authorization, Cookie, X-Cookie',
-        'Access-Control-Allow-Credentials': 'true',
-        'Access-Control-Max-Age': '86400',
-        'Content-Type': 'application/json'
-    }
+    return get_hasher().hash(password)
 
+@flush_logs_after
 def handler(event: dict, context) -> dict:
     """API для управления пользователями (только для admin и manager)"""
     method = event.get('httpMethod', 'GET')
     headers = event.get('headers', {})
-    origin = headers.get('Origin') or headers.get('origin')
+    origin = get_origin(headers)
     
     if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': get_cors_headers(origin),
-            'body': '',
-            'isBase64Encoded': False
-        }
+        return options_response(origin)
     
     token = extract_token(headers)
     
@@ -77,13 +46,13 @@ def handler(event: dict, context) -> dict:
         
         if resource == 'logs':
             # Работа с логами активности
-            request_context = event.get('requestContext', {})
-            identity = request_context.get('identity', {})
-            client_ip = identity.get('sourceIp', '0.0.0.0')
+            client_ip = get_client_ip(event)
             
             if method == 'GET':
                 if current_user['role'] not in ['admin', 'manager']:
                     return error_response(403, 'Access denied. Admin or Manager role required.', origin)
+                if params.get('view') == 'facets':
+                    return get_log_facets(event, origin)
                 return get_logs(event, current_user, origin)
             elif method == 'POST':
                 return create_log(event, current_user, client_ip, origin)
@@ -99,6 +68,8 @@ def handler(event: dict, context) -> dict:
                 return error_response(403, 'Access denied. Admin or Manager role required.', origin)
             
             if method == 'GET':
+                if params.get('view') == 'counts':
+                    return get_user_counts(origin)
                 return get_users(event, current_user, origin)
             elif method == 'POST':
                 return update_user(event, current_user, origin)
@@ -112,67 +83,77 @@ def handler(event: dict, context) -> dict:
         traceback.print_exc()
         return error_response(500, str(e), origin)
 
-def get_db_connection():
-    """Создание подключения к БД"""
-    dsn = os.environ.get('DATABASE_URL')
-    return psycopg2.connect(dsn, cursor_factory=RealDictCursor)
-
-def verify_token(token: str):
-    """Проверка токена и получение данных пользователя"""
-    if not token:
-        return None
-    
-    conn = get_db_connection()
-    cur = conn.cursor()
-    
-    try:
-        token_hash = hashlib.sha256(token.encode()).hexdigest()
-        
-        cur.execute(
-            """SELECT u.id, u.email, u.full_name, u.role, u.is_active
-               FROM users u
-               JOIN sessions s ON u.id = s.user_id
-               WHERE s.token_hash = %s AND s.expires_at > NOW()""",
-            (token_hash,)
-        )
-        user = cur.fetchone()
-        return dict(user) if user else None
-    except Exception as e:
-        print(f"ERROR verify_token: {str(e)}")
-        return None
-    finally:
-        cur.close()
-        conn.close()
-
 def get_users(event: dict, current_user: dict, origin=None):
-    """Получить список пользователей с фильтрацией"""
+    """Получить список пользователей с фильтрацией по статусу, роли и префиксу q.
+    С limit или cursor — страница с next_cursor, иначе — весь список."""
     params = event.get('queryStringParameters') or {}
     status = params.get('status', 'all')
+    role = params.get('role', '').strip()
+    search = params.get('q', '').strip()
+    paged = bool(params.get('limit') or params.get('cursor'))
+    
+    # Активных показываем по user_id, остальных — новыми вперёд
+    sort_by = params.get('sort_by') or ('user_id' if status == 'active' else 'created_at')
+    if sort_by not in ['created_at', 'user_id']:
+        sort_by = 'created_at'
+    sort_order = 'ASC' if sort_by == 'user_id' else 'DESC'
+    
+    conditions = []
+    query_params = []
+    
+    if status == 'pending':
+        conditions.append("is_active = false")
+    elif status == 'active':
+        conditions.append("is_active = true")
+    
+    if role:
+        if role not in ROLES:
+            return error_response(400, f'Invalid role. Allowed: {", ".join(ROLES)}', origin)
+        conditions.append("role = %s")
+        query_params.append(role)
+    
+    # Поиск по началу имени, email или ID — обслуживается индексами text_pattern_ops (V0029)
+    if search:
+        prefix = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        conditions.append("(lower(full_name) LIKE %s OR lower(email) LIKE %s OR user_id LIKE %s)")
+        query_params.extend([prefix.lower(), prefix.lower(), prefix])
+    
+    limit = None
+    try:
+        if paged:
+            limit = parse_limit(params.get('limit'), USERS_PAGE_SIZE, USERS_PAGE_SIZE_MAX)
+            if params.get('cursor'):
+                condition, values = keyset_condition(sort_by, sort_order, params['cursor'])
+                conditions.append(condition)
+                query_params.extend(values)
+    except ValueError as e:
+        return error_response(400, str(e), origin)
+    
+    query = "SELECT id, user_id, email, full_name, role, is_active, created_at FROM users"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += f" ORDER BY {sort_by} {sort_order}, id {sort_order}"
+    if limit is not None:
+        query += " LIMIT %s"
+        query_params.append(limit + 1)
     
     conn = get_db_connection()
     cur = conn.cursor()
     
     try:
-        if status == 'pending':
-            query = """SELECT id, user_id, email, full_name, role, is_active, created_at
-                   FROM users WHERE is_active = false ORDER BY created_at DESC"""
-        elif status == 'active':
-            query = """SELECT id, user_id, email, full_name, role, is_active, created_at
-                   FROM users WHERE is_active = true ORDER BY user_id"""
-        else:
-            query = """SELECT id, user_id, email, full_name, role, is_active, created_at
-                   FROM users ORDER BY created_at DESC"""
+        cur.execute(query, query_params)
+        users = [dict(u) for u in cur.fetchall()]
         
-        cur.execute(query)
-        users = cur.fetchall()
+        if paged:
+            users, next_cursor = page_result(users, limit, sort_by)
+            data = {'users': users, 'next_cursor': next_cursor}
+        else:
+            data = {'users': users, 'total': len(users)}
         
         return {
             'statusCode': 200,
-            'headers': get_cors_headers(origin),
-            'body': json.dumps({
-                'users': [dict(u) for u in users],
-                'total': len(users)
-            }, default=str),
+            'headers': get_security_headers(origin),
+            'body': json.dumps(data, default=str),
             'isBase64Encoded': False
         }
     except Exception as e:
@@ -180,7 +161,33 @@ def get_users(event: dict, current_user: dict, origin=None):
         return error_response(500, str(e), origin)
     finally:
         cur.close()
-        conn.close()
+        release_connection(conn)
+
+def get_user_counts(origin=None):
+    """Число пользователей: всего, активных, ожидающих и по ролям — одним агрегатом"""
+    role_counts = ", ".join(f"COUNT(*) FILTER (WHERE role = '{role}') AS role_{role}" for role in ROLES)
+    
+    conn = get_db_connection()
+    cur = conn.cursor()
+    
+    try:
+        cur.execute(
+            f"""SELECT COUNT(*) AS total,
+                       COUNT(*) FILTER (WHERE is_active = true) AS active,
+                       COUNT(*) FILTER (WHERE is_active = false) AS pending,
+                       {role_counts}
+                FROM users"""
+        )
+        row = cur.fetchone()
+        return success_response({
+            'total': row['total'],
+            'active': row['active'],
+            'pending': row['pending'],
+            'by_role': {role: row[f'role_{role}'] for role in ROLES}
+        }, origin)
+    finally:
+        cur.close()
+        release_connection(conn)
 
 def update_user(event: dict, current_user: dict, origin=None):
     """Обновление пользователя (активация, блокировка, изменение данных)"""
@@ -188,6 +195,9 @@ def update_user(event: dict, current_user: dict, origin=None):
     action = body.get('action')
     user_id = body.get('user_id')
     
+    if action == 'bulk':
+        return bulk_update_users(event, body, current_user, origin)
+    
     if not user_id or not isinstance(user_id, int):
         return error_response(400, 'Valid user_id is required', origin)
     
@@ -202,9 +212,9 @@ def update_user(event: dict, current_user: dict, origin=None):
             
             cur.execute("UPDATE users SET is_active = true WHERE id = %s", (user_id,))
             conn.commit()
+            invalidate_user(user_id)
             
-            request_context = event.get('requestContext', {})
-            client_ip = request_context.get('identity', {}).get('sourceIp', '0.0.0.0')
+            client_ip = get_client_ip(event)
             write_log(current_user['id'], current_user['full_name'], 'USER', 
                       f'Подтверждён пользователь {target_name}', 'user', user_id, client_ip)
             
@@ -219,12 +229,12 @@ def update_user(event: dict, current_user: dict, origin=None):
             target_name = target['full_name'] if target else 'Unknown'
             
             cur.execute("UPDATE users SET is_active = false WHERE id = %s", (user_id,))
+            revoke_user_tokens(cur, user_id)
+            # Блокировка фиксируется в журнале в той же транзакции
+            write_log_tx(cur, current_user['id'], current_user['full_name'], 'USER', 
+                         f'Заблокирован пользователь {target_name}', 'user', user_id, get_client_ip(event))
             conn.commit()
-            
-            request_context = event.get('requestContext', {})
-            client_ip = request_context.get('identity', {}).get('sourceIp', '0.0.0.0')
-            write_log(current_user['id'], current_user['full_name'], 'USER', 
-                      f'Заблокирован пользователь {target_name}', 'user', user_id, client_ip)
+            invalidate_user(user_id)
             
             return success_response({'message': 'User deactivated successfully'}, origin)
         
@@ -293,7 +303,9 @@ def update_user(event: dict, current_user: dict, origin=None):
                 params.append(user_id)
                 query = f"UPDATE users SET {', '.join(updates)} WHERE id = %s"
                 cur.execute(query, params)
-                conn.commit()
+                # Подписанные токены содержат роль, имя и ID — выданные ранее отзываются;
+                # отзыв сбрасывает и кеш сессий в других контейнерах
+                revoke_user_tokens(cur, user_id)
                 
                 changed_fields = []
                 if 'full_name' in body: changed_fields.append('имя')
@@ -302,11 +314,12 @@ def update_user(event: dict, current_user: dict, origin=None):
                 if 'new_user_id' in body: changed_fields.append('ID')
                 if 'password' in body: changed_fields.append('пароль')
                 
-                request_context = event.get('requestContext', {})
-                client_ip = request_context.get('identity', {}).get('sourceIp', '0.0.0.0')
-                write_log(current_user['id'], current_user['full_name'], 'USER', 
-                          f'Обновлены данные пользователя {target_name} ({", ".join(changed_fields)})', 
-                          'user', user_id, client_ip)
+                # Смена роли, email или пароля фиксируется в журнале в той же транзакции
+                write_log_tx(cur, current_user['id'], current_user['full_name'], 'USER', 
+                             f'Обновлены данные пользователя {target_name} ({", ".join(changed_fields)})', 
+                             'user', user_id, get_client_ip(event))
+                conn.commit()
+                invalidate_user(user_id)
                 
                 return success_response({'message': 'User updated successfully'}, origin)
             else:
@@ -315,12 +328,88 @@ def update_user(event: dict, current_user: dict, origin=None):
         else:
             return error_response(400, 'Invalid action', origin)
     
+    except HasherBusyError:
+        return error_response(503, 'Server is busy. Try again later.', origin)
     except Exception as e:
         print(f"ERROR update_user: {str(e)}")
         return error_response(500, str(e), origin)
     finally:
         cur.close()
-        conn.close()
+        release_connection(conn)
+
+def bulk_update_users(event: dict, body: dict, current_user: dict, origin=None):
+    """Массовая активация, блокировка или смена роли: один UPDATE ... RETURNING,
+    журнал одним INSERT и отзыв токенов одним INSERT в той же транзакции"""
+    op = body.get('op')
+    user_ids = body.get('user_ids')
+    
+    if not isinstance(user_ids, list) or not user_ids:
+        return error_response(400, 'user_ids must be a non-empty list', origin)
+    if len(user_ids) > BULK_MAX_USERS:
+        return error_response(400, f'At most {BULK_MAX_USERS} users per request', origin)
+    if not all(isinstance(i, int) and not isinstance(i, bool) for i in user_ids):
+        return error_response(400, 'user_ids must contain integers', origin)
+    user_ids = list(dict.fromkeys(user_ids))
+    
+    # Строки, которые уже в нужном состоянии, не обновляются и не попадают в журнал
+    if op == 'activate':
+        query = """UPDATE users SET is_active = true
+                   WHERE id = ANY(%s) AND is_active = false
+                   RETURNING id, full_name"""
+        query_params = (user_ids,)
+        describe = 'Подтверждён пользователь {}'
+    elif op == 'deactivate':
+        if current_user['id'] in user_ids:
+            return error_response(403, 'You cannot deactivate yourself', origin)
+        query = """UPDATE users SET is_active = false
+                   WHERE id = ANY(%s) AND is_active = true
+                   RETURNING id, full_name"""
+        query_params = (user_ids,)
+        describe = 'Заблокирован пользователь {}'
+    elif op == 'role':
+        try:
+            new_role = validate_role(body.get('role'))
+        except ValueError as e:
+            return error_response(400, str(e), origin)
+        if current_user['role'] == 'manager' and new_role == 'manager':
+            return error_response(403, 'Managers cannot assign Manager role', origin)
+        query = """UPDATE users SET role = %s, updated_at = NOW()
+                   WHERE id = ANY(%s) AND role IS DISTINCT FROM %s
+                   RETURNING id, full_name"""
+        query_params = (new_role, user_ids, new_role)
+        describe = 'Обновлены данные пользователя {} (роль → ' + new_role + ')'
+    else:
+        return error_response(400, 'Invalid op. Allowed: activate, deactivate, role', origin)
+    
+    conn = get_db_connection()
+    cur = conn.cursor()
+    
+    try:
+        cur.execute(query, query_params)
+        updated = cur.fetchall()
+        updated_ids = [row['id'] for row in updated]
+        
+        if updated_ids:
+            # Подписанные токены содержат роль и статус — выданные ранее отзываются;
+            # отзыв сбрасывает и кеш сессий в других контейнерах
+            if op != 'activate':
+                revoke_users_tokens(cur, updated_ids)
+            client_ip = get_client_ip(event)
+            insert_logs(cur, [
+                (current_user['id'], current_user['full_name'], 'USER',
+                 describe.format(row['full_name']), 'user', row['id'], client_ip)
+                for row in updated
+            ])
+        conn.commit()
+        invalidate_users(updated_ids)
+        
+        return success_response({'updated': len(updated_ids), 'user_ids': updated_ids}, origin)
+    except Exception as e:
+        print(f"ERROR bulk_update_users: {str(e)}")
+        return error_response(500, str(e), origin)
+    finally:
+        cur.close()
+        release_connection(conn)
 
 def delete_user(event: dict, current_user: dict, origin=None):
     """Удаление пользователя (для admin и manager)"""
@@ -349,14 +438,13 @@ def delete_user(event: dict, current_user: dict, origin=None):
         target = cur.fetchone()
         target_name = target['full_name'] if target else 'Unknown'
         
+        revoke_user_tokens(cur, user_id)
         cur.execute("DELETE FROM sessions WHERE user_id = %s", (user_id,))
         cur.execute("DELETE FROM users WHERE id = %s", (user_id,))
+        write_log_tx(cur, current_user['id'], current_user['full_name'], 'USER', 
+                     f'Удалён аккаунт пользователя {target_name}', 'user', user_id, get_client_ip(event))
         conn.commit()
-        
-        request_context = event.get('requestContext', {})
-        client_ip = request_context.get('identity', {}).get('sourceIp', '0.0.0.0')
-        write_log(current_user['id'], current_user['full_name'], 'USER', 
-                  f'Удалён аккаунт пользователя {target_name}', 'user', user_id, client_ip)
+        invalidate_user(user_id)
         
         return success_response({'message': 'User deleted successfully'}, origin)
     except Exception as e:
@@ -364,72 +452,28 @@ def delete_user(event: dict, current_user: dict, origin=None):
         return error_response(500, str(e), origin)
     finally:
         cur.close()
-        conn.close()
-
-def error_response(status_code: int, message: str, origin=None):
-    """Формирование ответа с ошибкой"""
-    return {
-        'statusCode': status_code,
-        'headers': get_cors_headers(origin),
-        'body': json.dumps({'error': message}),
-        'isBase64Encoded': False
-    }
-
-def success_response(data: dict, origin=None):
-    """Формирование успешного ответа"""
-    return {
-        'statusCode': 200,
-        'headers': get_cors_headers(origin),
-        'body': json.dumps(data),
-        'isBase64Encoded': False
-    }
-
-def write_log(user_id, user_name, action_type, action_description, target_type=None, target_id=None, ip_address='0.0.0.0'):
-    """Записать лог активности в БД"""
-    conn = get_db_connection()
-    cur = conn.cursor()
-    try:
-        cur.execute(
-            """INSERT INTO t_p77465986_police_portal_creati.activity_logs 
-               (user_id, user_name, action_type, action_description, target_type, target_id, ip_address)
-               VALUES (%s, %s, %s, %s, %s, %s, %s)""",
-            (user_id, user_name, action_type, action_description, target_type, target_id, ip_address)
-        )
-        conn.commit()
-    except Exception as e:
-        print(f"ERROR write_log: {str(e)}")
-    finally:
-        cur.close()
-        conn.close()
-
-def cleanup_old_logs():
-    """Удалить логи старше 72 часов"""
-    conn = get_db_connection()
-    cur = conn.cursor()
-    try:
-        cur.execute(
-            "DELETE FROM t_p77465986_police_portal_creati.activity_logs WHERE created_at < NOW() - INTERVAL '72 hours'"
-        )
-        deleted = cur.rowcount
-        conn.commit()
-        if deleted > 0:
-            print(f"Cleanup: deleted {deleted} old logs")
-    except Exception as e:
-        print(f"ERROR cleanup_old_logs: {str(e)}")
-    finally:
-        cur.close()
-        conn.close()
+        release_connection(conn)
 
 def get_logs(event: dict, current_user: dict, origin=None):
-    """Получить логи активности с фильтрацией и поиском"""
-    cleanup_old_logs()
-    
+    """Получить логи активности с фильтрацией, поиском и keyset-пагинацией"""
     params = event.get('queryStringParameters') or {}
     search = params.get('search', '').strip()
     action_type = params.get('action_type', '').strip()
     user_filter = params.get('user', '').strip()
     sort_by = params.get('sort_by', 'created_at')
     sort_order = params.get('sort_order', 'DESC')
+    cursor = params.get('cursor', '').strip()
+    
+    try:
+        limit = parse_limit(params.get('limit'), LOGS_PAGE_SIZE, LOGS_PAGE_SIZE_MAX)
+    except ValueError as e:
+        return error_response(400, str(e), origin)
+    
+    allowed_sorts = ['created_at', 'user_name', 'action_type']
+    if sort_by not in allowed_sorts:
+        sort_by = 'created_at'
+    if sort_order not in ['ASC', 'DESC']:
+        sort_order = 'DESC'
     
     conn = get_db_connection()
     cur = conn.cursor()
@@ -443,6 +487,7 @@ def get_logs(event: dict, current_user: dict, origin=None):
         """
         query_params = []
         
+        # ILIKE по подстроке обслуживается триграммными GIN-индексами (V0017)
         if search:
             query += " AND (action_description ILIKE %s OR user_name ILIKE %s)"
             query_params.extend([f'%{search}%', f'%{search}%'])
@@ -455,37 +500,74 @@ def get_logs(event: dict, current_user: dict, origin=None):
             query += " AND user_name ILIKE %s"
             query_params.append(f'%{user_filter}%')
         
-        allowed_sorts = ['created_at', 'user_name', 'action_type']
-        if sort_by not in allowed_sorts:
-            sort_by = 'created_at'
-        if sort_order not in ['ASC', 'DESC']:
-            sort_order = 'DESC'
+        total = estimate_count(cur, query, query_params)
         
-        query += f" ORDER BY {sort_by} {sort_order} LIMIT 500"
+        page_query = query
+        page_params = list(query_params)
+        if cursor:
+            try:
+                condition, condition_params = keyset_condition(sort_by, sort_order, cursor)
+            except ValueError as e:
+                return error_response(400, str(e), origin)
+            page_query += " AND " + condition
+            page_params.extend(condition_params)
         
-        cur.execute(query, query_params)
-        logs = cur.fetchall()
+        page_query += f" ORDER BY {sort_by} {sort_order}, id {sort_order} LIMIT %s"
+        page_params.append(limit + 1)
+        
+        cur.execute(page_query, page_params)
+        logs, next_cursor = page_result(cur.fetchall(), limit, sort_by)
         
         cur.execute("""
             SELECT DISTINCT action_type 
-            FROM t_p77465986_police_portal_creati.activity_logs
+            FROM t_p77465986_police_portal_creati.activity_log_facets
             ORDER BY action_type
         """)
         action_types = [row['action_type'] for row in cur.fetchall()]
         
         return {
             'statusCode': 200,
-            'headers': get_cors_headers(origin),
+            'headers': get_security_headers(origin),
             'body': json.dumps({
                 'logs': [dict(log) for log in logs],
                 'action_types': action_types,
-                'total': len(logs)
+                'total': total,
+                'total_is_estimate': True,
+                'next_cursor': next_cursor
             }, default=str),
             'isBase64Encoded': False
         }
     finally:
         cur.close()
-        conn.close()
+        release_connection(conn)
+
+def get_log_facets(event: dict, origin=None):
+    """Значения фильтров журнала со счётчиками (поддерживаются триггерами, V0018)"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    
+    try:
+        cur.execute("""
+            SELECT action_type, SUM(entries)::bigint AS count
+            FROM t_p77465986_police_portal_creati.activity_log_facets
+            GROUP BY action_type
+            ORDER BY action_type
+        """)
+        action_types = [dict(row) for row in cur.fetchall()]
+        
+        cur.execute("""
+            SELECT user_id, MAX(user_name) AS user_name, SUM(entries)::bigint AS count
+            FROM t_p77465986_police_portal_creati.activity_log_facets
+            GROUP BY user_id
+            ORDER BY count DESC, user_id
+        """)
+        users = [dict(row) for row in cur.fetchall()]
+        
+        return etag_response({'action_types': action_types, 'users': users},
+                             event.get('headers') or {}, origin)
+    finally:
+        cur.close()
+        release_connection(conn)
 
 def create_log(event: dict, current_user: dict, client_ip: str, origin=None):
     """Создать запись в логе"""
@@ -515,7 +597,7 @@ def create_log(event: dict, current_user: dict, client_ip: str, origin=None):
         
         return {
             'statusCode': 201,
-            'headers': get_cors_headers(origin),
+            'headers': get_security_headers(origin),
             'body': json.dumps({
                 'id': result['id'],
                 'created_at': result['created_at'].isoformat()
@@ -524,7 +606,7 @@ def create_log(event: dict, current_user: dict, client_ip: str, origin=None):
         }
     finally:
         cur.close()
-        conn.close()
+        release_connection(conn)
 
 def delete_logs(event: dict, current_user: dict, origin=None):
     """Удалить логи (только для admin и manager)"""
@@ -540,7 +622,9 @@ def delete_logs(event: dict, current_user: dict, origin=None):
             cur.execute("SELECT COUNT(*) as count FROM t_p77465986_police_portal_creati.activity_logs")
             count_before = cur.fetchone()['count']
             
-            cur.execute("TRUNCATE TABLE t_p77465986_police_portal_creati.activity_logs RESTART IDENTITY")
+            # TRUNCATE не вызывает DELETE-триггеры, поэтому фасеты очищаются явно
+            cur.execute("""TRUNCATE TABLE t_p77465986_police_portal_creati.activity_logs,
+                                          t_p77465986_police_portal_creati.activity_log_facets RESTART IDENTITY""")
             conn.commit()
             
             cur.execute(
@@ -554,7 +638,7 @@ def delete_logs(event: dict, current_user: dict, origin=None):
             
             return {
                 'statusCode': 200,
-                'headers': get_cors_headers(origin),
+                'headers': get_security_headers(origin),
                 'body': json.dumps({'message': f'Deleted {count_before} logs', 'deleted': count_before}),
                 'isBase64Encoded': False
             }
@@ -577,7 +661,7 @@ def delete_logs(event: dict, current_user: dict, origin=None):
             
             return {
                 'statusCode': 200,
-                'headers': get_cors_headers(origin),
+                'headers': get_security_headers(origin),
                 'body': json.dumps({'message': 'Log deleted'}),
                 'isBase64Encoded': False
             }
@@ -587,4 +671,4 @@ def delete_logs(event: dict, current_user: dict, origin=None):
     
     finally:
         cur.close()
-        conn.close()
\ No newline at end of file
+        release_connection(conn)
@@ -0,0 +1,89 @@
+"""
+Сервис хеширования паролей.
+bcrypt выполняется в ограниченном пуле потоков (bcrypt отпускает GIL),
+при переполнении очереди запрос сразу отклоняется, а не копится.
+bcrypt импортируется при первом хешировании, а не при загрузке модуля.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))  # Стоимость bcrypt
+WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '4'))  # Потоков в пуле
+MAX_QUEUE = int(os.environ.get('PASSWORD_HASH_MAX_QUEUE', '16'))  # Сколько задач может ждать
+TIMEOUT_SECONDS = float(os.environ.get('PASSWORD_HASH_TIMEOUT_SECONDS', '10'))
+
+class HasherBusyError(Exception):
+    """Очередь хеширования переполнена — клиенту нужно повторить позже"""
+
+class BcryptHasher:
+    """Хеширование и проверка паролей через bcrypt"""
+
+    def __init__(self, rounds: int = BCRYPT_ROUNDS):
+        self.rounds = rounds
+
+    def hash(self, password: str) -> str:
+        import bcrypt
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+    def verify(self, password: str, stored_hash: str) -> bool:
+        import bcrypt
+        return bcrypt.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8'))
+
+    def needs_rehash(self, stored_hash: str) -> bool:
+        """Стоимость сохранённого хеша отличается от настроенной"""
+        # Формат bcrypt: $2b$12$<salt+hash>
+        parts = stored_hash.split('$')
+        if len(parts) < 4 or not parts[2].isdigit():
+            return False
+        return int(parts[2]) != self.rounds
+
+class PooledHasher:
+    """Обёртка, выполняющая хеширование в ограниченном пуле потоков"""
+
+    def __init__(self, hasher, workers: int = WORKERS, max_queue: int = MAX_QUEUE):
+        self.hasher = hasher
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            print("SECURITY: password hasher queue is full, rejecting request")
+            raise HasherBusyError('Password hasher is busy')
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=TIMEOUT_SECONDS)
+        except FutureTimeoutError:
+            # Не дождались очереди — это перегрузка, а не неверный пароль
+            print("SECURITY: password hasher timed out, rejecting request")
+            raise HasherBusyError('Password hasher timed out')
+
+    def hash(self, password: str) -> str:
+        return self._run(self.hasher.hash, password)
+
+    def verify(self, password: str, stored_hash: str) -> bool:
+        return self._run(self.hasher.verify, password, stored_hash)
+
+    def needs_rehash(self, stored_hash: str) -> bool:
+        return self.hasher.needs_rehash(stored_hash)
+
+_hasher = None
+
+def get_hasher():
+    """Хешер процесса (создаётся при первом обращении)"""
+    global _hasher
+    if _hasher is None:
+        _hasher = PooledHasher(BcryptHasher())
+    return _hasher
+
+def set_hasher(hasher):
+    """Подменить хешер (любой объект с hash/verify/needs_rehash)"""
+    global _hasher
+    _hasher = hasher
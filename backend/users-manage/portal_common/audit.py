@@ -0,0 +1,84 @@
+"""
+Журнал действий пользователей (activity_logs).
+Записи копятся в памяти и пишутся пачкой одним многострочным INSERT:
+при заполнении пачки, по истечении интервала и в конце вызова функции
+(декоратор flush_logs_after). Если лог обязан попасть в БД вместе
+с изменением данных, используется write_log_tx в той же транзакции.
+"""
+
+import os
+import time
+import atexit
+import threading
+from functools import wraps
+from portal_common.db import get_db_connection, release_connection
+
+BATCH_SIZE = int(os.environ.get('AUDIT_LOG_BATCH_SIZE', '50'))  # Размер пачки
+FLUSH_SECONDS = float(os.environ.get('AUDIT_LOG_FLUSH_SECONDS', '5'))  # Максимальный возраст записи в буфере
+
+_INSERT_SQL = """INSERT INTO t_p77465986_police_portal_creati.activity_logs
+               (user_id, user_name, action_type, action_description, target_type, target_id, ip_address)
+               VALUES %s"""
+
+# Буфер записей: [(user_id, user_name, action_type, action_description, target_type, target_id, ip_address), ...]
+_buffer = []
+_buffer_started = None
+_lock = threading.Lock()
+
+def insert_logs(cur, records: list):
+    """Вставить записи одним многострочным INSERT через переданный курсор"""
+    if not records:
+        return
+    from psycopg2.extras import execute_values
+    execute_values(cur, _INSERT_SQL, records, page_size=max(len(records), 1))
+
+def write_log(user_id, user_name, action_type, action_description, target_type=None, target_id=None, ip_address='0.0.0.0'):
+    """Поставить лог активности в очередь на запись"""
+    global _buffer_started
+    record = (user_id, user_name, action_type, action_description, target_type, target_id, ip_address)
+    now = time.monotonic()
+    with _lock:
+        if not _buffer:
+            _buffer_started = now
+        _buffer.append(record)
+        should_flush = len(_buffer) >= BATCH_SIZE or now - _buffer_started >= FLUSH_SECONDS
+    if should_flush:
+        flush_logs()
+
+def write_log_tx(cur, user_id, user_name, action_type, action_description, target_type=None, target_id=None, ip_address='0.0.0.0'):
+    """Записать лог в текущей транзакции (фиксируется вместе с изменением данных)"""
+    insert_logs(cur, [(user_id, user_name, action_type, action_description, target_type, target_id, ip_address)])
+
+def flush_logs():
+    """Записать накопленные логи в БД"""
+    global _buffer
+    with _lock:
+        records, _buffer = _buffer, []
+    if not records:
+        return
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        insert_logs(cur, records)
+        conn.commit()
+    except Exception as e:
+        print(f"ERROR write_log: {str(e)} ({len(records)} records lost)")
+    finally:
+        cur.close()
+        release_connection(conn)
+
+def flush_logs_after(handler):
+    """Декоратор handler: сбросить буфер логов в конце каждого вызова"""
+    @wraps(handler)
+    def wrapper(event, context):
+        try:
+            return handler(event, context)
+        finally:
+            try:
+                flush_logs()
+            except Exception as e:
+                print(f"ERROR flush_logs: {str(e)}")
+    return wrapper
+
+atexit.register(flush_logs)
@@ -0,0 +1,114 @@
+"""
+События изменений для доставки клиентам без опроса полных списков.
+publish_event пишет событие в portal_events в той же транзакции, что и изменение:
+событие видно только после commit.
+Публикация сериализована advisory-блокировкой до конца транзакции: id событий
+фиксируются по возрастанию, и клиент с курсором N не пропустит событие
+с меньшим id, зафиксированное позже (как версии экипажей в V0023).
+
+wait_for_events — long-poll без удержания подключения: короткие выборки
+по первичному ключу раз в EVENTS_POLL_SECONDS, подключение между ними
+возвращается в пул. Ждущих запросов в контейнере не больше EVENTS_MAX_WAITERS,
+остальные получают ответ сразу.
+"""
+
+import os
+import json
+import math
+import time
+import threading
+from portal_common.db import get_db_connection, release_connection
+from portal_common.http import error_response, success_response
+
+LOCK_KEY = 't_p77465986_police_portal_creati.portal_events'
+TOPICS = ('crews', 'bolo')
+
+MAX_WAIT_SECONDS = float(os.environ.get('EVENTS_MAX_WAIT_SECONDS', '25'))  # Меньше таймаута функции
+POLL_SECONDS = float(os.environ.get('EVENTS_POLL_SECONDS', '1'))  # Пауза между выборками
+MAX_WAITERS = int(os.environ.get('EVENTS_MAX_WAITERS', '20'))  # Ждущих запросов на контейнер
+EVENTS_LIMIT = 100
+
+_waiters = threading.BoundedSemaphore(max(MAX_WAITERS, 1))
+
+def publish_event(cur, topic: str, action: str, data: dict):
+    """Записать событие (фиксируется вместе с изменением)"""
+    cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (LOCK_KEY,))
+    cur.execute(
+        """INSERT INTO t_p77465986_police_portal_creati.portal_events (topic, action, data)
+           VALUES (%s, %s, %s)""",
+        (topic, action, json.dumps(data, default=str))
+    )
+
+def last_event_id(cur) -> int:
+    """Id последнего события — начальный курсор клиента"""
+    cur.execute("SELECT COALESCE(MAX(id), 0) AS id FROM t_p77465986_police_portal_creati.portal_events")
+    return cur.fetchone()['id']
+
+def fetch_events(cur, after: int, topics, limit: int):
+    """События новее after по выбранным темам"""
+    cur.execute(
+        """SELECT id, topic, action, data, created_at
+           FROM t_p77465986_police_portal_creati.portal_events
+           WHERE id > %s AND topic = ANY(%s)
+           ORDER BY id
+           LIMIT %s""",
+        (after, list(topics), limit)
+    )
+    return [dict(row) for row in cur.fetchall()]
+
+def _fetch_once(after: int, topics, limit: int):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        events = fetch_events(cur, after, topics, limit)
+        conn.commit()
+        return events
+    finally:
+        cur.close()
+        release_connection(conn)
+
+def wait_for_events(after: int, topics, timeout: float, limit: int = EVENTS_LIMIT):
+    """Вернуть события новее after, дожидаясь их не дольше timeout секунд"""
+    if not _waiters.acquire(blocking=False):
+        # Лимит ждущих исчерпан — отвечаем без ожидания, клиент повторит запрос
+        return _fetch_once(after, topics, limit)
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            events = _fetch_once(after, topics, limit)
+            remaining = deadline - time.monotonic()
+            if events or remaining <= 0:
+                return events
+            time.sleep(min(POLL_SECONDS, remaining))
+    finally:
+        _waiters.release()
+
+def get_events(params: dict, origin=None):
+    """Ответ канала событий: события новее курсора after; без after — только текущий курсор.
+    Если событий нет, ответ ждёт их до wait секунд."""
+    topics = [t for t in (params.get('topics') or ','.join(TOPICS)).split(',') if t]
+    if not topics or any(t not in TOPICS for t in topics):
+        return error_response(400, f'Invalid topics. Allowed: {", ".join(TOPICS)}', origin)
+
+    try:
+        wait = min(max(float(params.get('wait') or MAX_WAIT_SECONDS), 0), MAX_WAIT_SECONDS)
+        after = int(params['after']) if params.get('after') not in (None, '') else None
+    except ValueError:
+        return error_response(400, 'Invalid wait or after', origin)
+    if not math.isfinite(wait):
+        return error_response(400, 'Invalid wait or after', origin)
+
+    if after is None:
+        conn = get_db_connection()
+        cur = conn.cursor()
+        try:
+            last_id = last_event_id(cur)
+            conn.commit()
+            return success_response({'events': [], 'last_id': last_id}, origin)
+        finally:
+            cur.close()
+            release_connection(conn)
+
+    events = wait_for_events(after, topics, wait)
+    last_id = events[-1]['id'] if events else after
+    return success_response({'events': events, 'last_id': last_id}, origin)
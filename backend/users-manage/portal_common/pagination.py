@@ -0,0 +1,52 @@
+"""
+Keyset-пагинация: страница продолжается с последней строки предыдущей,
+без OFFSET. Курсор — base64 от JSON [значение_сортировки, id].
+"""
+
+import json
+import base64
+
+def encode_cursor(sort_value, row_id) -> str:
+    """Курсор для продолжения после строки (sort_value, row_id)"""
+    raw = json.dumps([sort_value, row_id], default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str):
+    """(sort_value, row_id) из курсора; ValueError, если курсор испорчен"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return sort_value, int(row_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+def parse_limit(value, default: int, maximum: int) -> int:
+    """Размер страницы из параметра запроса"""
+    try:
+        limit = int(value) if value not in (None, '') else default
+    except (TypeError, ValueError):
+        raise ValueError('Invalid limit')
+    return max(1, min(limit, maximum))
+
+def keyset_condition(column: str, order: str, cursor: str, id_column: str = 'id'):
+    """SQL-условие '(column, id) после курсора' и его параметры"""
+    sort_value, row_id = decode_cursor(cursor)
+    op = '<' if order == 'DESC' else '>'
+    return f"({column}, {id_column}) {op} (%s, %s)", [sort_value, row_id]
+
+def page_result(rows: list, limit: int, column: str):
+    """Обрезать лишнюю строку (запрашивается limit + 1) и построить next_cursor"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last[column], last['id'])
+
+def estimate_count(cur, query: str, params) -> int:
+    """Оценка числа строк по плану запроса (без полного подсчёта)"""
+    cur.execute("EXPLAIN (FORMAT JSON) " + query, params)
+    plan = cur.fetchone()
+    plan = plan['QUERY PLAN'] if isinstance(plan, dict) else plan[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
@@ -0,0 +1,192 @@
+"""
+Подписанные токены сессий (SESSION_TOKEN_MODE=signed).
+Токен — 'v1.<payload>.<подпись>': данные пользователя и срок действия,
+подписанные HMAC-SHA256 ключом SESSION_SIGNING_KEY. Проверка не обращается к БД.
+
+Отзыв (выход, удаление, блокировка, смена роли) пишется в token_revocations:
+строка с jti отзывает один токен, строка без jti — все токены пользователя,
+выданные до revoked_at. Список кешируется в контейнере и дочитывается
+по новым id не чаще раза в REVOCATION_REFRESH_SECONDS.
+В режиме opaque отзыв пишется так же: по нему кеш сессий в других контейнерах
+узнаёт, что запись устарела (jti — начало хеша токена сессии).
+"""
+
+import os
+import hmac
+import json
+import time
+import base64
+import hashlib
+import secrets
+import threading
+from portal_common.db import get_db_connection, release_connection
+
+TOKEN_MODE = os.environ.get('SESSION_TOKEN_MODE', 'opaque')  # opaque | signed
+SIGNING_KEY = os.environ.get('SESSION_SIGNING_KEY', '')
+REFRESH_SECONDS = float(os.environ.get('REVOCATION_REFRESH_SECONDS', '5'))  # Задержка распространения отзыва
+SESSION_DAYS = 30  # Срок действия сессии и токена
+
+PREFIX = 'v1.'
+CLAIMS = ('id', 'user_id', 'email', 'full_name', 'role', 'is_active')
+
+# Кеш отзывов: {jti: истечение}, {user_id: (revoked_at, истечение)}
+_revoked_jtis = {}
+_revoked_users = {}
+_last_id = 0
+_next_refresh = 0.0
+_lock = threading.Lock()
+
+def signed_mode() -> bool:
+    """Выдавать подписанные токены"""
+    return TOKEN_MODE == 'signed' and bool(SIGNING_KEY)
+
+def is_signed(token: str) -> bool:
+    return token.startswith(PREFIX)
+
+def opaque_jti(token_hash: str) -> str:
+    """jti для отзыва непрозрачного токена (помещается в token_revocations.jti)"""
+    return token_hash[:32]
+
+def token_jti(token: str) -> str:
+    """jti, под которым отзывается токен (пишется в sessions.jti при выдаче)"""
+    if is_signed(token):
+        claims = decode_token(token)
+        if claims is not None:
+            return claims['jti']
+    return opaque_jti(hashlib.sha256(token.encode()).hexdigest())
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+def _sign(payload: str) -> str:
+    return _b64encode(hmac.new(SIGNING_KEY.encode(), payload.encode(), hashlib.sha256).digest())
+
+def issue_token(user: dict, expires_at: float) -> str:
+    """Подписанный токен для пользователя; expires_at — unix-время"""
+    claims = {name: user[name] for name in CLAIMS}
+    claims['iat'] = time.time()
+    claims['exp'] = int(expires_at)
+    claims['jti'] = secrets.token_urlsafe(12)
+    payload = _b64encode(json.dumps(claims, default=str, separators=(',', ':')).encode())
+    return PREFIX + payload + '.' + _sign(PREFIX + payload)
+
+def decode_token(token: str):
+    """Данные токена, если подпись верна и срок не истёк (без проверки отзыва)"""
+    if not SIGNING_KEY or not is_signed(token):
+        return None
+    try:
+        payload, signature = token[len(PREFIX):].split('.')
+        if not hmac.compare_digest(signature, _sign(PREFIX + payload)):
+            return None
+        claims = json.loads(_b64decode(payload))
+    except Exception:
+        return None
+    if claims.get('exp', 0) <= time.time():
+        return None
+    return claims
+
+def refresh_revocations(force: bool = False):
+    """Дочитать новые отзывы из БД (не чаще REFRESH_SECONDS)"""
+    global _last_id, _next_refresh
+    now = time.monotonic()
+    if not force and now < _next_refresh:
+        return
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """SELECT id, user_id, jti,
+                      EXTRACT(EPOCH FROM revoked_at::timestamptz) AS revoked_at,
+                      EXTRACT(EPOCH FROM expires_at::timestamptz) AS expires_at
+               FROM t_p77465986_police_portal_creati.token_revocations
+               WHERE id > %s AND expires_at > NOW()
+               ORDER BY id""",
+            (_last_id,)
+        )
+        rows = cur.fetchall()
+        conn.commit()
+    finally:
+        cur.close()
+        release_connection(conn)
+
+    wall = time.time()
+    with _lock:
+        for row in rows:
+            expires_at = float(row['expires_at'])
+            if row['jti']:
+                _revoked_jtis[row['jti']] = expires_at
+            else:
+                revoked_at = float(row['revoked_at'])
+                previous = _revoked_users.get(row['user_id'])
+                if previous is None or previous[0] < revoked_at:
+                    _revoked_users[row['user_id']] = (revoked_at, expires_at)
+            _last_id = max(_last_id, row['id'])
+        # Отзывы старше самих токенов больше не нужны
+        for jti in [j for j, exp in _revoked_jtis.items() if exp <= wall]:
+            del _revoked_jtis[jti]
+        for user_id in [u for u, (_, exp) in _revoked_users.items() if exp <= wall]:
+            del _revoked_users[user_id]
+        _next_refresh = now + REFRESH_SECONDS
+
+def mark_revocations_stale():
+    """Перечитать отзывы при следующей проверке (после отзыва в этом контейнере)"""
+    global _next_refresh
+    _next_refresh = 0.0
+
+def is_revoked(claims: dict) -> bool:
+    """Токен отозван (по jti или всеми токенами пользователя)"""
+    try:
+        refresh_revocations()
+    except Exception as e:
+        print(f"ERROR refresh_revocations: {str(e)}")
+    with _lock:
+        if claims.get('jti') in _revoked_jtis:
+            return True
+        revoked = _revoked_users.get(claims.get('id'))
+        return revoked is not None and claims.get('iat', 0) <= revoked[0]
+
+def verify_signed_token(token: str):
+    """Данные пользователя из подписанного токена или None"""
+    claims = decode_token(token)
+    if claims is None or is_revoked(claims):
+        return None
+    return {name: claims[name] for name in CLAIMS}
+
+def revoke_user_tokens(cur, user_id: int):
+    """Отозвать все выданные пользователю токены (в транзакции вызывающего)"""
+    revoke_users_tokens(cur, [user_id])
+
+def revoke_users_tokens(cur, user_ids: list):
+    """Отозвать токены нескольких пользователей одним INSERT"""
+    if not user_ids:
+        return
+    cur.execute(
+        """INSERT INTO t_p77465986_police_portal_creati.token_revocations (user_id, expires_at)
+           SELECT unnest(%s::int[]), NOW() + make_interval(days => %s)""",
+        (list(user_ids), SESSION_DAYS)
+    )
+
+def revoke_token(cur, token: str):
+    """Отозвать один токен (выход из системы); непрозрачный — до удаления его сессии"""
+    if not is_signed(token):
+        token_hash = hashlib.sha256(token.encode()).hexdigest()
+        cur.execute(
+            """INSERT INTO t_p77465986_police_portal_creati.token_revocations (user_id, jti, expires_at)
+               SELECT user_id, %s, expires_at
+               FROM t_p77465986_police_portal_creati.sessions
+               WHERE token_hash = %s""",
+            (opaque_jti(token_hash), token_hash)
+        )
+        return
+    claims = decode_token(token)
+    if claims is None:
+        return
+    cur.execute(
+        """INSERT INTO t_p77465986_police_portal_creati.token_revocations (user_id, jti, expires_at)
+           VALUES (%s, %s, TO_TIMESTAMP(%s))""",
+        (claims['id'], claims['jti'], claims['exp'])
+    )
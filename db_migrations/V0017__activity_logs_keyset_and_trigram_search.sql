@@ -0,0 +1,17 @@
+-- Keyset-пагинация логов по (created_at, id) и поиск по подстроке через триграммы
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_activity_logs_created_at_id
+    ON t_p77465986_police_portal_creati.activity_logs(created_at DESC, id DESC);
+
+-- Для сортировки по имени пользователя и типу действия
+CREATE INDEX IF NOT EXISTS idx_activity_logs_user_name_id
+    ON t_p77465986_police_portal_creati.activity_logs(user_name, id);
+CREATE INDEX IF NOT EXISTS idx_activity_logs_action_type_id
+    ON t_p77465986_police_portal_creati.activity_logs(action_type, id);
+
+-- ILIKE '%term%' по описанию и имени пользователя
+CREATE INDEX IF NOT EXISTS idx_activity_logs_description_trgm
+    ON t_p77465986_police_portal_creati.activity_logs USING gin (action_description gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_activity_logs_user_name_trgm
+    ON t_p77465986_police_portal_creati.activity_logs USING gin (user_name gin_trgm_ops);
@@ -0,0 +1,58 @@
+-- Значения фильтров журнала (типы действий и пользователи) со счётчиками.
+-- Поддерживаются триггерами уровня оператора, поэтому экрану логов
+-- не нужен SELECT DISTINCT по всей таблице activity_logs.
+CREATE TABLE IF NOT EXISTS t_p77465986_police_portal_creati.activity_log_facets (
+    action_type VARCHAR(50) NOT NULL,
+    user_id INTEGER NOT NULL,
+    user_name VARCHAR(100) NOT NULL,
+    entries BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (action_type, user_id)
+);
+
+INSERT INTO t_p77465986_police_portal_creati.activity_log_facets (action_type, user_id, user_name, entries)
+SELECT action_type, user_id, MAX(user_name), COUNT(*)
+FROM t_p77465986_police_portal_creati.activity_logs
+GROUP BY action_type, user_id
+ON CONFLICT (action_type, user_id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION t_p77465986_police_portal_creati.activity_log_facets_on_insert()
+RETURNS trigger AS $$
+BEGIN
+    INSERT INTO t_p77465986_police_portal_creati.activity_log_facets AS f (action_type, user_id, user_name, entries)
+    SELECT action_type, user_id, MAX(user_name), COUNT(*)
+    FROM new_rows
+    GROUP BY action_type, user_id
+    ON CONFLICT (action_type, user_id)
+    DO UPDATE SET entries = f.entries + EXCLUDED.entries, user_name = EXCLUDED.user_name;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION t_p77465986_police_portal_creati.activity_log_facets_on_delete()
+RETURNS trigger AS $$
+BEGIN
+    UPDATE t_p77465986_police_portal_creati.activity_log_facets AS f
+    SET entries = f.entries - d.entries
+    FROM (
+        SELECT action_type, user_id, COUNT(*) AS entries
+        FROM old_rows
+        GROUP BY action_type, user_id
+    ) d
+    WHERE f.action_type = d.action_type AND f.user_id = d.user_id;
+
+    DELETE FROM t_p77465986_police_portal_creati.activity_log_facets WHERE entries <= 0;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_activity_log_facets_insert ON t_p77465986_police_portal_creati.activity_logs;
+CREATE TRIGGER trg_activity_log_facets_insert
+    AFTER INSERT ON t_p77465986_police_portal_creati.activity_logs
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE PROCEDURE t_p77465986_police_portal_creati.activity_log_facets_on_insert();
+
+DROP TRIGGER IF EXISTS trg_activity_log_facets_delete ON t_p77465986_police_portal_creati.activity_logs;
+CREATE TRIGGER trg_activity_log_facets_delete
+    AFTER DELETE ON t_p77465986_police_portal_creati.activity_logs
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE PROCEDURE t_p77465986_police_portal_creati.activity_log_facets_on_delete();
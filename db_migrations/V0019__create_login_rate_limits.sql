@@ -0,0 +1,12 @@
+-- Общее для всех контейнеров хранилище rate limiter (RATE_LIMIT_BACKEND=postgres)
+CREATE TABLE IF NOT EXISTS t_p77465986_police_portal_creati.login_rate_limits (
+    key VARCHAR(320) PRIMARY KEY,
+    window_start TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    failures INTEGER NOT NULL DEFAULT 0,
+    blocked_until TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Для очистки неактивных ключей задачей обслуживания
+CREATE INDEX IF NOT EXISTS idx_login_rate_limits_updated_at
+    ON t_p77465986_police_portal_creati.login_rate_limits(updated_at);
@@ -0,0 +1,14 @@
+-- Отзыв подписанных токенов (SESSION_TOKEN_MODE=signed).
+-- jti задан — отозван один токен; jti пуст — все токены пользователя, выданные до revoked_at.
+-- Строки нужны только до expires_at: позже отозванные токены истекают сами.
+CREATE TABLE IF NOT EXISTS t_p77465986_police_portal_creati.token_revocations (
+    id BIGSERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    jti VARCHAR(32),
+    revoked_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL
+);
+
+-- Для очистки задачей обслуживания
+CREATE INDEX IF NOT EXISTS idx_token_revocations_expires_at
+    ON t_p77465986_police_portal_creati.token_revocations(expires_at);
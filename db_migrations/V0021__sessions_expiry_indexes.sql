@@ -0,0 +1,10 @@
+-- Проверка токена ищет по token_hash с условием expires_at > NOW():
+-- составной индекс покрывает оба столбца и заменяет idx_sessions_token
+CREATE INDEX IF NOT EXISTS idx_sessions_token_expires
+    ON t_p77465986_police_portal_creati.sessions(token_hash, expires_at);
+
+DROP INDEX IF EXISTS t_p77465986_police_portal_creati.idx_sessions_token;
+
+-- Для пакетной очистки истёкших сессий задачей обслуживания
+CREATE INDEX IF NOT EXISTS idx_sessions_expires_at
+    ON t_p77465986_police_portal_creati.sessions(expires_at);
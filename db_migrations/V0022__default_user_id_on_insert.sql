@@ -0,0 +1,16 @@
+-- 5-значный user_id проставляется при вставке (раньше — отдельным UPDATE после INSERT),
+-- чтобы регистрация укладывалась в один запрос
+CREATE OR REPLACE FUNCTION t_p77465986_police_portal_creati.users_default_user_id()
+RETURNS trigger AS $$
+BEGIN
+    IF NEW.user_id IS NULL THEN
+        NEW.user_id := LPAD(NEW.id::text, 5, '0');
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_users_default_user_id ON t_p77465986_police_portal_creati.users;
+CREATE TRIGGER trg_users_default_user_id
+    BEFORE INSERT ON t_p77465986_police_portal_creati.users
+    FOR EACH ROW EXECUTE PROCEDURE t_p77465986_police_portal_creati.users_default_user_id();
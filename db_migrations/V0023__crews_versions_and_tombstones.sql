@@ -0,0 +1,102 @@
+-- Версии экипажей для инкрементальной синхронизации (GET ?since=версия).
+-- Любое изменение экипажа, его состава или данных участника получает новую
+-- версию из общей последовательности; удалённые экипажи остаются в crew_tombstones.
+-- Выдача версий сериализована advisory-блокировкой до конца транзакции,
+-- поэтому версии фиксируются по возрастанию и клиент с курсором N не пропустит
+-- изменение с меньшей версией, зафиксированное позже.
+CREATE SEQUENCE IF NOT EXISTS t_p77465986_police_portal_creati.crews_version_seq;
+
+ALTER TABLE t_p77465986_police_portal_creati.crews ADD COLUMN IF NOT EXISTS version BIGINT;
+UPDATE t_p77465986_police_portal_creati.crews
+SET version = nextval('t_p77465986_police_portal_creati.crews_version_seq')
+WHERE version IS NULL;
+ALTER TABLE t_p77465986_police_portal_creati.crews ALTER COLUMN version SET DEFAULT 0;
+ALTER TABLE t_p77465986_police_portal_creati.crews ALTER COLUMN version SET NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_crews_version ON t_p77465986_police_portal_creati.crews(version);
+
+CREATE TABLE IF NOT EXISTS t_p77465986_police_portal_creati.crew_tombstones (
+    crew_id INTEGER PRIMARY KEY,
+    version BIGINT NOT NULL,
+    deleted_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_crew_tombstones_version ON t_p77465986_police_portal_creati.crew_tombstones(version);
+
+CREATE OR REPLACE FUNCTION t_p77465986_police_portal_creati.crews_next_version()
+RETURNS BIGINT AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('t_p77465986_police_portal_creati.crews_version'));
+    RETURN nextval('t_p77465986_police_portal_creati.crews_version_seq');
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION t_p77465986_police_portal_creati.crews_set_version()
+RETURNS trigger AS $$
+BEGIN
+    NEW.version := t_p77465986_police_portal_creati.crews_next_version();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION t_p77465986_police_portal_creati.crews_on_delete()
+RETURNS trigger AS $$
+BEGIN
+    INSERT INTO t_p77465986_police_portal_creati.crew_tombstones (crew_id, version)
+    VALUES (OLD.id, t_p77465986_police_portal_creati.crews_next_version())
+    ON CONFLICT (crew_id) DO UPDATE SET version = EXCLUDED.version, deleted_at = CURRENT_TIMESTAMP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION t_p77465986_police_portal_creati.crew_members_touch_crew()
+RETURNS trigger AS $$
+DECLARE
+    changed_crew_id INTEGER;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        changed_crew_id := OLD.crew_id;
+    ELSE
+        changed_crew_id := NEW.crew_id;
+    END IF;
+    -- Новую версию проставит crews_set_version
+    UPDATE t_p77465986_police_portal_creati.crews SET version = 0 WHERE id = changed_crew_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION t_p77465986_police_portal_creati.users_touch_crews()
+RETURNS trigger AS $$
+BEGIN
+    UPDATE t_p77465986_police_portal_creati.crews SET version = 0
+    WHERE id IN (
+        SELECT crew_id FROM t_p77465986_police_portal_creati.crew_members WHERE user_id = NEW.id
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_crews_set_version ON t_p77465986_police_portal_creati.crews;
+CREATE TRIGGER trg_crews_set_version
+    BEFORE INSERT OR UPDATE ON t_p77465986_police_portal_creati.crews
+    FOR EACH ROW EXECUTE PROCEDURE t_p77465986_police_portal_creati.crews_set_version();
+
+DROP TRIGGER IF EXISTS trg_crews_tombstone ON t_p77465986_police_portal_creati.crews;
+CREATE TRIGGER trg_crews_tombstone
+    AFTER DELETE ON t_p77465986_police_portal_creati.crews
+    FOR EACH ROW EXECUTE PROCEDURE t_p77465986_police_portal_creati.crews_on_delete();
+
+DROP TRIGGER IF EXISTS trg_crew_members_touch_crew ON t_p77465986_police_portal_creati.crew_members;
+CREATE TRIGGER trg_crew_members_touch_crew
+    AFTER INSERT OR DELETE ON t_p77465986_police_portal_creati.crew_members
+    FOR EACH ROW EXECUTE PROCEDURE t_p77465986_police_portal_creati.crew_members_touch_crew();
+
+-- Имя, email и ID участника входят в ответ со списком экипажей
+DROP TRIGGER IF EXISTS trg_users_touch_crews ON t_p77465986_police_portal_creati.users;
+CREATE TRIGGER trg_users_touch_crews
+    AFTER UPDATE OF full_name, email, user_id ON t_p77465986_police_portal_creati.users
+    FOR EACH ROW
+    WHEN (OLD.full_name IS DISTINCT FROM NEW.full_name
+          OR OLD.email IS DISTINCT FROM NEW.email
+          OR OLD.user_id IS DISTINCT FROM NEW.user_id)
+    EXECUTE PROCEDURE t_p77465986_police_portal_creati.users_touch_crews();
@@ -0,0 +1,13 @@
+-- Журнал событий изменений экипажей и ориентировок для long-poll канала (функция events).
+-- Запись делается в транзакции изменения вместе с NOTIFY portal_events;
+-- клиент дочитывает события по курсору id, старые удаляет задача обслуживания.
+CREATE TABLE IF NOT EXISTS t_p77465986_police_portal_creati.portal_events (
+    id BIGSERIAL PRIMARY KEY,
+    topic VARCHAR(20) NOT NULL,
+    action VARCHAR(30) NOT NULL,
+    data JSONB NOT NULL DEFAULT '{}'::jsonb,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_portal_events_created_at
+    ON t_p77465986_police_portal_creati.portal_events(created_at);
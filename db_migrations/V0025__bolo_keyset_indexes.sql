@@ -0,0 +1,7 @@
+-- Keyset-пагинация списка ориентировок: порядок (created_at DESC, id DESC)
+-- с фильтрами по type и is_armed
+CREATE INDEX IF NOT EXISTS idx_bolo_created_at_id
+    ON t_p77465986_police_portal_creati.bolo(created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_bolo_type_armed_created_at
+    ON t_p77465986_police_portal_creati.bolo(type, is_armed, created_at DESC, id DESC);
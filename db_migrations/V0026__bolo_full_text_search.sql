@@ -0,0 +1,19 @@
+-- Поиск по ориентировкам: полнотекстовый (русская конфигурация) по main_info и
+-- additional_info и нечёткий/по подстроке через триграммы (номера, фамилии).
+-- search_vector — генерируемый столбец, пересчитывается при каждом INSERT/UPDATE.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE t_p77465986_police_portal_creati.bolo
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('russian', coalesce(main_info, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(additional_info, '')), 'B')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_bolo_search_vector
+    ON t_p77465986_police_portal_creati.bolo USING gin (search_vector);
+
+CREATE INDEX IF NOT EXISTS idx_bolo_main_info_trgm
+    ON t_p77465986_police_portal_creati.bolo USING gin (main_info gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_bolo_additional_info_trgm
+    ON t_p77465986_police_portal_creati.bolo USING gin (additional_info gin_trgm_ops);
@@ -0,0 +1,86 @@
+-- Входящие уведомления пользователя: один индекс под WHERE user_id = ? ORDER BY created_at DESC, id DESC
+-- (с keyset-пагинацией); одиночный индекс по user_id становится лишним
+CREATE INDEX IF NOT EXISTS idx_notifications_user_created_at_id
+    ON t_p77465986_police_portal_creati.notifications(user_id, created_at DESC, id DESC);
+
+DROP INDEX IF EXISTS t_p77465986_police_portal_creati.idx_notifications_user_id;
+
+-- Счётчик непрочитанных для значка в шапке. Поддерживается триггерами
+-- уровня оператора, поэтому пакетные вставки и отметки стоят одного UPDATE на пользователя.
+CREATE TABLE IF NOT EXISTS t_p77465986_police_portal_creati.notification_counters (
+    user_id INTEGER PRIMARY KEY,
+    unread BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO t_p77465986_police_portal_creati.notification_counters (user_id, unread)
+SELECT user_id, COUNT(*)
+FROM t_p77465986_police_portal_creati.notifications
+WHERE is_read = false
+GROUP BY user_id
+ON CONFLICT (user_id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION t_p77465986_police_portal_creati.notification_counters_on_insert()
+RETURNS trigger AS $$
+BEGIN
+    INSERT INTO t_p77465986_police_portal_creati.notification_counters AS c (user_id, unread)
+    SELECT user_id, COUNT(*)
+    FROM new_rows
+    WHERE is_read = false
+    GROUP BY user_id
+    ORDER BY user_id
+    ON CONFLICT (user_id) DO UPDATE SET unread = c.unread + EXCLUDED.unread;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION t_p77465986_police_portal_creati.notification_counters_on_update()
+RETURNS trigger AS $$
+BEGIN
+    INSERT INTO t_p77465986_police_portal_creati.notification_counters AS c (user_id, unread)
+    SELECT user_id, SUM(delta)
+    FROM (
+        SELECT user_id, 1 AS delta FROM new_rows WHERE is_read = false
+        UNION ALL
+        SELECT user_id, -1 AS delta FROM old_rows WHERE is_read = false
+    ) d
+    GROUP BY user_id
+    HAVING SUM(delta) <> 0
+    ORDER BY user_id
+    ON CONFLICT (user_id) DO UPDATE SET unread = GREATEST(c.unread + EXCLUDED.unread, 0);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION t_p77465986_police_portal_creati.notification_counters_on_delete()
+RETURNS trigger AS $$
+BEGIN
+    UPDATE t_p77465986_police_portal_creati.notification_counters AS c
+    SET unread = GREATEST(c.unread - d.unread, 0)
+    FROM (
+        SELECT user_id, COUNT(*) AS unread
+        FROM old_rows
+        WHERE is_read = false
+        GROUP BY user_id
+    ) d
+    WHERE c.user_id = d.user_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_notification_counters_insert ON t_p77465986_police_portal_creati.notifications;
+CREATE TRIGGER trg_notification_counters_insert
+    AFTER INSERT ON t_p77465986_police_portal_creati.notifications
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE PROCEDURE t_p77465986_police_portal_creati.notification_counters_on_insert();
+
+DROP TRIGGER IF EXISTS trg_notification_counters_update ON t_p77465986_police_portal_creati.notifications;
+CREATE TRIGGER trg_notification_counters_update
+    AFTER UPDATE ON t_p77465986_police_portal_creati.notifications
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE PROCEDURE t_p77465986_police_portal_creati.notification_counters_on_update();
+
+DROP TRIGGER IF EXISTS trg_notification_counters_delete ON t_p77465986_police_portal_creati.notifications;
+CREATE TRIGGER trg_notification_counters_delete
+    AFTER DELETE ON t_p77465986_police_portal_creati.notifications
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE PROCEDURE t_p77465986_police_portal_creati.notification_counters_on_delete();
@@ -0,0 +1,19 @@
+-- Индекс по boolean is_read почти бесполезен, когда большинство уведомлений прочитано:
+-- вместо него — частичный индекс только по непрочитанным
+DROP INDEX IF EXISTS t_p77465986_police_portal_creati.idx_notifications_is_read;
+
+CREATE INDEX IF NOT EXISTS idx_notifications_unread
+    ON t_p77465986_police_portal_creati.notifications(user_id, created_at DESC)
+    WHERE is_read = false;
+
+-- Архив прочитанных уведомлений, удалённых задачей обслуживания (NOTIFICATION_ARCHIVE=true)
+CREATE TABLE IF NOT EXISTS t_p77465986_police_portal_creati.notifications_archive (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    type VARCHAR(20) NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    related_crew_id INTEGER,
+    related_bolo_id INTEGER,
+    archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
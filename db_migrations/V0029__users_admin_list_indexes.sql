@@ -0,0 +1,13 @@
+-- Список пользователей в админке: keyset-пагинация по (created_at, id) и (user_id, id)
+CREATE INDEX IF NOT EXISTS idx_users_created_at_id
+    ON t_p77465986_police_portal_creati.users(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_users_user_id_id
+    ON t_p77465986_police_portal_creati.users(user_id, id);
+
+-- Поиск по началу имени, email и ID (LIKE 'префикс%')
+CREATE INDEX IF NOT EXISTS idx_users_full_name_prefix
+    ON t_p77465986_police_portal_creati.users(lower(full_name) text_pattern_ops);
+CREATE INDEX IF NOT EXISTS idx_users_email_prefix
+    ON t_p77465986_police_portal_creati.users(lower(email) text_pattern_ops);
+CREATE INDEX IF NOT EXISTS idx_users_user_id_prefix
+    ON t_p77465986_police_portal_creati.users(user_id text_pattern_ops);
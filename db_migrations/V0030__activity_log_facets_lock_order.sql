@@ -0,0 +1,41 @@
+-- Триггеры фасетов журнала блокируют строки activity_log_facets в одном порядке
+-- (action_type, user_id): две параллельные пачки логов с общими ключами
+-- иначе могут захватить их в разном порядке и попасть в deadlock,
+-- после чего flush_logs теряет всю пачку. Как ORDER BY user_id в V0027.
+CREATE OR REPLACE FUNCTION t_p77465986_police_portal_creati.activity_log_facets_on_insert()
+RETURNS trigger AS $$
+BEGIN
+    INSERT INTO t_p77465986_police_portal_creati.activity_log_facets AS f (action_type, user_id, user_name, entries)
+    SELECT action_type, user_id, MAX(user_name), COUNT(*)
+    FROM new_rows
+    GROUP BY action_type, user_id
+    ORDER BY action_type, user_id
+    ON CONFLICT (action_type, user_id)
+    DO UPDATE SET entries = f.entries + EXCLUDED.entries, user_name = EXCLUDED.user_name;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION t_p77465986_police_portal_creati.activity_log_facets_on_delete()
+RETURNS trigger AS $$
+BEGIN
+    -- UPDATE ... FROM не упорядочивает блокировки — захватываем строки заранее
+    PERFORM 1
+    FROM t_p77465986_police_portal_creati.activity_log_facets f
+    WHERE (f.action_type, f.user_id) IN (SELECT action_type, user_id FROM old_rows)
+    ORDER BY f.action_type, f.user_id
+    FOR UPDATE;
+
+    UPDATE t_p77465986_police_portal_creati.activity_log_facets AS f
+    SET entries = f.entries - d.entries
+    FROM (
+        SELECT action_type, user_id, COUNT(*) AS entries
+        FROM old_rows
+        GROUP BY action_type, user_id
+    ) d
+    WHERE f.action_type = d.action_type AND f.user_id = d.user_id;
+
+    DELETE FROM t_p77465986_police_portal_creati.activity_log_facets WHERE entries <= 0;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
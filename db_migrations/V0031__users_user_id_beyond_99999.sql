@@ -0,0 +1,17 @@
+-- user_id из V0022 ломается на id >= 100000: LPAD(id, 5) обрезает строку
+-- ('100000' -> '10000'), и вставка падает на UNIQUE с пользователем 10000.
+-- Короткие id по-прежнему дополняются нулями до 5 знаков, длинные пишутся как есть;
+-- колонка расширяется до длины, которую допускает sanitize_user_id (20).
+ALTER TABLE t_p77465986_police_portal_creati.users ALTER COLUMN user_id TYPE VARCHAR(20);
+
+CREATE OR REPLACE FUNCTION t_p77465986_police_portal_creati.users_default_user_id()
+RETURNS trigger AS $$
+BEGIN
+    IF NEW.user_id IS NULL THEN
+        NEW.user_id := CASE WHEN length(NEW.id::text) < 5
+                            THEN LPAD(NEW.id::text, 5, '0')
+                            ELSE NEW.id::text END;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
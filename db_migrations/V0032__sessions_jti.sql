@@ -0,0 +1,6 @@
+-- jti токена сессии: по нему отзывается сессия, удалённая без участия клиента
+-- (вытеснение сверх MAX_SESSIONS_PER_USER). Подписанный токен проверяется без
+-- таблицы sessions, поэтому удаления строки недостаточно — нужна запись в
+-- token_revocations с jti токена. Для непрозрачных токенов jti — начало хеша,
+-- у старых строк он берётся из token_hash.
+ALTER TABLE t_p77465986_police_portal_creati.sessions ADD COLUMN IF NOT EXISTS jti VARCHAR(32);
@@ -0,0 +1,138 @@
+"""
+Задержка поиска ориентировок на большой таблице (цель — 20 мс на запрос).
+
+--seed N добавляет N сгенерированных ориентировок одним INSERT ... SELECT
+из generate_series (помечены additional_info 'bench-seed', --cleanup их удаляет).
+Затем каждый запрос из QUERIES выполняется repeat раз через search_bolos
+функции bolo: первая страница и страница по её next_cursor. Выводятся медиана
+и p95. Нужны DATABASE_URL и psycopg2.
+
+    DATABASE_URL=... python scripts/bench_bolo_search.py --seed 100000
+    DATABASE_URL=... python scripts/bench_bolo_search.py --repeat 50
+    DATABASE_URL=... python scripts/bench_bolo_search.py --cleanup
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend', 'bolo'))
+
+import index
+from portal_common import get_db_connection, release_connection
+
+TARGET_MS = 20
+SEED_MARK = 'bench-seed'
+# Фамилия, номер, частое слово, опечатка, префикс короче триграммы
+QUERIES = ('Смирнов', 'А123ВС', 'чёрный', 'Кузнецв', 'Ив')
+
+SEED_SQL = """
+INSERT INTO bolo (type, main_info, additional_info, is_armed, created_at)
+SELECT CASE WHEN n %% 3 = 0 THEN 'vehicle' ELSE 'person' END,
+       CASE WHEN n %% 3 = 0
+            THEN (ARRAY['Лада', 'Toyota', 'Kia', 'Hyundai', 'ГАЗель'])[1 + n %% 5] || ' '
+                 || (ARRAY['чёрный', 'белый', 'серый', 'синий'])[1 + n %% 4] || ' '
+                 || (ARRAY['А', 'В', 'Е', 'К', 'М'])[1 + n %% 5] || lpad((n %% 1000)::text, 3, '0')
+                 || (ARRAY['ВС', 'ОР', 'ТХ', 'МК'])[1 + n / 7 %% 4]
+            ELSE (ARRAY['Смирнов', 'Иванов', 'Кузнецов', 'Попов', 'Соколов', 'Лебедев', 'Козлов'])[1 + n %% 7] || ' '
+                 || (ARRAY['Иван', 'Пётр', 'Алексей', 'Дмитрий', 'Сергей'])[1 + n / 7 %% 5] || ', '
+                 || (1960 + n %% 45)::text || ' г.р.'
+       END,
+       %s,
+       n %% 10 = 0,
+       now() - make_interval(mins => n)
+FROM generate_series(1, %s) AS n
+"""
+
+
+def with_connection(fn):
+    conn = get_db_connection()
+    try:
+        result = fn(conn)
+        conn.commit()
+        return result
+    finally:
+        release_connection(conn)
+
+
+def seed(conn, rows: int):
+    cur = conn.cursor()
+    try:
+        cur.execute(SEED_SQL, (SEED_MARK, rows))
+        cur.execute("ANALYZE bolo")
+    finally:
+        cur.close()
+
+
+def cleanup(conn):
+    cur = conn.cursor()
+    try:
+        cur.execute("DELETE FROM bolo WHERE additional_info = %s", (SEED_MARK,))
+        return cur.rowcount
+    finally:
+        cur.close()
+
+
+def timed_search(conn, q: str, cursor=None):
+    started = time.perf_counter()
+    response = index.search_bolos(conn, q, [], [], index.BOLO_PAGE_SIZE, True, cursor)
+    elapsed = (time.perf_counter() - started) * 1000
+    conn.commit()
+    return elapsed, json.loads(response['body'])
+
+
+def bench(conn, q: str, repeat: int) -> dict:
+    first, second = [], []
+    found = 0
+    for _ in range(repeat):
+        elapsed, page = timed_search(conn, q)
+        first.append(elapsed)
+        found = len(page['bolos'])
+        if page['next_cursor']:
+            elapsed, _ = timed_search(conn, q, page['next_cursor'])
+            second.append(elapsed)
+    return {'found': found, 'first': first, 'second': second}
+
+
+def describe(samples) -> str:
+    if not samples:
+        return '      —'
+    p95 = sorted(samples)[max(0, int(len(samples) * 0.95) - 1)]
+    return f"{statistics.median(samples):6.1f} / {p95:6.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seed', type=int, default=0, help='insert this many generated rows first')
+    parser.add_argument('--cleanup', action='store_true', help='delete generated rows and exit')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    if not os.environ.get('DATABASE_URL'):
+        print('DATABASE_URL is not set')
+        return 1
+
+    if args.cleanup:
+        print(f"deleted {with_connection(cleanup)} generated rows")
+        return 0
+    if args.seed:
+        started = time.perf_counter()
+        with_connection(lambda conn: seed(conn, args.seed))
+        print(f"seeded {args.seed} rows in {time.perf_counter() - started:.1f} s")
+
+    print(f"search, page of {index.BOLO_PAGE_SIZE}, {args.repeat} runs; median / p95 ms (target {TARGET_MS} ms)")
+    failed = False
+    for q in QUERIES:
+        result = with_connection(lambda conn: bench(conn, q, args.repeat))
+        slow = statistics.median(result['first']) > TARGET_MS
+        failed = failed or slow
+        print(f"  {q:10} first page {describe(result['first'])}  next page {describe(result['second'])}  "
+              f"{result['found']:>3} rows{'  SLOW' if slow else ''}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""
+Время холодного старта функций: import index в чистом процессе.
+
+Каждая функция backend/ импортируется в отдельном интерпретаторе из своей
+папки, как при запуске нового контейнера. Замер повторяется repeat раз,
+выводятся медиана и минимум. Зависимости, которых нет в окружении
+(psycopg2, bcrypt), должны импортироваться лениво — если импорт падает,
+функция помечается как failed.
+
+    python scripts/bench_cold_start.py
+    python scripts/bench_cold_start.py --repeat 10 auth bolo
+"""
+
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND = os.path.join(ROOT, 'backend')
+
+PROBE = (
+    "import time\n"
+    "started = time.perf_counter()\n"
+    "import index\n"
+    "print(time.perf_counter() - started)\n"
+)
+
+
+def functions():
+    """Папки функций в backend/"""
+    return sorted(name for name in os.listdir(BACKEND)
+                  if os.path.isfile(os.path.join(BACKEND, name, 'index.py')))
+
+
+def import_seconds(function: str):
+    """Время import index в новом процессе; None, если импорт упал"""
+    # -B: не оставлять __pycache__ в папках функций
+    result = subprocess.run([sys.executable, '-B', '-c', PROBE], cwd=os.path.join(BACKEND, function),
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('functions', nargs='*', help='function folders (default: all)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"import index, {args.repeat} fresh processes per function")
+    for function in args.functions or functions():
+        samples = [import_seconds(function) for _ in range(args.repeat)]
+        if None in samples:
+            print(f"  {function:16} failed")
+            continue
+        print(f"  {function:16} median {statistics.median(samples) * 1000:7.1f} ms  "
+              f"min {min(samples) * 1000:7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Стоимость заголовков ответа: OPTIONS preflight и JSON-ответ.
+
+Сравниваются прежняя сборка (новый словарь и проверка origin на каждый вызов)
+и текущая (заранее собранные MappingProxyType по origin, на вызов — поиск
+в словаре и копия). Наборы заголовков одинаковые, различается только способ
+сборки.
+
+    python scripts/bench_http_headers.py
+    python scripts/bench_http_headers.py --calls 500000
+"""
+
+import os
+import sys
+import timeit
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend', 'auth'))
+
+from portal_common.http import get_security_headers, options_response
+
+ORIGINS = ('https://app.poehali.dev', 'https://preview-123.poehali.dev', 'http://localhost:5173',
+           'https://evil.example.com', None)
+
+
+def _allowed_origin(origin=None) -> str:
+    if origin and (origin.endswith('.poehali.dev') or origin.startswith('http://localhost')):
+        return origin
+    return 'https://app.poehali.dev'
+
+
+def legacy_security_headers(origin=None) -> dict:
+    """Прежний get_security_headers: словарь собирается заново"""
+    return {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': _allowed_origin(origin),
+        'Access-Control-Allow-Credentials': 'true',
+        'Access-Control-Expose-Headers': 'ETag, X-Next-Cursor',
+        'X-Content-Type-Options': 'nosniff',
+        'X-Frame-Options': 'DENY',
+        'X-XSS-Protection': '1; mode=block',
+        'Strict-Transport-Security': 'max-age=31536000; includeSubDomains',
+        'Referrer-Policy': 'strict-origin-when-cross-origin'
+    }
+
+
+def legacy_options_response(origin=None) -> dict:
+    """Прежний options_response с прежним get_cors_headers"""
+    return {
+        'statusCode': 200,
+        'headers': {
+            'Access-Control-Allow-Origin': _allowed_origin(origin),
+            'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
+            'Access-Control-Allow-Headers': 'Content-Type, Authorization, X-Authorization, Cookie, X-Cookie, If-None-Match',
+            'Access-Control-Allow-Credentials': 'true',
+            'Access-Control-Max-Age': '86400',
+            'X-Content-Type-Options': 'nosniff',
+            'X-Frame-Options': 'DENY'
+        },
+        'body': '',
+        'isBase64Encoded': False
+    }
+
+
+def per_call_ns(fn, calls: int) -> float:
+    """Лучшее из трёх прогонов по всем ORIGINS, нс на вызов"""
+    def loop():
+        for origin in ORIGINS:
+            fn(origin)
+    runs = timeit.repeat(loop, number=calls // len(ORIGINS), repeat=3)
+    return min(runs) * 1e9 / (calls // len(ORIGINS) * len(ORIGINS))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=200000)
+    args = parser.parse_args()
+
+    print(f"{args.calls} calls over {len(ORIGINS)} origins (allowed, localhost, rejected, none)")
+    for name, legacy, current in (('options_response', legacy_options_response, options_response),
+                                  ('get_security_headers', legacy_security_headers, get_security_headers)):
+        before, after = per_call_ns(legacy, args.calls), per_call_ns(current, args.calls)
+        print(f"  {name:22} before {before:7.0f} ns  after {after:7.0f} ns  {before / after:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
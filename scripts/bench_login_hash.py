@@ -0,0 +1,70 @@
+"""
+CPU на вход с несуществующим email.
+
+Для защиты от перебора email вход неизвестного пользователя сверяет пароль
+с фиктивным хешем, чтобы ответ занимал столько же времени, сколько у
+существующего. Сравниваются прежний путь (фиктивный хеш считался заново
+при каждом входе: hashpw + checkpw) и текущий (хеш вычисляется один раз
+на контейнер, как get_dummy_hash в auth/index.py: только checkpw).
+Нужен только bcrypt.
+
+    python scripts/bench_login_hash.py
+    python scripts/bench_login_hash.py --logins 20 --rounds 12
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend', 'auth'))
+
+from password_hasher import BCRYPT_ROUNDS, BcryptHasher
+
+DUMMY_PASSWORD = 'dummy_password_for_timing_protection'
+
+
+def per_call(hasher, password: str) -> bool:
+    """Прежний путь: фиктивный хеш на каждый вход"""
+    return hasher.verify(password, hasher.hash(DUMMY_PASSWORD))
+
+
+def make_cached(hasher):
+    """Текущий путь: фиктивный хеш один раз на процесс"""
+    dummy_hash = hasher.hash(DUMMY_PASSWORD)
+    return lambda _, password: hasher.verify(password, dummy_hash)
+
+
+def run(login, hasher, logins: int) -> dict:
+    started = time.process_time()
+    wall_started = time.perf_counter()
+    for i in range(logins):
+        login(hasher, f'wrong-password-{i}')
+    return {'cpu_ms': (time.process_time() - started) * 1000 / logins,
+            'wall_ms': (time.perf_counter() - wall_started) * 1000 / logins}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=10)
+    parser.add_argument('--rounds', type=int, default=BCRYPT_ROUNDS)
+    args = parser.parse_args()
+
+    try:
+        import bcrypt  # noqa: F401
+    except ImportError:
+        print('bcrypt is not installed: pip install bcrypt')
+        return 1
+
+    hasher = BcryptHasher(rounds=args.rounds)
+    print(f"{args.logins} logins with unknown email, bcrypt rounds={args.rounds}")
+    results = [('dummy hash per call', run(per_call, hasher, args.logins)),
+               ('cached dummy hash', run(make_cached(hasher), hasher, args.logins))]
+    for name, result in results:
+        print(f"  {name:22} {result['cpu_ms']:8.1f} ms CPU/login  {result['wall_ms']:8.1f} ms wall/login")
+    print(f"  speedup: {results[0][1]['cpu_ms'] / results[1][1]['cpu_ms']:.2f}x CPU")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
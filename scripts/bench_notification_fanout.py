@@ -0,0 +1,111 @@
+"""
+Рассылка уведомления экипажу из recipients участников против настоящей БД.
+
+Скрипт создаёт recipients активных пользователей bench-fanout-<run>-N@example.com
+и экипаж из них, затем repeat раз вызывает fan_out_notification функции
+notifications (один INSERT ... SELECT вместе с триггерами счётчиков) и выводит
+время рассылки и уведомлений/с. В конце созданные строки удаляются
+(--keep оставляет их). Нужны DATABASE_URL и psycopg2.
+
+    DATABASE_URL=... python scripts/bench_notification_fanout.py --recipients 10000 --repeat 5
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend', 'notifications'))
+
+import index
+from portal_common import get_db_connection, release_connection
+
+SCHEMA = 't_p77465986_police_portal_creati'
+
+
+def run_sql(fn):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        result = fn(cur)
+        conn.commit()
+        return result
+    finally:
+        cur.close()
+        release_connection(conn)
+
+
+def setup(cur, run_id: str, recipients: int):
+    """Пользователи и экипаж из них; (id первого пользователя, id экипажа)"""
+    cur.execute(
+        f"""INSERT INTO {SCHEMA}.users (email, password_hash, full_name, role, is_active)
+            SELECT 'bench-fanout-' || %s || '-' || n || '@example.com', '-', 'Рассылка ' || n, 'user', true
+            FROM generate_series(1, %s) AS n
+            RETURNING id""",
+        (run_id, recipients)
+    )
+    user_ids = [row['id'] for row in cur.fetchall()]
+    cur.execute(
+        f"INSERT INTO {SCHEMA}.crews (callsign, creator_id) VALUES (%s, %s) RETURNING id",
+        (f'BENCH-{run_id}', user_ids[0])
+    )
+    crew_id = cur.fetchone()['id']
+    cur.execute(
+        f"INSERT INTO {SCHEMA}.crew_members (crew_id, user_id) SELECT %s, unnest(%s::int[])",
+        (crew_id, user_ids)
+    )
+    return user_ids[0], crew_id
+
+
+def cleanup(cur, run_id: str, crew_id: int):
+    users = f"SELECT id FROM {SCHEMA}.users WHERE email LIKE %s"
+    pattern = f'bench-fanout-{run_id}-%'
+    cur.execute(f"DELETE FROM {SCHEMA}.notifications WHERE user_id IN ({users})", (pattern,))
+    cur.execute(f"DELETE FROM {SCHEMA}.crew_members WHERE crew_id = %s", (crew_id,))
+    cur.execute(f"DELETE FROM {SCHEMA}.crews WHERE id = %s", (crew_id,))
+    cur.execute(f"DELETE FROM {SCHEMA}.users WHERE email LIKE %s", (pattern,))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--recipients', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--keep', action='store_true', help='keep generated users, crew and notifications')
+    args = parser.parse_args()
+
+    if not os.environ.get('DATABASE_URL'):
+        print('DATABASE_URL is not set')
+        return 1
+
+    run_id = uuid.uuid4().hex[:8]
+    creator_id, crew_id = run_sql(lambda cur: setup(cur, run_id, args.recipients))
+    # Руководитель: рассылка экипажу без проверки членства
+    sender = {'id': creator_id, 'role': 'manager', 'is_active': True}
+    fields = ('Нагрузочная рассылка', 'info', crew_id, None)
+
+    try:
+        samples = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            response = index.fan_out_notification({'crew_ids': [crew_id]}, fields, sender)
+            samples.append(time.perf_counter() - started)
+            created = json.loads(response['body']).get('created')
+            if created != args.recipients:
+                print(f"unexpected response: {response['statusCode']} {response['body']}")
+                return 1
+    finally:
+        if not args.keep:
+            run_sql(lambda cur: cleanup(cur, run_id, crew_id))
+
+    median = statistics.median(samples)
+    print(f"fan-out to {args.recipients} recipients, {args.repeat} runs")
+    print(f"  median {median * 1000:8.1f} ms  max {max(samples) * 1000:8.1f} ms  "
+          f"{args.recipients / median:>10,.0f} notifications/s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Пропускная способность rate limiter при credential stuffing.
+
+Всплеск неудачных входов: attempts попыток с ips адресов по accounts аккаунтам.
+Каждая попытка проходит путь handle_login: is_blocked, затем
+record_failed_login (учёт неудачи и оставшиеся попытки). Всплеск прогоняется repeat раз на новом хранилище,
+выводится лучший прогон. Сравниваются прежняя реализация (списки попыток
+с datetime.now(), только по IP) и текущая (минутные корзины на монотонном
+времени, по IP и по аккаунту одновременно).
+
+    python scripts/bench_rate_limiter.py
+    python scripts/bench_rate_limiter.py --attempts 300000 --ips 25000 --accounts 5000
+    python scripts/bench_rate_limiter.py --ips 50 --accounts 20 --repeat 5  # почти всё уже заблокировано
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import contextlib
+from datetime import datetime, timedelta
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend', 'auth'))
+
+import rate_limiter
+from rate_limiter import MemoryStore
+
+
+class LegacyLimiter:
+    """Прежний rate_limiter.py: список попыток на IP, пересборка окна при каждом вызове"""
+
+    def __init__(self):
+        self.login_attempts = defaultdict(list)
+        self.blocked_ips = {}
+
+    def clean_old_attempts(self, ip):
+        cutoff = datetime.now() - timedelta(minutes=rate_limiter.WINDOW_MINUTES)
+        self.login_attempts[ip] = [(ts, s) for ts, s in self.login_attempts[ip] if ts > cutoff]
+
+    def is_blocked(self, ip, account=None):
+        if ip in self.blocked_ips:
+            if datetime.now() < self.blocked_ips[ip]:
+                return True
+            del self.blocked_ips[ip]
+            self.login_attempts[ip] = []
+        return False
+
+    def record_attempt(self, ip, success, account=None):
+        self.clean_old_attempts(ip)
+        self.login_attempts[ip].append((datetime.now(), success))
+        if len([1 for ts, s in self.login_attempts[ip] if not s]) >= rate_limiter.MAX_ATTEMPTS:
+            self.blocked_ips[ip] = datetime.now() + timedelta(minutes=rate_limiter.BLOCK_MINUTES)
+            return True
+        return False
+
+    def get_remaining_attempts(self, ip, account=None):
+        self.clean_old_attempts(ip)
+        return max(0, rate_limiter.MAX_ATTEMPTS - len([1 for ts, s in self.login_attempts[ip] if not s]))
+
+    def record_failed_login(self, ip, account=None):
+        """Прежний handle_login: record_attempt, затем get_remaining_attempts"""
+        self.record_attempt(ip, False, account)
+        return self.get_remaining_attempts(ip, account)
+
+
+def burst(attempts: int, ips: int, accounts: int, seed: int):
+    rng = random.Random(seed)
+    return [(f'10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}', f'user{a}@example.com')
+            for i, a in ((rng.randrange(ips), rng.randrange(accounts)) for _ in range(attempts))]
+
+
+def run(limiter, requests, per_account: bool = True) -> dict:
+    """Прогнать всплеск через limiter; время и число отказов по блокировке"""
+    if not per_account:
+        requests = [(ip, None) for ip, _ in requests]
+    rejected = 0
+    started = time.perf_counter()
+    # Сообщения о блокировке не должны мерить скорость терминала
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for ip, account in requests:
+            if limiter.is_blocked(ip, account):
+                rejected += 1
+                continue
+            limiter.record_failed_login(ip, account)
+    elapsed = time.perf_counter() - started
+    return {'seconds': elapsed, 'per_second': len(requests) / elapsed, 'rejected': rejected}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--attempts', type=int, default=300000)
+    parser.add_argument('--ips', type=int, default=25000)
+    parser.add_argument('--accounts', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    requests = burst(args.attempts, args.ips, args.accounts, args.seed)
+    print(f"{args.attempts} failed logins from {args.ips} IPs against {args.accounts} accounts, "
+          f"best of {args.repeat}")
+
+    def best(make, per_account):
+        runs = []
+        for _ in range(args.repeat):
+            limiter, keys = make()
+            runs.append((run(limiter, requests, per_account), keys))
+        result, keys = min(runs, key=lambda item: item[0]['seconds'])
+        return result, keys()
+
+    def legacy():
+        limiter = LegacyLimiter()
+        return limiter, lambda: len(limiter.login_attempts) + len(limiter.blocked_ips)
+
+    def buckets():
+        store = MemoryStore(max_tracked=args.ips + args.accounts)
+        rate_limiter.set_store(store)
+        return rate_limiter, lambda: len(store._counters) + len(store._blocked)
+
+    results = [('legacy (per IP)',) + best(legacy, False)]
+    previous = rate_limiter.get_store()
+    try:
+        for name, per_account in (('buckets (per IP)', False), ('buckets (per IP + account)', True)):
+            results.append((name,) + best(buckets, per_account))
+    finally:
+        rate_limiter.set_store(previous)
+
+    for name, result, keys in results:
+        print(f"  {name:28} {result['seconds']:7.2f} s  {result['per_second']:>10,.0f} attempts/s  "
+              f"{result['rejected']:>8} rejected as blocked  {keys:>7} keys in memory")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Нагрузка на регистрацию: регистраций в секунду против настоящей БД.
+
+Потоки вызывают handle_register функции auth, как тёплый контейнер под
+наплывом заявок; доля duplicates запросов повторяет уже занятый email.
+Скрипт выводит регистрации/с, ответы по кодам и сколько значений
+последовательности users.id потрачено на каждого созданного пользователя
+(1.00 — повторы номера не сжигают). Нужны DATABASE_URL, psycopg2 и bcrypt.
+Создаёт пользователей loadtest-<run>-N@example.com; удалять их нужно вручную.
+
+    DATABASE_URL=... python scripts/load_register.py --requests 500 --threads 8 --duplicates 0.3
+"""
+
+import os
+import sys
+import uuid
+import json
+import time
+import random
+import argparse
+import threading
+from collections import Counter
+
+# Стоимость bcrypt влияет на результат сильнее БД; по умолчанию — минимальная
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend', 'auth'))
+
+import index
+from portal_common import get_db_connection, release_connection
+
+SEQUENCE_QUERY = "SELECT last_value FROM pg_sequences WHERE schemaname || '.' || sequencename = " \
+                 "pg_get_serial_sequence('t_p77465986_police_portal_creati.users', 'id')"
+
+
+def sequence_value() -> int:
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(SEQUENCE_QUERY)
+        row = cur.fetchone()
+        conn.commit()
+        return (row and row['last_value']) or 0
+    finally:
+        cur.close()
+        release_connection(conn)
+
+
+def requests_for(run_id: str, count: int, duplicates: float, seed: int):
+    """Тела запросов: новые email и повторы уже отправленных"""
+    rng = random.Random(seed)
+    emails = []
+    for i in range(count):
+        if emails and rng.random() < duplicates:
+            email = rng.choice(emails)
+        else:
+            email = f'loadtest-{run_id}-{i}@example.com'
+            emails.append(email)
+        yield {'email': email, 'password': 'loadtest-password', 'full_name': f'Нагрузка {i}'}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--duplicates', type=float, default=0.3, help='share of requests reusing a taken email')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    if not os.environ.get('DATABASE_URL'):
+        print('DATABASE_URL is not set')
+        return 1
+
+    run_id = uuid.uuid4().hex[:8]
+    pending = list(requests_for(run_id, args.requests, args.duplicates, args.seed))
+    lock = threading.Lock()
+    statuses = Counter()
+
+    def worker():
+        while True:
+            with lock:
+                if not pending:
+                    return
+                body = pending.pop(0)
+            response = index.handle_register(body, client_ip=f'loadtest-{run_id}')
+            with lock:
+                statuses[response['statusCode']] += 1
+
+    sequence_before = sequence_value()
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    burned = sequence_value() - sequence_before
+
+    created = sum(count for status, count in statuses.items() if status < 300)
+    print(f"{args.requests} registrations, {args.threads} threads, {args.duplicates:.0%} duplicate emails, "
+          f"bcrypt rounds={os.environ['BCRYPT_ROUNDS']}")
+    print(f"  {args.requests / elapsed:8.1f} requests/s  {created / elapsed:8.1f} registrations/s")
+    print(f"  responses: {json.dumps(dict(sorted(statuses.items())))}")
+    print(f"  sequence values per created user: {burned / created if created else 0:.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Локальная модель перебора паролей через много контейнеров функции auth.
+
+Запросы атакующего (один IP, один аккаунт) распределяются по контейнерам
+случайно, контейнеры обрабатывают их параллельно в потоках. Скрипт считает,
+сколько неудачных попыток прошло до блокировки:
+- memory — у каждого контейнера своё хранилище, лимит умножается на их число;
+- postgres — общая таблица login_rate_limits (нужны DATABASE_URL и psycopg2),
+  лимит общий для всех контейнеров.
+
+    python scripts/simulate_rate_limit_containers.py --containers 20 --attempts 500
+    DATABASE_URL=... python scripts/simulate_rate_limit_containers.py --backend postgres
+"""
+
+import os
+import sys
+import uuid
+import queue
+import random
+import argparse
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend', 'auth'))
+
+import rate_limiter
+from rate_limiter import MemoryStore, PostgresStore
+
+
+class Container:
+    """Один тёплый контейнер: своё хранилище (memory) или общее (postgres)"""
+
+    def __init__(self, store):
+        self.store = store
+        self.requests = queue.Queue()
+        self.allowed = 0
+        self.rejected = 0
+
+    def login(self, ip: str, account: str):
+        """Неудачный вход, как в handle_login: проверка блокировки, затем учёт попытки"""
+        limits = rate_limiter._limits(ip, account)
+        if self.store.is_blocked(*(key for key, _, _ in limits)):
+            self.rejected += 1
+            return
+        self.allowed += 1
+        self.store.record_failures(limits)
+
+    def run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            self.login(*request)
+
+
+def simulate(backend: str, containers: int, attempts: int, seed: int) -> dict:
+    shared = PostgresStore() if backend == 'postgres' else None
+    pool = [Container(shared or MemoryStore()) for _ in range(containers)]
+    threads = [threading.Thread(target=c.run) for c in pool]
+    for thread in threads:
+        thread.start()
+
+    # Уникальные ключи, чтобы прогоны не мешали друг другу в общей таблице
+    run_id = uuid.uuid4().hex[:8]
+    ip, account = f'sim-{run_id}', f'sim-{run_id}@example.com'
+    rng = random.Random(seed)
+    for _ in range(attempts):
+        rng.choice(pool).requests.put((ip, account))
+    for container in pool:
+        container.requests.put(None)
+    for thread in threads:
+        thread.join()
+
+    return {
+        'allowed': sum(c.allowed for c in pool),
+        'rejected': sum(c.rejected for c in pool),
+        'containers_reached': sum(1 for c in pool if c.allowed or c.rejected),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', choices=('memory', 'postgres'), default='memory')
+    parser.add_argument('--containers', type=int, default=20)
+    parser.add_argument('--attempts', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    result = simulate(args.backend, args.containers, args.attempts, args.seed)
+    limit = min(rate_limiter.MAX_ATTEMPTS, rate_limiter.ACCOUNT_MAX_ATTEMPTS)
+    print(f"backend={args.backend} containers={args.containers} attempts={args.attempts}")
+    print(f"  failed attempts let through: {result['allowed']} (single-store limit {limit})")
+    print(f"  rejected as blocked:         {result['rejected']}")
+    print(f"  containers that saw traffic: {result['containers_reached']}")
+
+
+if __name__ == '__main__':
+    main()
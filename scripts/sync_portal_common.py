@@ -0,0 +1,110 @@
+"""
+Синхронизация общих файлов между функциями backend/.
+
+Каждая функция деплоится из своей папки, поэтому общий код лежит в ней копией.
+Канонические версии:
+- backend/auth/portal_common/ — во все функции (папки с index.py);
+- backend/auth/password_hasher.py — в функции, где он уже есть;
+- backend/bolo/security.py — в функции с тем же вариантом security.py
+  (у auth и users-manage свои версии).
+
+    python scripts/sync_portal_common.py          # скопировать канонические версии
+    python scripts/sync_portal_common.py --check  # только проверить, код 1 при расхождении
+"""
+
+import os
+import sys
+import shutil
+import filecmp
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND = os.path.join(ROOT, 'backend')
+PACKAGE = 'portal_common'
+CANONICAL = 'auth'
+# Файл -> (функция с канонической версией, функции с копиями)
+MIRRORED_FILES = {
+    'password_hasher.py': ('auth', ('users-manage',)),
+    'security.py': ('bolo', ('crews', 'notifications')),
+}
+
+def functions():
+    """Папки функций в backend/"""
+    return sorted(name for name in os.listdir(BACKEND)
+                  if os.path.isfile(os.path.join(BACKEND, name, 'index.py')))
+
+def _ignore(_, names):
+    return [name for name in names if name == '__pycache__' or name.endswith('.pyc')]
+
+def _package_files(path: str) -> set:
+    """Относительные пути файлов пакета (без __pycache__)"""
+    found = set()
+    for dirpath, dirnames, filenames in os.walk(path):
+        dirnames[:] = [d for d in dirnames if d != '__pycache__']
+        for filename in filenames:
+            if not filename.endswith('.pyc'):
+                found.add(os.path.relpath(os.path.join(dirpath, filename), path))
+    return found
+
+def find_drift() -> list:
+    """Список расхождений копий с каноническими версиями"""
+    drift = []
+    source = os.path.join(BACKEND, CANONICAL, PACKAGE)
+    expected = _package_files(source)
+    for function in functions():
+        if function == CANONICAL:
+            continue
+        target = os.path.join(BACKEND, function, PACKAGE)
+        if not os.path.isdir(target):
+            drift.append(f'{function}/{PACKAGE}: missing')
+            continue
+        actual = _package_files(target)
+        for name in sorted(expected - actual):
+            drift.append(f'{function}/{PACKAGE}/{name}: missing')
+        for name in sorted(actual - expected):
+            drift.append(f'{function}/{PACKAGE}/{name}: not in {CANONICAL}/{PACKAGE}')
+        for name in sorted(expected & actual):
+            if not filecmp.cmp(os.path.join(source, name), os.path.join(target, name), shallow=False):
+                drift.append(f'{function}/{PACKAGE}/{name}: differs')
+
+    for filename, (owner, copies) in MIRRORED_FILES.items():
+        source_file = os.path.join(BACKEND, owner, filename)
+        for function in copies:
+            target_file = os.path.join(BACKEND, function, filename)
+            if not os.path.isfile(target_file):
+                drift.append(f'{function}/{filename}: missing')
+            elif not filecmp.cmp(source_file, target_file, shallow=False):
+                drift.append(f'{function}/{filename}: differs from {owner}/{filename}')
+    return drift
+
+def sync():
+    """Заменить копии каноническими версиями"""
+    source = os.path.join(BACKEND, CANONICAL, PACKAGE)
+    for function in functions():
+        if function == CANONICAL:
+            continue
+        target = os.path.join(BACKEND, function, PACKAGE)
+        shutil.rmtree(target, ignore_errors=True)
+        shutil.copytree(source, target, ignore=_ignore)
+    for filename, (owner, copies) in MIRRORED_FILES.items():
+        for function in copies:
+            shutil.copyfile(os.path.join(BACKEND, owner, filename), os.path.join(BACKEND, function, filename))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--check', action='store_true', help='only report drift')
+    args = parser.parse_args()
+
+    if not args.check:
+        sync()
+    drift = find_drift()
+    for line in drift:
+        print(f'drift: {line}')
+    if drift:
+        print(f'Shared files are out of sync; run: python scripts/{os.path.basename(__file__)}')
+        return 1
+    print('Shared files are in sync')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -90,6 +90,14 @@ export const auth = {
   },
 
   logout() {
+    const authHeader = this.getAuthHeader();
+    if (authHeader.Authorization) {
+      fetch(AUTH_API_URL, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', ...authHeader },
+        body: JSON.stringify({ action: 'logout' }),
+      }).catch(() => {});
+    }
     localStorage.removeItem('auth_token');
     localStorage.removeItem('user');
   },
@@ -112,7 +120,7 @@ export const auth = {
     full_name?: string;
     current_password?: string;
     new_password?: string;
-  }): Promise<{ user: User }> {
+  }): Promise<{ user: User; token?: string }> {
     const response = await fetch(AUTH_API_URL, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json', ...this.getAuthHeader() },
@@ -125,6 +133,7 @@ export const auth = {
     }
 
     const result = await response.json();
+    if (result.token) localStorage.setItem('auth_token', result.token);
     localStorage.setItem('user', JSON.stringify(result.user));
     return result;
   },
@@ -13,6 +13,20 @@ export interface Bolo {
   createdByName?: string;
 }
 
+export interface BoloListParams {
+  q?: string;
+  type?: 'person' | 'vehicle';
+  is_armed?: boolean;
+  fields?: 'summary';
+  limit?: number;
+  cursor?: string;
+}
+
+export interface BoloPage {
+  bolos: Bolo[];
+  next_cursor: string | null;
+}
+
 export const boloApi = {
   async getAll(): Promise<Bolo[]> {
     const response = await fetch(BOLO_API_URL, {
@@ -28,6 +42,28 @@ export const boloApi = {
     return response.json();
   },
 
+  async getPage(params: BoloListParams = {}): Promise<BoloPage> {
+    const queryParams = new URLSearchParams();
+    if (params.q) queryParams.set('q', params.q);
+    if (params.type) queryParams.set('type', params.type);
+    if (params.is_armed !== undefined) queryParams.set('is_armed', String(params.is_armed));
+    if (params.fields) queryParams.set('fields', params.fields);
+    queryParams.set('limit', String(params.limit || 50));
+    if (params.cursor) queryParams.set('cursor', params.cursor);
+
+    const response = await fetch(`${BOLO_API_URL}?${queryParams}`, {
+      method: 'GET',
+      headers: { 'Content-Type': 'application/json', ...auth.getAuthHeader() },
+    });
+
+    if (!response.ok) {
+      const error = await response.json().catch(() => ({ error: `HTTP ${response.status}` }));
+      throw new Error(error.error || 'Failed to fetch BOLOs');
+    }
+
+    return response.json();
+  },
+
   async create(data: Omit<Bolo, 'id' | 'createdAt' | 'updatedAt' | 'createdByName'>): Promise<Bolo> {
     const response = await fetch(BOLO_API_URL, {
       method: 'POST',
@@ -67,4 +103,50 @@ export const boloApi = {
       throw new Error(error.error || 'Failed to delete BOLO');
     }
   },
+
+  async importBulk(items: Omit<Bolo, 'id' | 'createdAt' | 'updatedAt' | 'createdByName'>[]): Promise<{ imported: number; ids: number[] }> {
+    const response = await fetch(`${BOLO_API_URL}?action=import`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json', ...auth.getAuthHeader() },
+      body: JSON.stringify(items),
+    });
+
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.error || 'Failed to import BOLOs');
+    }
+
+    return response.json();
+  },
+
+  async exportAll(format: 'ndjson' | 'csv', params: Pick<BoloListParams, 'type' | 'is_armed'> = {}): Promise<Blob> {
+    const queryParams = new URLSearchParams({ format });
+    if (params.type) queryParams.set('type', params.type);
+    if (params.is_armed !== undefined) queryParams.set('is_armed', String(params.is_armed));
+
+    // Выгрузка приходит частями; следующая часть — по курсору из X-Next-Cursor
+    const parts: string[] = [];
+    let cursor: string | null = null;
+    do {
+      if (cursor) queryParams.set('cursor', cursor);
+
+      const response = await fetch(`${BOLO_API_URL}?${queryParams}`, {
+        method: 'GET',
+        headers: { ...auth.getAuthHeader() },
+      });
+
+      if (!response.ok) {
+        const error = await response.json().catch(() => ({ error: `HTTP ${response.status}` }));
+        throw new Error(error.error || 'Failed to export BOLOs');
+      }
+
+      const text = await response.text();
+      // Заголовок CSV повторяется в каждой части — оставляем только первый
+      parts.push(format === 'csv' && parts.length > 0 ? text.slice(text.indexOf('\n') + 1) : text);
+      cursor = response.headers.get('X-Next-Cursor');
+    } while (cursor);
+
+    const type = format === 'csv' ? 'text/csv;charset=utf-8' : 'application/x-ndjson;charset=utf-8';
+    return new Blob(parts, { type });
+  },
 };
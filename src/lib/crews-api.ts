@@ -18,6 +18,13 @@ export interface Crew {
   members: CrewMember[];
   created_at: string;
   updated_at: string;
+  version: number;
+}
+
+export interface CrewChanges {
+  crews: Crew[];
+  deleted: number[];
+  version: number;
 }
 
 export const crewsApi = {
@@ -36,6 +43,23 @@ export const crewsApi = {
     return result.crews || [];
   },
 
+  // Изменения после версии since; null — с прошлого опроса ничего не менялось (304)
+  async getCrewChanges(since: number): Promise<CrewChanges | null> {
+    const response = await fetch(`${CREWS_API_URL}?since=${since}`, {
+      method: 'GET',
+      headers: { ...auth.getAuthHeader(), 'If-None-Match': `W/"crews-${since}"` },
+    });
+
+    if (response.status === 304) return null;
+
+    if (!response.ok) {
+      const error = await response.json().catch(() => ({ error: 'Network error' }));
+      throw new Error(error.error || 'Failed to fetch crews');
+    }
+
+    return response.json();
+  },
+
   async createCrew(data: {
     callsign: string;
     location?: string;
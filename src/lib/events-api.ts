@@ -0,0 +1,63 @@
+import { auth } from './auth';
+
+// Канал событий обслуживает функция экипажей (?resource=events)
+const EVENTS_API_URL = 'https://functions.poehali.dev/f4f45aca-ba9d-4afa-b89b-d082668a4ee4';
+const WAIT_SECONDS = 25;
+const RETRY_DELAY_MS = 5000;
+
+export type EventTopic = 'crews' | 'bolo';
+
+export interface PortalEvent {
+  id: number;
+  topic: EventTopic;
+  action: string;
+  data: Record<string, unknown>;
+  created_at: string;
+}
+
+export interface EventsPage {
+  events: PortalEvent[];
+  last_id: number;
+}
+
+export const eventsApi = {
+  async poll(after?: number, wait = WAIT_SECONDS, topics?: EventTopic[], signal?: AbortSignal): Promise<EventsPage> {
+    const queryParams = new URLSearchParams({ resource: 'events', wait: String(wait) });
+    if (after !== undefined) queryParams.set('after', String(after));
+    if (topics?.length) queryParams.set('topics', topics.join(','));
+
+    const response = await fetch(`${EVENTS_API_URL}?${queryParams}`, {
+      method: 'GET',
+      headers: { ...auth.getAuthHeader() },
+      signal,
+    });
+
+    if (!response.ok) throw new Error('Failed to fetch events');
+
+    return response.json();
+  },
+
+  // Long-poll цикл: onEvents получает только события, пришедшие после подписки.
+  // Возвращает функцию отписки.
+  subscribe(onEvents: (events: PortalEvent[]) => void, topics?: EventTopic[]): () => void {
+    const controller = new AbortController();
+    let after: number | undefined;
+
+    const loop = async () => {
+      while (!controller.signal.aborted) {
+        try {
+          const page = await eventsApi.poll(after, after === undefined ? 0 : WAIT_SECONDS, topics, controller.signal);
+          if (after !== undefined && page.events.length > 0) onEvents(page.events);
+          after = page.last_id;
+        } catch (error) {
+          if (controller.signal.aborted) return;
+          console.error('Events poll failed:', error);
+          await new Promise((resolve) => setTimeout(resolve, RETRY_DELAY_MS));
+        }
+      }
+    };
+    loop();
+
+    return () => controller.abort();
+  },
+};
@@ -18,6 +18,8 @@ export interface LogsResponse {
   logs: ActivityLog[];
   action_types: string[];
   total: number;
+  total_is_estimate: boolean;
+  next_cursor: string | null;
 }
 
 export interface LogsParams {
@@ -26,6 +28,8 @@ export interface LogsParams {
   user?: string;
   sort_by?: 'created_at' | 'user_name' | 'action_type';
   sort_order?: 'ASC' | 'DESC';
+  limit?: number;
+  cursor?: string;
 }
 
 export const logsApi = {
@@ -39,6 +43,8 @@ export const logsApi = {
       if (params.user) queryParams.set('user', params.user);
       if (params.sort_by) queryParams.set('sort_by', params.sort_by);
       if (params.sort_order) queryParams.set('sort_order', params.sort_order);
+      if (params.limit) queryParams.set('limit', params.limit.toString());
+      if (params.cursor) queryParams.set('cursor', params.cursor);
     }
 
     const response = await fetch(`${LOGS_API_URL}?${queryParams}`, {
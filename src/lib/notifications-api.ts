@@ -12,6 +12,11 @@ export interface Notification {
   related_bolo_id?: number;
 }
 
+export interface NotificationsPage {
+  notifications: Notification[];
+  next_cursor: string | null;
+}
+
 export const notificationsApi = {
   async getAll(): Promise<Notification[]> {
     const response = await fetch(NOTIFICATIONS_API_URL, {
@@ -25,6 +30,33 @@ export const notificationsApi = {
     return data.notifications;
   },
 
+  async getPage(params: { limit?: number; cursor?: string } = {}): Promise<NotificationsPage> {
+    const queryParams = new URLSearchParams();
+    if (params.limit) queryParams.set('limit', params.limit.toString());
+    if (params.cursor) queryParams.set('cursor', params.cursor);
+
+    const response = await fetch(`${NOTIFICATIONS_API_URL}?${queryParams}`, {
+      method: 'GET',
+      headers: { ...auth.getAuthHeader() },
+    });
+
+    if (!response.ok) throw new Error('Failed to fetch notifications');
+
+    return response.json();
+  },
+
+  async getUnreadCount(): Promise<number> {
+    const response = await fetch(`${NOTIFICATIONS_API_URL}?view=unread_count`, {
+      method: 'GET',
+      headers: { ...auth.getAuthHeader() },
+    });
+
+    if (!response.ok) throw new Error('Failed to fetch unread count');
+
+    const data = await response.json();
+    return data.unread;
+  },
+
   async create(notification: {
     message: string;
     type: 'info' | 'warning' | 'error' | 'success';
@@ -51,4 +83,35 @@ export const notificationsApi = {
 
     if (!response.ok) throw new Error('Failed to mark notification as read');
   },
+
+  async broadcast(notification: {
+    message: string;
+    type: 'info' | 'warning' | 'error' | 'success';
+    related_crew_id?: number;
+    related_bolo_id?: number;
+    target: { roles?: string[]; crew_ids?: number[]; all?: boolean };
+  }): Promise<{ created: number }> {
+    const response = await fetch(NOTIFICATIONS_API_URL, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json', ...auth.getAuthHeader() },
+      body: JSON.stringify(notification),
+    });
+
+    if (!response.ok) throw new Error('Failed to send notifications');
+
+    return response.json();
+  },
+
+  async markManyAsRead(selection: { notification_ids?: number[]; before?: string; all?: boolean }): Promise<number> {
+    const response = await fetch(NOTIFICATIONS_API_URL, {
+      method: 'PUT',
+      headers: { 'Content-Type': 'application/json', ...auth.getAuthHeader() },
+      body: JSON.stringify(selection),
+    });
+
+    if (!response.ok) throw new Error('Failed to mark notifications as read');
+
+    const data = await response.json();
+    return data.updated;
+  },
 };
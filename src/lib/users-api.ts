@@ -12,6 +12,27 @@ export interface UserManagement {
   created_at: string;
 }
 
+export interface UsersPageParams {
+  status?: 'all' | 'active' | 'pending';
+  role?: string;
+  q?: string;
+  sort_by?: 'created_at' | 'user_id';
+  limit?: number;
+  cursor?: string;
+}
+
+export interface UsersPage {
+  users: UserManagement[];
+  next_cursor: string | null;
+}
+
+export interface UserCounts {
+  total: number;
+  active: number;
+  pending: number;
+  by_role: Record<string, number>;
+}
+
 export const usersApi = {
   async getUsers(status: 'all' | 'active' | 'pending' = 'all'): Promise<UserManagement[]> {
     const url = status !== 'all' ? `${USERS_API_URL}?status=${status}` : USERS_API_URL;
@@ -30,6 +51,42 @@ export const usersApi = {
     return result.users;
   },
 
+  async getUsersPage(params: UsersPageParams = {}): Promise<UsersPage> {
+    const queryParams = new URLSearchParams();
+    if (params.status && params.status !== 'all') queryParams.set('status', params.status);
+    if (params.role) queryParams.set('role', params.role);
+    if (params.q) queryParams.set('q', params.q);
+    if (params.sort_by) queryParams.set('sort_by', params.sort_by);
+    queryParams.set('limit', String(params.limit || 50));
+    if (params.cursor) queryParams.set('cursor', params.cursor);
+
+    const response = await fetch(`${USERS_API_URL}?${queryParams}`, {
+      method: 'GET',
+      headers: { 'Content-Type': 'application/json', ...auth.getAuthHeader() },
+    });
+
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.error || 'Failed to fetch users');
+    }
+
+    return response.json();
+  },
+
+  async getCounts(): Promise<UserCounts> {
+    const response = await fetch(`${USERS_API_URL}?view=counts`, {
+      method: 'GET',
+      headers: { 'Content-Type': 'application/json', ...auth.getAuthHeader() },
+    });
+
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.error || 'Failed to fetch user counts');
+    }
+
+    return response.json();
+  },
+
   async activateUser(userId: number): Promise<void> {
     const response = await fetch(USERS_API_URL, {
       method: 'POST',
@@ -86,6 +143,25 @@ export const usersApi = {
     }
   },
 
+  async bulkUpdate(
+    userIds: number[],
+    op: 'activate' | 'deactivate' | 'role',
+    role?: string,
+  ): Promise<{ updated: number; user_ids: number[] }> {
+    const response = await fetch(USERS_API_URL, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json', ...auth.getAuthHeader() },
+      body: JSON.stringify({ action: 'bulk', op, user_ids: userIds, ...(role ? { role } : {}) }),
+    });
+
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.error || 'Failed to update users');
+    }
+
+    return response.json();
+  },
+
   async deleteUser(userId: number): Promise<void> {
     const response = await fetch(`${USERS_API_URL}?user_id=${userId}`, {
       method: 'DELETE',
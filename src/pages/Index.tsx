@@ -18,6 +18,7 @@ import { SettingsPanel } from "@/components/SettingsPanel";
 import { crewsApi, Crew as ApiCrew } from "@/lib/crews-api";
 import { boloApi, Bolo } from "@/lib/bolo-api";
 import { notificationsApi, Notification } from "@/lib/notifications-api";
+import { eventsApi } from "@/lib/events-api";
 
 type CrewStatus = "available" | "busy" | "delay" | "need_help";
 
@@ -100,6 +101,20 @@ const Index = ({ initialTab = "crews" }: IndexProps) => {
     }
   }, [isAuthenticated]);
 
+  useEffect(() => {
+    if (!isAuthenticated) return;
+    // Изменения экипажей и ориентировок приходят по long-poll вместо ручного обновления
+    return eventsApi.subscribe((events) => {
+      const crewEvents = events.filter(e => e.topic === 'crews');
+      // Тихое обновление, без индикатора загрузки
+      if (crewEvents.length > 0) crewsApi.getCrews().then(setCrews).catch(console.error);
+      if (events.some(e => e.topic === 'bolo')) boloApi.getAll().then(setBolos).catch(console.error);
+      crewEvents
+        .filter(e => e.action === 'status' && e.data.status === 'need_help')
+        .forEach(e => toast.error(`Экипаж ${e.data.callsign} запрашивает поддержку`));
+    });
+  }, [isAuthenticated]);
+
   useEffect(() => {
     const myCrew = crews.find(c => c.members.some(m => m.user_id === user?.id));
     if (myCrew) {
@@ -0,0 +1,10 @@
+"""
+Тесты чистой логики функций, которой не нужна БД (psycopg2 и bcrypt не импортируются).
+Модули берутся из backend/auth — там каноническая копия portal_common.
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'backend', 'auth'))
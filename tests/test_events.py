@@ -0,0 +1,67 @@
+import json
+import threading
+
+import pytest
+
+from portal_common import events
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+    """Выборки без БД: список вызовов и очередь ответов"""
+    calls = []
+    answers = []
+
+    def fake_fetch(after, topics, limit):
+        calls.append(after)
+        return answers.pop(0) if answers else []
+
+    monkeypatch.setattr(events, '_fetch_once', fake_fetch)
+    monkeypatch.setattr(events, 'POLL_SECONDS', 0.01)
+    return calls, answers
+
+
+def test_returns_as_soon_as_events_arrive(fetches):
+    calls, answers = fetches
+    answers.extend([[], [], [{'id': 5}]])
+
+    assert events.wait_for_events(4, ['crews'], timeout=5) == [{'id': 5}]
+    assert len(calls) == 3
+
+
+def test_gives_up_after_timeout(fetches):
+    calls, _ = fetches
+
+    assert events.wait_for_events(4, ['crews'], timeout=0.05) == []
+    assert len(calls) >= 2
+
+
+def test_waiters_over_the_cap_do_not_wait(fetches, monkeypatch):
+    calls, _ = fetches
+    monkeypatch.setattr(events, '_waiters', threading.BoundedSemaphore(1))
+    events._waiters.acquire()
+
+    assert events.wait_for_events(4, ['crews'], timeout=5) == []
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize('params', [
+    {'after': '1', 'wait': 'nan'},
+    {'after': '1', 'wait': 'soon'},
+    {'after': 'x'},
+    {'after': '1', 'topics': 'crews,users'},
+])
+def test_rejects_bad_parameters(params):
+    response = events.get_events(params)
+
+    assert response['statusCode'] == 400
+
+
+def test_response_carries_cursor(fetches):
+    _, answers = fetches
+    answers.append([{'id': 7, 'topic': 'crews'}, {'id': 9, 'topic': 'crews'}])
+
+    body = json.loads(events.get_events({'after': '6', 'wait': '0'})['body'])
+
+    assert body['last_id'] == 9
+    assert [e['id'] for e in body['events']] == [7, 9]
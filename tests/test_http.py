@@ -0,0 +1,85 @@
+import pytest
+
+from portal_common import http
+
+
+@pytest.fixture
+def allowlist(monkeypatch):
+    """Подставить CORS_ALLOWED_ORIGINS и сбросить кеш заголовков"""
+    def apply(value):
+        exact, suffixes, prefixes = http._parse_allowlist(value)
+        monkeypatch.setattr(http, '_EXACT', exact)
+        monkeypatch.setattr(http, '_SUFFIXES', suffixes)
+        monkeypatch.setattr(http, '_PREFIXES', prefixes)
+        monkeypatch.setattr(http, '_security_by_origin', {None: http._build(http._SECURITY_HEADERS, http.DEFAULT_ORIGIN)})
+        monkeypatch.setattr(http, '_cors_by_origin', {None: http._build(http._CORS_HEADERS, http.DEFAULT_ORIGIN)})
+    return apply
+
+
+def allowed_origin(origin):
+    return http.get_security_headers(origin)['Access-Control-Allow-Origin']
+
+
+def test_parse_allowlist():
+    exact, suffixes, prefixes = http._parse_allowlist(' https://a.example ,*.poehali.dev,, http://localhost*')
+
+    assert exact == {'https://a.example'}
+    assert suffixes == ('.poehali.dev',)
+    assert prefixes == ('http://localhost',)
+
+
+@pytest.mark.parametrize('origin', [
+    'https://app.example',
+    'https://preview.poehali.dev',
+    'https://a.b.poehali.dev',
+    'http://localhost',
+    'http://localhost:5173',
+])
+def test_allowed_origins_are_echoed(allowlist, origin):
+    allowlist('https://app.example,*.poehali.dev,http://localhost*')
+
+    assert allowed_origin(origin) == origin
+    assert http.get_cors_headers(origin)['Access-Control-Allow-Origin'] == origin
+
+
+@pytest.mark.parametrize('origin', [
+    'https://evil.example',
+    'https://evilpoehali.dev',
+    'https://poehali.dev.evil.example',
+    'http://localhost.evil.example',
+    'http://localhostevil.example',
+    '',
+    None,
+])
+def test_other_origins_get_default(allowlist, origin):
+    allowlist('https://app.example,*.poehali.dev,http://localhost*')
+
+    assert allowed_origin(origin) == http.DEFAULT_ORIGIN
+
+
+def test_cached_headers_are_copies(allowlist):
+    allowlist('*.poehali.dev')
+    headers = http.get_security_headers('https://x.poehali.dev')
+    headers['Content-Type'] = 'text/csv'
+
+    assert http.get_security_headers('https://x.poehali.dev')['Content-Type'] == 'application/json'
+
+
+def test_rejected_origins_are_not_cached(allowlist):
+    allowlist('*.poehali.dev')
+    for i in range(10):
+        http.get_security_headers(f'https://evil{i}.example')
+
+    assert list(http._security_by_origin) == [None]
+
+
+@pytest.mark.parametrize('headers, token', [
+    ({'Authorization': 'Bearer abc'}, 'abc'),
+    ({'x-authorization': 'Bearer abc'}, 'abc'),
+    ({'Cookie': 'theme=dark; auth_token=abc=def'}, 'abc=def'),
+    ({'X-Cookie': 'auth_token=abc'}, 'abc'),
+    ({'Authorization': 'Basic abc'}, ''),
+    ({}, ''),
+])
+def test_extract_token(headers, token):
+    assert http.extract_token(headers) == token
@@ -0,0 +1,58 @@
+import pytest
+
+from portal_common.pagination import (
+    encode_cursor, decode_cursor, parse_limit, keyset_condition, page_result
+)
+
+
+@pytest.mark.parametrize('sort_value', ['2026-10-16 12:00:00+00:00', '00042', 17, None])
+def test_cursor_round_trip(sort_value):
+    cursor = encode_cursor(sort_value, 123)
+
+    assert '=' not in cursor
+    assert decode_cursor(cursor) == (sort_value, 123)
+
+
+def test_cursor_serializes_datetimes_as_strings():
+    from datetime import datetime
+
+    assert decode_cursor(encode_cursor(datetime(2026, 10, 16, 12, 0), 1)) == ('2026-10-16 12:00:00', 1)
+
+
+@pytest.mark.parametrize('cursor', ['', 'not-a-cursor', encode_cursor('x', 1)[:-3], 'WzEsMiwzXQ', 'WyJ4IiwieSJd'])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        decode_cursor(cursor)
+
+
+@pytest.mark.parametrize('value, expected', [(None, 50), ('', 50), ('10', 10), ('0', 1), ('-5', 1), ('1000', 200), (30, 30)])
+def test_parse_limit(value, expected):
+    assert parse_limit(value, 50, 200) == expected
+
+
+@pytest.mark.parametrize('value', ['ten', '1.5', [1]])
+def test_parse_limit_rejects_garbage(value):
+    with pytest.raises(ValueError, match='Invalid limit'):
+        parse_limit(value, 50, 200)
+
+
+def test_keyset_condition():
+    cursor = encode_cursor('2026-10-16', 7)
+
+    assert keyset_condition('created_at', 'DESC', cursor) == ("(created_at, id) < (%s, %s)", ['2026-10-16', 7])
+    assert keyset_condition('b.created_at', 'ASC', cursor, 'b.id') == ("(b.created_at, b.id) > (%s, %s)", ['2026-10-16', 7])
+
+
+def test_page_result_without_more_rows():
+    rows = [{'id': 2, 'created_at': 'b'}, {'id': 1, 'created_at': 'a'}]
+
+    assert page_result(rows, 2, 'created_at') == (rows, None)
+
+
+def test_page_result_trims_probe_row():
+    rows = [{'id': 3, 'created_at': 'c'}, {'id': 2, 'created_at': 'b'}, {'id': 1, 'created_at': 'a'}]
+
+    page, next_cursor = page_result(rows, 2, 'created_at')
+
+    assert page == rows[:2]
+    assert decode_cursor(next_cursor) == ('b', 2)
@@ -0,0 +1,16 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+import sync_portal_common
+
+
+def test_every_function_bundles_portal_common():
+    assert set(sync_portal_common.functions()) >= {'auth', 'bolo', 'crews', 'events', 'maintenance',
+                                                   'notifications', 'users-manage'}
+
+
+def test_shared_copies_match_canonical():
+    # При расхождении: python scripts/sync_portal_common.py
+    assert sync_portal_common.find_drift() == []
@@ -0,0 +1,188 @@
+import threading
+
+import pytest
+
+import rate_limiter
+from rate_limiter import MemoryStore, WINDOW_MINUTES, BLOCK_MINUTES
+
+
+class Clock:
+    """Управляемое монотонное время"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def store(clock):
+    return MemoryStore(max_tracked=100, clock=clock)
+
+
+@pytest.fixture
+def limiter(store):
+    previous = rate_limiter.get_store()
+    rate_limiter.set_store(store)
+    yield rate_limiter
+    rate_limiter.set_store(previous)
+
+
+def test_blocks_after_max_attempts(store):
+    results = [store.record_failure('ip:a', 5, BLOCK_MINUTES) for _ in range(5)]
+
+    assert results == [False, False, False, False, True]
+    assert store.is_blocked('ip:a')
+    assert not store.is_blocked('ip:b')
+
+
+def test_reports_block_only_once(store):
+    for _ in range(5):
+        store.record_failure('ip:a', 5, BLOCK_MINUTES)
+
+    assert not store.record_failure('ip:a', 5, BLOCK_MINUTES)
+    assert store.is_blocked('ip:a')
+
+
+def test_failures_leave_sliding_window(store, clock):
+    for _ in range(4):
+        store.record_failure('ip:a', 5, BLOCK_MINUTES)
+    clock.advance(WINDOW_MINUTES * 60 + 60)
+
+    assert store.failures('ip:a') == 0
+    assert not store.record_failure('ip:a', 5, BLOCK_MINUTES)
+
+
+def test_window_slides_by_bucket(store, clock):
+    store.record_failure('ip:a', 5, BLOCK_MINUTES)
+    clock.advance(5 * 60)
+    store.record_failure('ip:a', 5, BLOCK_MINUTES)
+    clock.advance((WINDOW_MINUTES - 4) * 60)
+
+    assert store.failures('ip:a') == 1
+
+
+def test_block_expires_and_count_restarts(store, clock):
+    for _ in range(5):
+        store.record_failure('ip:a', 5, BLOCK_MINUTES)
+    clock.advance(BLOCK_MINUTES * 60 - 1)
+    assert store.is_blocked('ip:a')
+
+    clock.advance(2)
+    assert not store.is_blocked('ip:a')
+    assert store.failures('ip:a') == 0
+    assert not store.record_failure('ip:a', 5, BLOCK_MINUTES)
+
+
+def test_evicts_least_recently_active_keys(clock):
+    store = MemoryStore(max_tracked=3, clock=clock)
+    for key in ('ip:a', 'ip:b', 'ip:c'):
+        store.record_failure(key, 5, BLOCK_MINUTES)
+    store.record_failure('ip:a', 5, BLOCK_MINUTES)
+    store.record_failure('ip:d', 5, BLOCK_MINUTES)
+
+    assert store.failures('ip:b') == 0
+    assert store.failures('ip:a') == 2
+    assert store.failures('ip:d') == 1
+
+
+def test_blocked_keys_are_never_evicted(clock):
+    store = MemoryStore(max_tracked=3, clock=clock)
+    for _ in range(5):
+        store.record_failure('ip:attacker', 5, BLOCK_MINUTES)
+    for i in range(50):
+        store.record_failure(f'account:user{i}@example.com', 10, BLOCK_MINUTES)
+
+    assert store.is_blocked('ip:attacker')
+
+
+def test_expired_blocks_are_swept_when_blocked_map_is_full(clock):
+    store = MemoryStore(max_tracked=2, clock=clock)
+    for key in ('ip:a', 'ip:b'):
+        store.record_failure(key, 1, BLOCK_MINUTES)
+    clock.advance(BLOCK_MINUTES * 60 + 1)
+    store.record_failure('ip:c', 1, BLOCK_MINUTES)
+
+    assert set(store._blocked) == {'ip:c'}
+
+
+def test_is_blocked_checks_either_key(store, clock):
+    for _ in range(5):
+        store.record_failure('ip:a', 5, BLOCK_MINUTES)
+
+    assert store.is_blocked('account:x', 'ip:a')
+    assert store.is_blocked('ip:a', 'account:x')
+    assert not store.is_blocked('account:x', 'ip:b')
+    clock.advance(BLOCK_MINUTES * 60)
+    assert not store.is_blocked('account:x', 'ip:a')
+
+
+def test_record_failures_counts_every_key_once(store):
+    limits = [('ip:a', 5, BLOCK_MINUTES), ('account:x', 3, BLOCK_MINUTES)]
+    assert store.record_failures(limits) == ([], 2)
+    store.record_failures(limits)
+    assert store.record_failures(limits) == (['account:x'], 0)
+    assert store.failures('ip:a') == 3
+    assert store.record_failures(limits) == ([], 0)
+
+
+def test_record_failed_login_returns_remaining_attempts(limiter):
+    remaining = [limiter.record_failed_login('10.0.0.1', 'user@example.com')
+                 for _ in range(rate_limiter.MAX_ATTEMPTS)]
+
+    assert remaining == list(range(rate_limiter.MAX_ATTEMPTS - 1, -1, -1))
+    assert limiter.is_blocked('10.0.0.1', 'user@example.com')
+
+
+def test_limits_ip_and_account_together(limiter):
+    account = 'user@example.com'
+    for i in range(rate_limiter.ACCOUNT_MAX_ATTEMPTS):
+        # Каждая попытка с нового IP — лимит по IP не срабатывает
+        assert not limiter.is_blocked(f'10.0.0.{i}', account)
+        limiter.record_attempt(f'10.0.0.{i}', False, account)
+
+    assert limiter.is_blocked('10.0.0.200', account)
+    assert not limiter.is_blocked('10.0.0.200', 'other@example.com')
+
+
+def test_remaining_attempts_uses_tightest_limit(limiter):
+    for _ in range(2):
+        limiter.record_attempt('10.0.0.1', False, 'user@example.com')
+
+    assert limiter.get_remaining_attempts('10.0.0.1', 'user@example.com') == rate_limiter.MAX_ATTEMPTS - 2
+    assert limiter.get_remaining_attempts('10.0.0.2') == rate_limiter.MAX_ATTEMPTS
+
+
+def test_successful_attempts_are_not_counted(limiter):
+    for _ in range(10):
+        limiter.record_attempt('10.0.0.1', True, 'user@example.com')
+
+    assert not limiter.is_blocked('10.0.0.1', 'user@example.com')
+    assert limiter.get_remaining_attempts('10.0.0.1') == rate_limiter.MAX_ATTEMPTS
+
+
+def test_concurrent_failures_block_exactly_once(clock):
+    store = MemoryStore(clock=clock)
+    results = []
+
+    def worker():
+        for _ in range(50):
+            results.append(store.record_failure('ip:a', 100, BLOCK_MINUTES))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(True) == 1
+    assert store.failures('ip:a') == 400
@@ -0,0 +1,85 @@
+import time
+
+import pytest
+
+from portal_common import sessions, tokens
+
+USER = {'id': 7, 'user_id': '00007', 'email': 'user@example.com', 'full_name': 'Иван Петров',
+        'role': 'user', 'is_active': True}
+
+
+class FakeCursor:
+    def __init__(self, row):
+        self.row = row
+        self.executed = 0
+
+    def execute(self, query, params=None):
+        self.executed += 1
+
+    def fetchone(self):
+        return self.row
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, row):
+        self.cur = FakeCursor(row)
+
+    def cursor(self):
+        return self.cur
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """Сессия в «БД»: row — то, что вернёт запрос проверки"""
+    state = {'row': dict(USER, session_ttl=3600), 'queries': 0}
+
+    def connect():
+        state['queries'] += 1
+        return FakeConnection(state['row'])
+
+    monkeypatch.setattr(sessions, 'get_db_connection', connect)
+    monkeypatch.setattr(sessions, 'release_connection', lambda conn: None)
+    monkeypatch.setattr(sessions, '_entries', type(sessions._entries)())
+    monkeypatch.setattr(tokens, 'TOKEN_MODE', 'opaque')
+    monkeypatch.setattr(tokens, '_revoked_jtis', {})
+    monkeypatch.setattr(tokens, '_revoked_users', {})
+    monkeypatch.setattr(tokens, '_next_refresh', float('inf'))
+    return state
+
+
+def test_second_check_is_served_from_cache(db):
+    assert sessions.verify_token('abc') == USER
+    assert sessions.verify_token('abc') == USER
+    assert db['queries'] == 1
+
+
+def test_logout_in_another_container_drops_cached_session(db):
+    sessions.verify_token('abc')
+    tokens._revoked_jtis[tokens.opaque_jti(sessions.hash_token('abc'))] = time.time() + 3600
+    db['row'] = None
+
+    assert sessions.verify_token('abc') is None
+    assert db['queries'] == 2
+
+
+def test_user_revocation_rechecks_the_database(db):
+    sessions.verify_token('abc')
+    tokens._revoked_users[USER['id']] = (time.time(), time.time() + 3600)
+    db['row'] = dict(USER, role='admin', session_ttl=3600)
+
+    assert sessions.verify_token('abc')['role'] == 'admin'
+    # Перепроверенная запись свежее отзыва и снова обслуживается из кеша
+    assert sessions.verify_token('abc')['role'] == 'admin'
+    assert db['queries'] == 2
+
+
+def test_invalidate_users_clears_local_entries(db):
+    sessions.verify_token('abc')
+    sessions.invalidate_users([USER['id']])
+    tokens._next_refresh = float('inf')
+
+    sessions.verify_token('abc')
+    assert db['queries'] == 2
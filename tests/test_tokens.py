@@ -0,0 +1,123 @@
+import time
+
+import pytest
+
+from portal_common import tokens
+
+USER = {'id': 7, 'user_id': '00007', 'email': 'user@example.com', 'full_name': 'Иван Петров',
+        'role': 'user', 'is_active': True}
+
+
+class RecordingCursor:
+    """Курсор, запоминающий запросы вместо обращения к БД"""
+
+    def __init__(self):
+        self.queries = []
+
+    def execute(self, query, params=None):
+        self.queries.append((query, params))
+
+
+@pytest.fixture(autouse=True)
+def signed(monkeypatch):
+    """Подписанный режим с пустым кешем отзывов, который не ходит в БД"""
+    monkeypatch.setattr(tokens, 'TOKEN_MODE', 'signed')
+    monkeypatch.setattr(tokens, 'SIGNING_KEY', 'test-key')
+    monkeypatch.setattr(tokens, '_revoked_jtis', {})
+    monkeypatch.setattr(tokens, '_revoked_users', {})
+    monkeypatch.setattr(tokens, '_next_refresh', float('inf'))
+
+
+def issue(expires_in=3600):
+    return tokens.issue_token(USER, time.time() + expires_in)
+
+
+def test_round_trip():
+    token = issue()
+
+    assert tokens.is_signed(token)
+    assert tokens.verify_signed_token(token) == USER
+
+
+def test_tampered_payload_is_rejected():
+    prefix, payload, signature = issue().split('.')
+    other = tokens.issue_token(dict(USER, role='admin'), time.time() + 3600).split('.')[1]
+
+    assert tokens.decode_token(f'{prefix}.{other}.{signature}') is None
+    assert tokens.decode_token(f'{prefix}.{payload}.{signature[:-2]}') is None
+
+
+def test_other_key_is_rejected(monkeypatch):
+    token = issue()
+    monkeypatch.setattr(tokens, 'SIGNING_KEY', 'another-key')
+
+    assert tokens.decode_token(token) is None
+
+
+def test_expired_token_is_rejected():
+    assert tokens.decode_token(issue(expires_in=-1)) is None
+
+
+@pytest.mark.parametrize('token', ['', 'opaque-token', 'v1.', 'v1.a.b.c', 'v1.!!!.sig'])
+def test_malformed_tokens_are_rejected(token):
+    assert tokens.decode_token(token) is None
+
+
+def test_revoked_jti():
+    token = issue()
+    claims = tokens.decode_token(token)
+    tokens._revoked_jtis[claims['jti']] = claims['exp']
+
+    assert tokens.verify_signed_token(token) is None
+    assert tokens.verify_signed_token(issue()) == USER
+
+
+def test_user_revocation_applies_to_earlier_tokens_only():
+    old = issue()
+    tokens._revoked_users[USER['id']] = (time.time(), time.time() + 3600)
+    time.sleep(0.01)
+
+    assert tokens.verify_signed_token(old) is None
+    assert tokens.verify_signed_token(issue()) == USER
+
+
+def test_revoke_users_tokens_is_one_insert():
+    cur = RecordingCursor()
+    tokens.revoke_users_tokens(cur, [1, 2, 3])
+
+    assert len(cur.queries) == 1
+    query, params = cur.queries[0]
+    assert 'unnest' in query
+    assert params == ([1, 2, 3], tokens.SESSION_DAYS)
+
+
+def test_revoke_token_records_jti():
+    token = issue()
+    cur = RecordingCursor()
+    tokens.revoke_token(cur, token)
+
+    claims = tokens.decode_token(token)
+    assert cur.queries[0][1] == (USER['id'], claims['jti'], claims['exp'])
+
+
+def test_token_jti_matches_revocation_jti():
+    # sessions.jti отзывает вытесненную сессию той же строкой, что и revoke_token
+    token = issue()
+    assert tokens.token_jti(token) == tokens.decode_token(token)['jti']
+    opaque = 'opaque-token'
+    assert tokens.token_jti(opaque) == tokens.opaque_jti(tokens.hashlib.sha256(opaque.encode()).hexdigest())
+    assert len(tokens.token_jti(opaque)) <= 32 and len(tokens.token_jti(token)) <= 32
+
+
+def test_opaque_mode_still_records_revocations(monkeypatch):
+    # Кеш сессий других контейнеров узнаёт об отзыве из той же таблицы
+    monkeypatch.setattr(tokens, 'TOKEN_MODE', 'opaque')
+    cur = RecordingCursor()
+    tokens.revoke_users_tokens(cur, [1, 2])
+    tokens.revoke_token(cur, 'opaque-token')
+
+    assert not tokens.signed_mode()
+    assert cur.queries[0][1] == ([1, 2], tokens.SESSION_DAYS)
+    query, params = cur.queries[1]
+    assert 'FROM t_p77465986_police_portal_creati.sessions' in query
+    assert params[0] == params[1][:32] and len(params[1]) == 64